@@ -337,6 +337,9 @@ MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ENV_TOKENS.get(
     'MODULESTORE_FIELD_OVERRIDE_PROVIDERS',
     MODULESTORE_FIELD_OVERRIDE_PROVIDERS
 )
+STRUCTURE_INDEX_PROCESS_CACHE_SIZE = ENV_TOKENS.get(
+    'STRUCTURE_INDEX_PROCESS_CACHE_SIZE', STRUCTURE_INDEX_PROCESS_CACHE_SIZE
+)
 
 XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
     'XBLOCK_FIELD_DATA_WRAPPERS',
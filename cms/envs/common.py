@@ -445,6 +445,11 @@ MODULESTORE = {
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
 
+# The maximum total number of blocks of the split modulestore course
+# structures whose indexes are kept in the memory of each process.  0
+# disables this cache.
+STRUCTURE_INDEX_PROCESS_CACHE_SIZE = 500000
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -1,9 +1,18 @@
 """
 Helper functions for caching course assets.
+
+Cached assets are stored along with a random stamp, under a separate key.
+When the COURSE_ASSETS_PROCESS_CACHE_SIZE setting is set, the most
+recently used assets are also kept in the memory of each process, and are
+validated by fetching just their stamp from the cache.
 """
+from uuid import uuid4
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
+from openedx.core.lib.cache_utils import ProcessLRUCache
 from xmodule.contentstore.content import STATIC_CONTENT_VERSION
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
@@ -13,19 +22,57 @@ try:
 except InvalidCacheBackendError:
     pass
 
+# The cache of assets in the memory of this process, created on first use;
+# see get_process_cache.
+_PROCESS_CACHE = None
+
 
 def set_cached_content(content):
     """
     Stores the given piece of content in the cache, using its location as the key.
     """
-    CONTENT_CACHE.set(unicode(content.location).encode("utf-8"), content, version=STATIC_CONTENT_VERSION)
+    cache_key = _get_cache_key(content.location)
+    CONTENT_CACHE.set_many(
+        {cache_key: content, _get_stamp_cache_key(cache_key): uuid4().hex},
+        version=STATIC_CONTENT_VERSION,
+    )
 
 
 def get_cached_content(location):
     """
     Retrieves the given piece of content by its location if cached.
     """
-    return CONTENT_CACHE.get(unicode(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
+    cache_key = _get_cache_key(location)
+    process_cache = get_process_cache()
+    if process_cache is None:
+        return CONTENT_CACHE.get(cache_key, version=STATIC_CONTENT_VERSION)
+
+    # Use the content kept in memory if it's up to date.  The stamp is
+    # fetched before the content, so that content replaced in the meantime
+    # is never kept with a newer stamp.
+    stamp = CONTENT_CACHE.get(_get_stamp_cache_key(cache_key), version=STATIC_CONTENT_VERSION)
+    process_cache_entry = process_cache.get(cache_key)
+    if stamp is not None and process_cache_entry is not None and process_cache_entry[0] == stamp:
+        return process_cache_entry[1]
+
+    content = CONTENT_CACHE.get(cache_key, version=STATIC_CONTENT_VERSION)
+    if stamp is not None and content is not None and content.length is not None:
+        process_cache.set(cache_key, (stamp, content), content.length)
+    return content
+
+
+def get_process_cache():
+    """
+    Returns the cache for keeping assets in the memory of this process, or
+    None if the COURSE_ASSETS_PROCESS_CACHE_SIZE setting does not enable it.
+    """
+    global _PROCESS_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'COURSE_ASSETS_PROCESS_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+    if _PROCESS_CACHE is None or _PROCESS_CACHE.max_size != max_size:
+        _PROCESS_CACHE = ProcessLRUCache('contentserver.process_cache', max_size)
+    return _PROCESS_CACHE
 
 
 def del_cached_content(location):
@@ -35,15 +82,34 @@ def del_cached_content(location):
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
     """
-    def location_str(loc):
-        """Force the location to a Unicode string."""
-        return unicode(loc).encode("utf-8")
-
-    locations = [location_str(location)]
+    locations = [_get_cache_key(location)]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(_get_cache_key(location.replace(run=None)))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.delete_many(
+        locations + [_get_stamp_cache_key(cache_key) for cache_key in locations],
+        version=STATIC_CONTENT_VERSION,
+    )
+    process_cache = get_process_cache()
+    if process_cache is not None:
+        for cache_key in locations:
+            process_cache.delete(cache_key)
+
+
+def _get_cache_key(location):
+    """
+    Returns the cache key of the content at the given location, which is
+    the location forced to a Unicode string.
+    """
+    return unicode(location).encode("utf-8")
+
+
+def _get_stamp_cache_key(cache_key):
+    """
+    Returns the cache key of the stamp of the content cached under the
+    given cache key.
+    """
+    return cache_key + ".stamp"
@@ -4,16 +4,18 @@ Middleware to serve assets.
 
 import logging
 import datetime
+from uuid import uuid4
+
 import newrelic.agent
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
-    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect, StreamingHttpResponse)
 from student.models import CourseEnrollment
 from contentserver.models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 from header_control import force_header_for_response
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
@@ -27,6 +29,10 @@ from xmodule.exceptions import NotFoundError
 log = logging.getLogger(__name__)
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# The size of the chunks in which assets streamed from the contentstore are sent.  This is the
+# default size of GridFS chunks, so that each chunk is read from a single GridFS chunk.
+STREAMING_CHUNK_SIZE = 255 * 1024
+
 
 class StaticContentServer(object):
     """
@@ -102,11 +108,10 @@ class StaticContentServer(object):
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            if self.is_not_modified(request, content):
+                response = HttpResponseNotModified()
+                self.set_caching_headers(content, response)
+                return response
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -116,10 +121,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -132,35 +133,49 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
+                        # Ignore the ranges that can't be satisfied, and coalesce the others so that
+                        # no byte is sent twice.
+                        ranges = coalesce_ranges([
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ])
+
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        if len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = self.create_content_response(
+                                content,
+                                content.stream_data_in_range(first, last, STREAMING_CHUNK_SIZE),
+                                content.content_type,
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            newrelic.agent.add_custom_parameter('contentserver.ranged', True)
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            # Content for multiple ranges is sent as a multipart message.
+                            # https://tools.ietf.org/html/rfc7233#section-4.1
+                            multipart = MultipartByteRanges(content, ranges)
+                            response = self.create_content_response(
+                                content,
+                                multipart.stream_data(STREAMING_CHUNK_SIZE),
+                                multipart.content_type,
                             )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Length'] = str(multipart.length)
+                        response.status_code = 206  # Partial Content
+
+                        newrelic.agent.add_custom_parameter('contentserver.ranged', True)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = self.create_content_response(
+                    content, content.stream_data(STREAMING_CHUNK_SIZE), content.content_type
+                )
                 response['Content-Length'] = content.length
 
             newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
@@ -168,7 +183,6 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
@@ -203,11 +217,63 @@ class StaticContentServer(object):
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
 
+        etag = StaticContentServer.get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
+
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
         # caches a version of the response without CORS headers, in turn breaking XHR requests.
         force_header_for_response(response, 'Vary', 'Origin')
 
+    @staticmethod
+    def create_content_response(content, data, content_type):
+        """
+        Returns a response with the given data of the given content, and the given content type.
+
+        Content that is streamed from the contentstore is sent as it is read, in large chunks,
+        rather than being buffered in memory first.  Content that is already in memory is sent
+        as is.
+        """
+        if isinstance(content, StaticContentStream):
+            return StreamingHttpResponse(data, content_type=content_type)
+        return HttpResponse(data, content_type=content_type)
+
+    @staticmethod
+    def get_etag(content):
+        """
+        Returns the strong entity tag of the given content, which is based on its digest, or
+        None if the content has no digest.
+        """
+        content_digest = getattr(content, "content_digest", None)
+        if not content_digest:
+            return None
+        return '"{}"'.format(content_digest)
+
+    @staticmethod
+    def is_not_modified(request, content):
+        """
+        Determines whether the client already has the current version of the given content,
+        based on the conditional headers of the request.
+
+        As per RFC 7232, If-None-Match takes precedence over If-Modified-Since, which is only
+        compared as a string with the content's Last-Modified date.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etag = StaticContentServer.get_etag(content)
+            for entity_tag in if_none_match.split(','):
+                entity_tag = entity_tag.strip()
+                # Weak comparison is used for GET and HEAD requests.
+                if entity_tag.startswith('W/'):
+                    entity_tag = entity_tag[2:]
+                if entity_tag == '*' or (etag is not None and entity_tag == etag):
+                    return True
+            return False
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        return if_modified_since == content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+
     @staticmethod
     def is_cdn_request(request):
         """
@@ -321,3 +387,69 @@ def parse_range_header(header_value, content_length):
         raise ValueError('Invalid syntax')
 
     return unit, ranges
+
+
+def coalesce_ranges(ranges):
+    """
+    Returns the given list of (first, last) byte ranges sorted, with overlapping and adjacent
+    ranges merged into a single range.
+    """
+    coalesced_ranges = []
+    for first, last in sorted(ranges):
+        if coalesced_ranges and first <= coalesced_ranges[-1][1] + 1:
+            coalesced_ranges[-1] = (coalesced_ranges[-1][0], max(last, coalesced_ranges[-1][1]))
+        else:
+            coalesced_ranges.append((first, last))
+    return coalesced_ranges
+
+
+class MultipartByteRanges(object):
+    """
+    The multipart/byteranges message for sending the given ranges of a piece of content.
+
+    See spec for details: https://tools.ietf.org/html/rfc7233#appendix-A
+    """
+    def __init__(self, content, ranges):
+        self.content = content
+        self.ranges = ranges
+        self.boundary = uuid4().hex
+        self.content_type = 'multipart/byteranges; boundary={}'.format(self.boundary)
+
+        # The headers preceding the data of each range, and the end of the message.
+        self._part_headers = [
+            (
+                u'\r\n--{boundary}\r\n'
+                u'Content-Type: {content_type}\r\n'
+                u'Content-Range: bytes {first}-{last}/{length}\r\n'
+                u'\r\n'
+            ).format(
+                boundary=self.boundary,
+                content_type=content.content_type,
+                first=first,
+                last=last,
+                length=content.length,
+            ).encode('utf-8')
+            for first, last in ranges
+        ]
+        self._closing_delimiter = '\r\n--{boundary}--\r\n'.format(boundary=self.boundary)
+
+    @property
+    def length(self):
+        """
+        The length of the message, in bytes.
+        """
+        return (
+            sum(len(part_header) for part_header in self._part_headers) +
+            sum(last - first + 1 for first, last in self.ranges) +
+            len(self._closing_delimiter)
+        )
+
+    def stream_data(self, chunk_size):
+        """
+        Stream the message, reading the data of each range in chunks of the given size.
+        """
+        for part_header, (first, last) in zip(self._part_headers, self.ranges):
+            yield part_header
+            for chunk in self.content.stream_data_in_range(first, last, chunk_size):
+                yield chunk
+        yield self._closing_delimiter
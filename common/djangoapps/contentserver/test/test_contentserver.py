@@ -10,7 +10,8 @@ import unittest
 from uuid import uuid4
 
 from django.conf import settings
-from django.test import RequestFactory
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, SimpleTestCase
 from django.test.client import Client
 from django.test.utils import override_settings
 from mock import patch
@@ -22,9 +23,13 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_course_from_xml
 from xmodule.assetstore.assetmgr import AssetManager
 from opaque_keys import InvalidKeyError
+from opaque_keys.edx.locator import CourseLocator
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from contentserver.middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from contentserver.caching import del_cached_content, get_cached_content, set_cached_content
+from contentserver.middleware import (
+    coalesce_ranges, parse_range_header, HTTP_DATE_FORMAT, MultipartByteRanges, StaticContentServer
+)
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
@@ -241,16 +246,54 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with the content of
+        each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        boundary = resp['Content-Type'].split('boundary=')[1]
+
+        data = AssetManager.find(self.unlocked_asset).data
+        body = self._get_response_data(resp)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+        parts = body.split('--' + boundary)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(parts[3], '--\r\n')
+        for part, (first, last) in zip(parts[1:3], [(first_byte, last_byte), (self.length_unlocked - 100, None)]):
+            headers, part_data = part.split('\r\n\r\n', 1)
+            self.assertIn(
+                'Content-Range: bytes {first}-{last}/{length}'.format(
+                    first=first, last=last or self.length_unlocked - 1, length=self.length_unlocked
+                ),
+                headers,
+            )
+            self.assertEqual(part_data, data[first:(last + 1 if last else None)] + '\r\n')
+
+    def test_range_request_overlapping_ranges(self):
+        """
+        Test that overlapping ranges in request are coalesced into a single range.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-99, 50-149, 150-199')
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], 'bytes 0-199/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '200')
+
+    def test_range_request_partially_satisfiable_ranges(self):
+        """
+        Test that the ranges in request that can't be satisfied are ignored.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-99, {first}-'.format(
+            first=self.length_unlocked))
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], 'bytes 0-99/{length}'.format(length=self.length_unlocked))
 
     @ddt.data(
         'bytes 0-',
@@ -284,6 +327,68 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    def test_etag(self):
+        """
+        Tests that the ETag header is based on the asset's digest, and that conditional
+        requests with If-None-Match are answered accordingly.
+        """
+        content = AssetManager.find(self.unlocked_asset, as_stream=True)
+        etag = '"{}"'.format(content.content_digest)
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['ETag'], etag)
+
+        for if_none_match in (etag, 'W/' + etag, '"other", ' + etag, '*'):
+            resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(resp.status_code, 304)
+            self.assertEqual(resp['ETag'], etag)
+
+        # If-None-Match takes precedence over If-Modified-Since.
+        resp = self.client.get(
+            self.url_unlocked,
+            HTTP_IF_NONE_MATCH='"{}"'.format(FAKE_MD5_HASH),
+            HTTP_IF_MODIFIED_SINCE=content.last_modified_at.strftime(HTTP_DATE_FORMAT),
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Tests that conditional requests with If-Modified-Since are answered accordingly.
+        """
+        content = AssetManager.find(self.unlocked_asset, as_stream=True)
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_MODIFIED_SINCE=content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        )
+        self.assertEqual(resp.status_code, 304)
+        self.assertEquals('Origin', resp['Vary'])
+
+    @ddt.data(True, False)
+    def test_content_sent(self, as_stream):
+        """
+        Tests that assets are sent in full, whether they are streamed from the contentstore
+        or loaded in memory.
+        """
+        data = AssetManager.find(self.unlocked_asset).data
+        content = AssetManager.find(self.unlocked_asset, as_stream=as_stream)
+        with patch.object(StaticContentServer, 'load_asset_from_location', return_value=content):
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.streaming, as_stream)
+        self.assertEqual(self._get_response_data(resp), data)
+
+        content = AssetManager.find(self.unlocked_asset, as_stream=as_stream)
+        with patch.object(StaticContentServer, 'load_asset_from_location', return_value=content):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(self._get_response_data(resp), data[10:20])
+
+    def _get_response_data(self, resp):
+        """
+        Returns the data sent in the given response.
+        """
+        if resp.streaming:
+            return ''.join(resp.streaming_content)
+        return resp.content
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
@@ -446,3 +551,84 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+@ddt.ddt
+class CoalesceRangesTestCase(unittest.TestCase):
+    """
+    Tests for the coalesce_ranges function.
+    """
+    @ddt.data(
+        ([(100, 199)], [(100, 199)]),
+        ([(100, 199), (300, 399)], [(100, 199), (300, 399)]),
+        ([(300, 399), (100, 199)], [(100, 199), (300, 399)]),
+        ([(100, 199), (150, 249)], [(100, 249)]),
+        ([(100, 199), (120, 149)], [(100, 199)]),
+        ([(100, 199), (200, 299)], [(100, 299)]),
+        ([(100, 199), (300, 399), (150, 349)], [(100, 399)]),
+        ([(9900, 9999), (9800, 9999)], [(9800, 9999)]),
+        ([], []),
+    )
+    @ddt.unpack
+    def test_coalesce_ranges(self, ranges, expected_ranges):
+        self.assertEqual(coalesce_ranges(ranges), expected_ranges)
+
+
+class MultipartByteRangesTestCase(unittest.TestCase):
+    """
+    Tests for the MultipartByteRanges class.
+    """
+    def test_stream_data(self):
+        content = StaticContent('loc', 'name', 'text/plain', '0123456789' * 10, length=100)
+        multipart = MultipartByteRanges(content, [(0, 4), (90, 99)])
+        self.assertEqual(multipart.content_type, 'multipart/byteranges; boundary=' + multipart.boundary)
+
+        body = ''.join(multipart.stream_data(10))
+        self.assertEqual(len(body), multipart.length)
+        self.assertEqual(
+            body,
+            (
+                '\r\n--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 0-4/100\r\n\r\n01234'
+                '\r\n--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes 90-99/100\r\n\r\n0123456789'
+                '\r\n--{boundary}--\r\n'
+            ).format(boundary=multipart.boundary),
+        )
+
+
+@override_settings(COURSE_ASSETS_PROCESS_CACHE_SIZE=1024)
+@patch('contentserver.caching._PROCESS_CACHE', None)
+class ContentCachingTestCase(SimpleTestCase):
+    """
+    Tests for caching assets, in the cache and in the memory of the process.
+    """
+    def setUp(self):
+        super(ContentCachingTestCase, self).setUp()
+        self.cache = LocMemCache(uuid4().hex, {})
+        cache_patcher = patch('contentserver.caching.CONTENT_CACHE', self.cache)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.location = StaticContent.compute_location(CourseLocator('org', 'course', 'run'), 'image.png')
+        self.content = StaticContent(self.location, 'image.png', 'image/png', 'data', length=4)
+
+    def test_get_from_process_cache(self):
+        self.assertIsNone(get_cached_content(self.location))
+        set_cached_content(self.content)
+        cached_content = get_cached_content(self.location)
+        self.assertEqual(cached_content.data, 'data')
+
+        # Only the stamp is fetched from the cache, and the content kept in memory is returned.
+        with patch.object(self.cache, 'get', wraps=self.cache.get) as mock_get:
+            self.assertIs(get_cached_content(self.location), cached_content)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_replaced_content(self):
+        set_cached_content(self.content)
+        get_cached_content(self.location)
+        set_cached_content(StaticContent(self.location, 'image.png', 'image/png', 'new data', length=8))
+        self.assertEqual(get_cached_content(self.location).data, 'new data')
+
+    def test_deleted_content(self):
+        set_cached_content(self.content)
+        get_cached_content(self.location)
+        del_cached_content(self.location)
+        self.assertIsNone(get_cached_content(self.location))
@@ -11,6 +11,7 @@ file and check it in at the same time as your model changes. To do that,
 3. Add the migration file created in edx-platform/common/djangoapps/embargo/migrations/
 """
 
+import bisect
 import ipaddr
 import json
 import logging
@@ -675,11 +676,32 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        For fast lookups, the networks are compiled into sorted lists of the
+        first and last addresses of disjoint address ranges, per IP version.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            ranges = {}
+            for network in self.networks:
+                ranges.setdefault(network.version, []).append((int(network.network), int(network.broadcast)))
+
+            self._range_firsts = {}
+            self._range_lasts = {}
+            for version, version_ranges in ranges.iteritems():
+                firsts, lasts = [], []
+                for first, last in sorted(version_ranges):
+                    if lasts and first <= lasts[-1] + 1:
+                        # Merge overlapping and adjacent networks
+                        lasts[-1] = max(lasts[-1], last)
+                    else:
+                        firsts.append(first)
+                        lasts.append(last)
+                self._range_firsts[version] = firsts
+                self._range_lasts[version] = lasts
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -690,11 +712,9 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
-                    return True
-
-            return False
+            firsts = self._range_firsts.get(ip.version, [])
+            index = bisect.bisect_right(firsts, int(ip)) - 1
+            return index >= 0 and int(ip) <= self._range_lasts[ip.version][index]
 
     @property
     def whitelist_ips(self):
@@ -32,6 +32,7 @@ from embargo.models import (
 from util.testing import UrlResetMixin
 from embargo import api as embargo_api
 from embargo.exceptions import InvalidAccessPoint
+from geoinfo.api import clear_cache as clear_geoip_cache
 from mock import patch
 
 
@@ -229,6 +230,7 @@ class EmbargoCheckAccessApiTests(ModuleStoreTestCase):
 
     @contextmanager
     def _mock_geoip(self, country_code):
+        clear_geoip_cache()
         with mock.patch.object(pygeoip.GeoIP, 'country_code_by_addr') as mock_ip:
             mock_ip.return_value = country_code
             yield
@@ -105,6 +105,17 @@ class EmbargoModelsTest(CacheIsolationTestCase):
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
 
+    def test_ip_overlapping_network_blocking(self):
+        blacklist = '1.1.0.0/16, 1.1.2.0/24, 1.2.0.0/16, 1.0.255.255, 10.0.0.0/8, 2001:db8::/32'
+
+        IPFilter(blacklist=blacklist).save()
+
+        cblacklist = IPFilter.current().blacklist_ips
+        for ip in ('1.0.255.255', '1.1.0.0', '1.1.2.3', '1.2.255.255', '10.1.2.3', '2001:db8::1'):
+            self.assertTrue(ip in cblacklist)
+        for ip in ('1.0.255.254', '1.3.0.0', '9.255.255.255', '11.0.0.0', '2001:db9::1', '::1.1.2.3', 'invalid'):
+            self.assertFalse(ip in cblacklist)
+
 
 class RestrictedCourseTest(CacheIsolationTestCase):
     """Test RestrictedCourse model. """
@@ -0,0 +1,99 @@
+"""
+Lookup of the countries of IP addresses in the GeoIP databases.
+
+Each database is opened once per process, memory-mapped, and reopened
+when its file changes.  The countries of recently looked up addresses are
+also kept in memory, since the same few addresses tend to make most of
+the requests.
+"""
+import os
+import threading
+import time
+
+import pygeoip
+from django.conf import settings
+
+from openedx.core.lib.cache_utils import ProcessLRUCache
+
+
+# How often, in seconds, to check whether the file of a database has changed.
+RELOAD_CHECK_INTERVAL = 60
+
+# The number of recently looked up addresses whose countries are kept in memory.
+COUNTRY_CODE_CACHE_SIZE = 10000
+
+_COUNTRY_CODE_CACHE = ProcessLRUCache('geoinfo.country_code_cache', COUNTRY_CODE_CACHE_SIZE)
+
+
+class GeoIPDatabase(object):
+    """
+    A GeoIP database file, opened on first use and reopened when the file
+    is modified.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._geoip = None
+        self._modified_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get_geoip(self):
+        """
+        Return the pygeoip.GeoIP reader for the current contents of the file.
+        """
+        now = time.time()
+        if self._checked_at is None or now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+                    modified_at = os.path.getmtime(self.path)
+                    if modified_at != self._modified_at:
+                        self._geoip = pygeoip.GeoIP(self.path, pygeoip.MMAP_CACHE)
+                        self._modified_at = modified_at
+                        # Forget the countries found in the previous contents of the file.
+                        _COUNTRY_CODE_CACHE.clear()
+                    self._checked_at = now
+        return self._geoip
+
+
+# dict of database path -> GeoIPDatabase
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+
+def _get_database(path):
+    """
+    Return the GeoIPDatabase for the file at the given path.
+    """
+    database = _DATABASES.get(path)
+    if database is None:
+        with _DATABASES_LOCK:
+            database = _DATABASES.setdefault(path, GeoIPDatabase(path))
+    return database
+
+
+def country_code_by_addr(ip_addr):
+    """
+    Return the country code associated with an IP address.
+    Handles both IPv4 and IPv6 addresses.
+
+    Args:
+        ip_addr (str): The IP address to look up.
+
+    Returns:
+        str: A 2-letter country code.
+
+    """
+    path = settings.GEOIPV6_PATH if ip_addr.find(':') >= 0 else settings.GEOIP_PATH
+    cache_key = (path, ip_addr)
+    country_code = _COUNTRY_CODE_CACHE.get(cache_key)
+    if country_code is None:
+        country_code = _get_database(path).get_geoip().country_code_by_addr(ip_addr)
+        _COUNTRY_CODE_CACHE.set(cache_key, country_code, 1)
+    return country_code
+
+
+def clear_cache():
+    """
+    Forget the countries of the recently looked up addresses.
+    """
+    _COUNTRY_CODE_CACHE.clear()
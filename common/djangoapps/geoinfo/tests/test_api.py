@@ -0,0 +1,64 @@
+"""
+Tests for the geoinfo API.
+"""
+from mock import patch
+import pygeoip
+
+from django.conf import settings
+from django.test import TestCase
+
+from geoinfo import api as geoinfo_api
+
+
+class CountryCodeByAddrTests(TestCase):
+    """
+    Tests of country_code_by_addr.
+    """
+    def setUp(self):
+        super(CountryCodeByAddrTests, self).setUp()
+        geoinfo_api.clear_cache()
+        self.addCleanup(geoinfo_api.clear_cache)
+        geoinfo_api._DATABASES.clear()  # pylint: disable=protected-access
+        self.addCleanup(geoinfo_api._DATABASES.clear)  # pylint: disable=protected-access
+
+        patcher = patch.object(pygeoip.GeoIP, 'country_code_by_addr')
+        self.mock_country_code_by_addr = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_country_code_by_addr.return_value = 'CN'
+
+    def test_country_code(self):
+        self.assertEqual(geoinfo_api.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(geoinfo_api.country_code_by_addr('2001:da8:20f:1502:edcf:550b:4a9c:207d'), 'CN')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
+
+    def test_country_code_cached(self):
+        geoinfo_api.country_code_by_addr('117.79.83.1')
+        self.mock_country_code_by_addr.return_value = 'US'
+        self.assertEqual(geoinfo_api.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 1)
+
+        geoinfo_api.clear_cache()
+        self.assertEqual(geoinfo_api.country_code_by_addr('117.79.83.1'), 'US')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
+
+    @patch('geoinfo.api.time.time')
+    @patch('geoinfo.api.os.path.getmtime')
+    @patch('geoinfo.api.pygeoip.GeoIP')
+    def test_database_reloaded(self, mock_geoip, mock_getmtime, mock_time):
+        mock_geoip.return_value.country_code_by_addr.return_value = 'CN'
+        mock_time.return_value = 1000
+        mock_getmtime.return_value = 100
+        geoinfo_api.country_code_by_addr('117.79.83.1')
+        geoinfo_api.country_code_by_addr('117.79.83.2')
+        mock_geoip.assert_called_once_with(settings.GEOIP_PATH, pygeoip.MMAP_CACHE)
+
+        # The file isn't checked again until the check interval has passed.
+        mock_getmtime.return_value = 200
+        geoinfo_api.country_code_by_addr('117.79.83.3')
+        self.assertEqual(mock_geoip.call_count, 1)
+
+        # Once the file is reopened, the countries found in its previous contents are forgotten.
+        mock_time.return_value = 1000 + geoinfo_api.RELOAD_CHECK_INTERVAL
+        mock_geoip.return_value.country_code_by_addr.return_value = 'US'
+        self.assertEqual(geoinfo_api.country_code_by_addr('117.79.83.1'), 'US')
+        self.assertEqual(mock_geoip.call_count, 2)
@@ -144,13 +144,7 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY)
-    hasher.update(unicode(user.id))
-    if course_id:
-        hasher.update(unicode(course_id).encode('utf-8'))
-    digest = hasher.hexdigest()
+    digest = _compute_anonymous_id(user.id, course_id)
 
     if not hasattr(user, '_anonymous_id'):
         user._anonymous_id = {}  # pylint: disable=protected-access
@@ -185,6 +179,80 @@ def anonymous_id_for_user(user, course_id, save=True):
     return digest
 
 
+def anonymous_ids_for_users(user_ids, course_id, save=True):
+    """
+    Return the unique ids for many (user, course) pairs, as a dict keyed by
+    user id.
+
+    This is the bulk version of `anonymous_id_for_user`: the ids that aren't
+    saved in AnonymousUserId objects yet are saved with a single query. Unlike
+    `anonymous_id_for_user`, it takes user ids rather than users, so the ids
+    are never remembered on the user objects.
+
+    Keyword arguments:
+    save -- Whether the ids should be saved in AnonymousUserId objects.
+    """
+    digests = {user_id: _compute_anonymous_id(user_id, course_id) for user_id in user_ids}
+    if not digests or save is False:
+        return digests
+
+    saved_ids = AnonymousUserId.objects.filter(
+        user_id__in=digests.keys(),
+        course_id=course_id,
+    ).values_list('user_id', 'anonymous_user_id')
+    unsaved_user_ids = set(digests)
+    for user_id, anonymous_user_id in saved_ids:
+        unsaved_user_ids.discard(user_id)
+        if anonymous_user_id != digests[user_id]:
+            log.error(
+                u"Stored anonymous user id %(anonymous_user_id)r for "
+                u"user %(user_id)r in course %(course_id)r doesn't match "
+                u"computed id %(digest)r", {
+                    "anonymous_user_id": anonymous_user_id,
+                    "user_id": user_id,
+                    "course_id": course_id,
+                    "digest": digests[user_id],
+                }
+            )
+    if not unsaved_user_ids:
+        return digests
+
+    try:
+        with transaction.atomic():
+            AnonymousUserId.objects.bulk_create([
+                AnonymousUserId(user_id=user_id, course_id=course_id, anonymous_user_id=digests[user_id])
+                for user_id in unsaved_user_ids
+            ])
+    except IntegrityError:
+        # Another thread has already created some of these entries, so
+        # create the rest one at a time
+        for user_id in unsaved_user_ids:
+            try:
+                with transaction.atomic():
+                    AnonymousUserId.objects.get_or_create(
+                        defaults={'anonymous_user_id': digests[user_id]},
+                        user_id=user_id,
+                        course_id=course_id
+                    )
+            except IntegrityError:
+                pass
+
+    return digests
+
+
+def _compute_anonymous_id(user_id, course_id):
+    """
+    Compute the unique id of a (user, course) pair.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY)
+    hasher.update(unicode(user_id))
+    if course_id:
+        hasher.update(unicode(course_id).encode('utf-8'))
+    return hasher.hexdigest()
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -23,7 +23,7 @@ from django.test.client import Client
 
 from course_modes.models import CourseMode
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment,
+    anonymous_id_for_user, anonymous_ids_for_users, user_by_anonymous_id, CourseEnrollment,
     unique_id_for_user, LinkedInAddToProfileConfiguration, UserAttribute
 )
 from student.views import (
@@ -888,6 +888,27 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
 
+    def test_bulk_roundtrip(self):
+        users = [self.user, UserFactory(), UserFactory()]
+        saved_id = anonymous_id_for_user(users[0], self.course.id)
+        with self.assertNumQueries(4):  # one SELECT, and one INSERT between a SAVEPOINT pair
+            anonymous_ids = anonymous_ids_for_users([user.id for user in users], self.course.id)
+        self.assertEqual(anonymous_ids[self.user.id], saved_id)
+        for user in users:
+            self.assertEqual(user, user_by_anonymous_id(anonymous_ids[user.id]))
+            self.assertEqual(anonymous_ids[user.id], anonymous_id_for_user(user, self.course.id, save=False))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(anonymous_ids, anonymous_ids_for_users([user.id for user in users], self.course.id))
+
+    def test_bulk_without_saving(self):
+        users = [self.user, UserFactory()]
+        with self.assertNumQueries(0):
+            anonymous_ids = anonymous_ids_for_users([user.id for user in users], self.course.id, save=False)
+        for user in users:
+            self.assertIsNone(user_by_anonymous_id(anonymous_ids[user.id]))
+            self.assertEqual(anonymous_ids[user.id], anonymous_id_for_user(user, self.course.id, save=False))
+
 
 # TODO: Clean up these tests so that they use program factories.
 @attr('shard_3')
@@ -16,12 +16,20 @@ Usage:
     needed. Currently called in:
         - LMS: Announcements + Bulk emails
         - CMS: Not called
+
+    Strings that are substituted for many users, like bulk emails, can be
+    compiled once into a KeywordTemplate, which is passed instead of the string.
 """
+import re
 
 from django.contrib.auth.models import User
 from student.models import anonymous_id_for_user
 
 
+KEYWORDS = ('%%USER_ID%%', '%%USER_FULLNAME%%', '%%COURSE_DISPLAY_NAME%%', '%%COURSE_END_DATE%%')
+KEYWORD_PATTERN = re.compile('({})'.format('|'.join(re.escape(keyword) for keyword in KEYWORDS)))
+
+
 def anonymous_id_from_user_id(user_id):
     """
     Gets a user's anonymous id from their user id
@@ -30,30 +38,54 @@ def anonymous_id_from_user_id(user_id):
     return anonymous_id_for_user(user, None)
 
 
-def substitute_keywords(string, user_id, context):
+class KeywordTemplate(object):
     """
-    Replaces all %%-encoded words using KEYWORD_FUNCTION_MAP mapping functions
+    A string split once at its %%-encoded keywords, so that it can be
+    substituted for many users without being searched again.
+    """
+    def __init__(self, string):
+        self.string = string
+        self.parts = KEYWORD_PATTERN.split(string)
+        self.keywords = frozenset(self.parts[1::2])
 
-    Iterates through all keywords that must be substituted and replaces
-    them by calling the corresponding functions stored in KEYWORD_FUNCTION_MAP.
+    def substitute(self, user_id, context):
+        """
+        Returns the string with all of its keywords replaced using
+        KEYWORD_FUNCTION_MAP mapping functions, each called only once.
+        """
+        keyword_function_map = _keyword_function_map(user_id, context)
+        values = {keyword: keyword_function_map[keyword]() for keyword in self.keywords}
+
+        parts = list(self.parts)
+        parts[1::2] = [values[keyword] for keyword in self.parts[1::2]]
+        return ''.join(parts)
 
-    Functions stored in KEYWORD_FUNCTION_MAP must return a replacement string.
-    """
 
+def _keyword_function_map(user_id, context):
+    """
+    Returns the functions that compute the replacement string of each
+    keyword.  If `context` includes the user's `anonymous_user_id`, it is
+    used rather than looked up.
+    """
     # do this lazily to avoid unneeded database hits
-    KEYWORD_FUNCTION_MAP = {
-        '%%USER_ID%%': lambda: anonymous_id_from_user_id(user_id),
+    return {
+        '%%USER_ID%%': lambda: context.get('anonymous_user_id') or anonymous_id_from_user_id(user_id),
         '%%USER_FULLNAME%%': lambda: context.get('name'),
         '%%COURSE_DISPLAY_NAME%%': lambda: context.get('course_title'),
         '%%COURSE_END_DATE%%': lambda: context.get('course_end_date'),
     }
 
-    for key in KEYWORD_FUNCTION_MAP.keys():
-        if key in string:
-            substitutor = KEYWORD_FUNCTION_MAP[key]
-            string = string.replace(key, substitutor())
 
-    return string
+def substitute_keywords(string, user_id, context):
+    """
+    Replaces all %%-encoded words using KEYWORD_FUNCTION_MAP mapping functions
+
+    Iterates through all keywords that must be substituted and replaces
+    them by calling the corresponding functions stored in KEYWORD_FUNCTION_MAP.
+
+    Functions stored in KEYWORD_FUNCTION_MAP must return a replacement string.
+    """
+    return KeywordTemplate(string).substitute(user_id, context)
 
 
 def substitute_keywords_with_data(string, context):
@@ -61,7 +93,10 @@ def substitute_keywords_with_data(string, context):
     Given an email context, replaces all %%-encoded words in the given string
     `context` is a dictionary that should include `user_id` and `course_title`
     keys
+
+    `string` may also be a KeywordTemplate, compiled once for many contexts.
     """
+    template = string if isinstance(string, KeywordTemplate) else KeywordTemplate(string)
 
     # Do not proceed without parameters: Compatibility check with existing tests
     # that do not supply these parameters
@@ -69,6 +104,6 @@ def substitute_keywords_with_data(string, context):
     course_title = context.get('course_title')
 
     if user_id is None or course_title is None:
-        return string
+        return template.string
 
-    return substitute_keywords(string, user_id, context)
+    return template.substitute(user_id, context)
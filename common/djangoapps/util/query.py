@@ -7,3 +7,20 @@ def use_read_replica_if_available(queryset):
     If there is a database called 'read_replica', use that database for the queryset.
     """
     return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
+
+
+def iterate_in_pk_batches(queryset, batch_size):
+    """
+    Yields the objects of `queryset` in primary key order, fetching them in
+    batches of `batch_size` objects with a query per batch.
+
+    Unlike iterating over the queryset itself, which fetches and caches all of
+    its objects at once, only one batch is held in memory at a time, however
+    many objects the queryset matches.
+    """
+    queryset = queryset.order_by('pk')
+    batch = list(queryset[:batch_size])
+    while batch:
+        for obj in batch:
+            yield obj
+        batch = list(queryset.filter(pk__gt=batch[-1].pk)[:batch_size])
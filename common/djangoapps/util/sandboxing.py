@@ -1,9 +1,18 @@
 import re
 from django.conf import settings
 
+from openedx.core.lib.cache_utils import ProcessLRUCache
+
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# The maximum total size, in bytes, of the python_lib.zip files kept in the
+# memory of the process.
+PYTHON_LIB_ZIP_CACHE_SIZE = 32 * 1024 * 1024
+
+# The content digest and bytes of each course's python_lib.zip, keyed by course.
+_PYTHON_LIB_ZIP_CACHE = ProcessLRUCache('sandboxing.python_lib_zip_cache', PYTHON_LIB_ZIP_CACHE_SIZE)
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -31,10 +40,27 @@ def can_execute_unsafe_code(course_id):
 
 
 def get_python_lib_zip(contentstore, course_id):
-    """Return the bytes of the python_lib.zip file, if any."""
+    """
+    Return the bytes of the python_lib.zip file, if any.
+
+    The bytes of the most recently used files are cached per process, along
+    with the digest of their contents, so they are only read from the
+    contentstore when the file changes.
+    """
     asset_key = course_id.make_asset_key("asset", PYTHON_LIB_ZIP)
-    zip_lib = contentstore().find(asset_key, throw_on_not_found=False)
-    if zip_lib is not None:
-        return zip_lib.data
-    else:
+    zip_lib = contentstore().find(asset_key, throw_on_not_found=False, as_stream=True)
+    if zip_lib is None:
         return None
+
+    try:
+        if zip_lib.content_digest is None:
+            return "".join(zip_lib.stream_data())
+
+        cached = _PYTHON_LIB_ZIP_CACHE.get(course_id)
+        if cached is not None and cached[0] == zip_lib.content_digest:
+            return cached[1]
+        data = "".join(zip_lib.stream_data())
+        _PYTHON_LIB_ZIP_CACHE.set(course_id, (zip_lib.content_digest, data), len(data))
+        return data
+    finally:
+        zip_lib.close()
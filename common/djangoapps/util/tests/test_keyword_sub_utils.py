@@ -125,3 +125,19 @@ class KeywordSubTest(ModuleStoreTestCase):
         )
         result = Ks.substitute_keywords_with_data(test_string, no_user_id_context)
         self.assertEqual(test_string, result)
+
+    def test_compiled_template(self):
+        """
+        Test that a compiled template is subbed without looking up an
+        anonymous id that the context already provides
+        """
+        template = Ks.KeywordTemplate("Hi %%USER_FULLNAME%% (%%USER_ID%%), welcome to %%COURSE_DISPLAY_NAME%%")
+        self.assertEqual(template.keywords, {'%%USER_FULLNAME%%', '%%USER_ID%%', '%%COURSE_DISPLAY_NAME%%'})
+
+        context = dict(self.context, anonymous_user_id='123456789')
+        with self.assertNumQueries(0):
+            result = Ks.substitute_keywords_with_data(template, context)
+        self.assertEqual(result, "Hi Test User (123456789), welcome to test_course")
+
+        del context['course_title']
+        self.assertEqual(Ks.substitute_keywords_with_data(template, context), template.string)
@@ -3,8 +3,11 @@ Tests for sandboxing.py in util app
 """
 
 from django.test import TestCase
+from mock import Mock, patch
 from opaque_keys.edx.locator import LibraryLocator
-from util.sandboxing import can_execute_unsafe_code
+from openedx.core.lib.cache_utils import ProcessLRUCache
+from util import sandboxing
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -37,3 +40,39 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+
+class PythonLibZipTest(TestCase):
+    """
+    Test that python_lib.zip is only read when its contents change
+    """
+    def setUp(self):
+        super(PythonLibZipTest, self).setUp()
+        self.course_id = SlashSeparatedCourseKey('edX', 'full', '2012_Fall')
+        self.zip_lib = Mock(content_digest='digest1')
+        self.zip_lib.stream_data.return_value = iter(['zip', 'bytes'])
+        self.contentstore = Mock()
+        self.contentstore.return_value.find.return_value = self.zip_lib
+        self.addCleanup(sandboxing._PYTHON_LIB_ZIP_CACHE.clear)  # pylint: disable=protected-access
+
+    def test_no_python_lib_zip(self):
+        self.contentstore.return_value.find.return_value = None
+        self.assertIsNone(get_python_lib_zip(self.contentstore, self.course_id))
+
+    def test_read_once_per_digest(self):
+        self.assertEqual(get_python_lib_zip(self.contentstore, self.course_id), 'zipbytes')
+        self.assertEqual(get_python_lib_zip(self.contentstore, self.course_id), 'zipbytes')
+        self.assertEqual(self.zip_lib.stream_data.call_count, 1)
+        self.assertEqual(self.zip_lib.close.call_count, 2)
+
+        self.zip_lib.content_digest = 'digest2'
+        self.zip_lib.stream_data.return_value = iter(['new bytes'])
+        self.assertEqual(get_python_lib_zip(self.contentstore, self.course_id), 'new bytes')
+        self.assertEqual(self.zip_lib.stream_data.call_count, 2)
+
+    @patch('util.sandboxing._PYTHON_LIB_ZIP_CACHE', ProcessLRUCache('test', 4))
+    def test_not_cached_beyond_size(self):
+        self.assertEqual(get_python_lib_zip(self.contentstore, self.course_id), 'zipbytes')
+        self.zip_lib.stream_data.return_value = iter(['zip', 'bytes'])
+        self.assertEqual(get_python_lib_zip(self.contentstore, self.course_id), 'zipbytes')
+        self.assertEqual(self.zip_lib.stream_data.call_count, 2)
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +76,11 @@ SUFFIXES = {
 }
 
 
+# The number of parsed expressions to keep, so that the expressions of a
+# problem needn't be parsed again each time an answer is checked.
+PARSE_CACHE_SIZE = 1000
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -115,6 +123,16 @@ def eval_number(parse_result):
     return super_float("".join(parse_result))
 
 
+def is_value(token):
+    """
+    Return whether `token` is a computed value, rather than an operator.
+
+    Values are numbers, or arrays of numbers when evaluating several samples
+    at once.
+    """
+    return isinstance(token, (numbers.Number, numpy.ndarray))
+
+
 def eval_atom(parse_result):
     """
     Return the value wrapped by the atom.
@@ -122,7 +140,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if is_value(k))
     return result
 
 
@@ -136,7 +154,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if is_value(k)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -158,7 +176,7 @@ def eval_parallel(parse_result):
     if 0 in parse_result:
         return float('nan')
     reciprocals = [1. / e for e in parse_result
-                   if isinstance(e, numbers.Number)]
+                   if is_value(e)]
     return 1. / sum(reciprocals)
 
 
@@ -173,12 +191,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        if is_value(token):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +209,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if is_value(token):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -216,35 +234,47 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
-def evaluator(variables, functions, math_expr, case_sensitive=False):
+_PARSE_CACHE = OrderedDict()
+_PARSE_CACHE_LOCK = threading.Lock()
+
+
+def parse_expression(math_expr, case_sensitive=False):
     """
-    Evaluate an expression; that is, take a string of math and return a float.
+    Return a `ParseAugmenter` holding the parse of `math_expr`.
 
-    -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
-    -Unary functions are passed as a dictionary from string to function.
+    Parses are cached for the most recently used expressions, so the
+    returned object is shared and mustn't be modified.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    key = (math_expr, case_sensitive)
+    with _PARSE_CACHE_LOCK:
+        math_interpreter = _PARSE_CACHE.pop(key, None)
+        if math_interpreter is not None:
+            # Move the parse to the most recently used end.
+            _PARSE_CACHE[key] = math_interpreter
+            return math_interpreter
 
-    # Parse the tree.
     math_interpreter = ParseAugmenter(math_expr, case_sensitive)
     math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE[key] = math_interpreter
+        while len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    return math_interpreter
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
+def evaluate_actions(all_variables, all_functions, case_sensitive):
+    """
+    Return the actions that `ParseAugmenter.reduce_tree` needs to evaluate
+    a tree with the given variables and functions.
+    """
     # Create a recursion to evaluate the tree.
     if case_sensitive:
         casify = lambda x: x
     else:
         casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
+    return {
         'number': eval_number,
         'variable': lambda x: all_variables[casify(x[0])],
         'function': lambda x: all_functions[casify(x[0])](x[1]),
@@ -255,7 +285,82 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         'sum': eval_sum
     }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+def evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression; that is, take a string of math and return a float.
+
+    -Variables are passed as a dictionary from string to value. They must be
+     python numbers.
+    -Unary functions are passed as a dictionary from string to function.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return float('nan')
+
+    # Parse the tree.
+    math_interpreter = parse_expression(math_expr, case_sensitive)
+
+    # Get our variables together.
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+
+    # ...and check them
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    return math_interpreter.reduce_tree(evaluate_actions(all_variables, all_functions, case_sensitive))
+
+
+def evaluate_samples(samples, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of a list of samples; return the list of
+    results, as `evaluator` would for each sample.
+
+    -Samples are dictionaries from variable names to values, which must all
+     have the same variables.
+    -Unary functions are passed as a dictionary from string to function.
+
+    The expression is parsed once, and evaluated over arrays of the samples'
+    values where it can be. Where that's not possible, or where the arrays
+    meet a division by zero, an overflow or an invalid operation, the
+    samples are evaluated one by one instead, so that the results and errors
+    are exactly those of `evaluator`.
+    """
+    if not samples:
+        return []
+
+    # No need to go further.
+    if math_expr.strip() == "":
+        return [float('nan')] * len(samples)
+
+    math_interpreter = parse_expression(math_expr, case_sensitive)
+
+    variable_arrays = {
+        name: numpy.array([sample[name] for sample in samples])
+        for name in samples[0]
+    }
+    all_variables, all_functions = add_defaults(variable_arrays, functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    # pylint: disable=broad-except
+    try:
+        with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+            results = numpy.asarray(
+                math_interpreter.reduce_tree(evaluate_actions(all_variables, all_functions, case_sensitive))
+            )
+    except Exception:
+        results = None
+
+    if results is not None and results.ndim == 0:
+        # The expression doesn't depend on the samples.
+        return [results.item()] * len(samples)
+    if results is not None and results.shape == (len(samples),):
+        return results.tolist()
+
+    results = []
+    for sample in samples:
+        all_variables, all_functions = add_defaults(sample, functions, case_sensitive)
+        results.append(math_interpreter.reduce_tree(evaluate_actions(all_variables, all_functions, case_sensitive)))
+    return results
 
 
 class ParseAugmenter(object):
@@ -559,3 +559,63 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parse_cached(self):
+        """
+        Check that an expression is only parsed once for repeated evaluations
+        """
+        calc.evaluator({'x': 1.0}, {}, "x^2+3*x")
+        parse = calc.parse_expression("x^2+3*x")
+        self.assertEqual(calc.evaluator({'x': 2.0}, {}, "x^2+3*x"), 10.0)
+        self.assertIs(calc.parse_expression("x^2+3*x"), parse)
+        self.assertIsNot(calc.parse_expression("x^2+3*x", case_sensitive=True), parse)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which should give the results that
+    calc.evaluator gives for each sample.
+    """
+    samples = [{'x': 1.5, 'Y': 2.0}, {'x': 0.5, 'Y': -3.0}, {'x': 2.0, 'Y': 0.25}]
+
+    def assert_same_as_evaluator(self, math_expr, case_sensitive=False):
+        """
+        Check that evaluating `math_expr` for all the samples at once gives
+        the results of evaluating it for each sample in turn.
+        """
+        expected = [calc.evaluator(sample, {}, math_expr, case_sensitive) for sample in self.samples]
+        results = calc.evaluate_samples(self.samples, {}, math_expr, case_sensitive)
+        self.assertEqual(len(results), len(expected))
+        for result, expected_result in zip(results, expected):
+            if numpy.isnan(expected_result):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected_result)
+
+    def test_vectorized(self):
+        self.assert_same_as_evaluator("x^2 + 3*y - sin(x)/y")
+        self.assert_same_as_evaluator("x*Y", case_sensitive=True)
+        self.assert_same_as_evaluator("(x + 2*i) * sqrt(x)")
+
+    def test_constant(self):
+        self.assert_same_as_evaluator("2*pi")
+        self.assert_same_as_evaluator("")
+
+    def test_not_vectorizable(self):
+        # The parallel operator and factorial only work on single numbers.
+        self.assert_same_as_evaluator("x || y")
+        self.assert_same_as_evaluator("fact(3) * x")
+
+    def test_errors(self):
+        """
+        Check that the errors of evaluator are raised
+        """
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.samples, {}, "1/(x-1.5)")
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.evaluate_samples(self.samples, {}, "fact(x)")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.samples, {}, "x+z")
+
+    def test_no_samples(self):
+        self.assertEqual(calc.evaluate_samples([], {}, "x+1"), [])
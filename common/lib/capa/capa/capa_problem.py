@@ -29,7 +29,7 @@ import capa.customrender as customrender
 import capa.responsetypes as responsetypes
 from capa.util import contextualize_text, convert_files_to_filenames
 import capa.xqueue_interface as xqueue_interface
-from capa.safe_exec import safe_exec
+from capa.safe_exec import python_lib_zip_path, safe_exec
 
 
 # extra things displayed after "show answers" is pressed
@@ -693,13 +693,11 @@ class LoncapaProblem(object):
             code = unescape(script.text, XMLESC)
             all_code += code
 
-        extra_files = []
         if all_code:
             # An asset named python_lib.zip can be imported by Python code.
             zip_lib = self.capa_system.get_python_lib_zip()
             if zip_lib is not None:
-                extra_files.append(("python_lib.zip", zip_lib))
-                python_path.append("python_lib.zip")
+                python_path.append(python_lib_zip_path(zip_lib))
 
             try:
                 safe_exec(
@@ -707,7 +705,6 @@ class LoncapaProblem(object):
                     context,
                     random_seed=self.seed,
                     python_path=python_path,
-                    extra_files=extra_files,
                     cache=self.capa_system.cache,
                     slug=self.problem_id,
                     unsafely=self.capa_system.can_execute_unsafe_code(),
@@ -720,7 +717,6 @@ class LoncapaProblem(object):
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
-        context['extra_files'] = extra_files or None
         return context
 
     def _extract_html(self, problemtree):  # private
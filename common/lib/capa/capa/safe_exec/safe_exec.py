@@ -6,7 +6,13 @@ from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
 from dogapi import dog_stats_api
 
+import atexit
+import collections
 import hashlib
+import os
+import shutil
+import tempfile
+import threading
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +52,20 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Zip files of Python code are written to a temporary directory by
+# python_lib_zip_path, once per process for each distinct content.  The most
+# recently used files are kept, up to a total size in bytes of
+# PYTHON_LIB_ZIP_FILES_MAX_SIZE; the others are deleted.
+PYTHON_LIB_ZIP = "python_lib.zip"
+PYTHON_LIB_ZIP_FILES_MAX_SIZE = 32 * 1024 * 1024
+PYTHON_LIB_ZIP_DIGESTS = {}
+_PYTHON_LIB_ZIP_DIR = None
+# The bytestring last passed in for each file, keyed by digest, from the least
+# to the most recently used.
+_PYTHON_LIB_ZIP_FILES = collections.OrderedDict()
+_PYTHON_LIB_ZIP_FILES_SIZE = 0
+_PYTHON_LIB_ZIP_LOCK = threading.Lock()
+
 
 def update_hash(hasher, obj):
     """
@@ -70,6 +90,65 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def python_lib_zip_path(zip_lib):
+    """
+    Return the path of a file holding the zip file bytestring `zip_lib`, to
+    put in the `python_path` of `safe_exec`.
+
+    Each distinct zip file is written to disk once per process, under a
+    directory named by the digest of its contents.  It is then referenced by
+    every execution that uses it, rather than written out for each one.  The
+    bytestring last passed in for each file is remembered, so that a cached
+    bytestring passed in again doesn't need to be hashed again.  Files that
+    haven't been used recently are deleted once the total size of the files
+    exceeds PYTHON_LIB_ZIP_FILES_MAX_SIZE.
+    """
+    global _PYTHON_LIB_ZIP_DIR, _PYTHON_LIB_ZIP_FILES_SIZE  # pylint: disable=global-statement
+
+    with _PYTHON_LIB_ZIP_LOCK:
+        if _PYTHON_LIB_ZIP_DIR is None:
+            _PYTHON_LIB_ZIP_DIR = tempfile.mkdtemp(prefix="capa-python-lib-")
+            atexit.register(shutil.rmtree, _PYTHON_LIB_ZIP_DIR, True)
+
+        digest = next(
+            (known_digest for known_digest, known_zip_lib in _PYTHON_LIB_ZIP_FILES.iteritems()
+             if known_zip_lib is zip_lib),
+            None
+        )
+        if digest is None:
+            digest = hashlib.md5(zip_lib).hexdigest()
+        if digest in _PYTHON_LIB_ZIP_FILES:
+            del _PYTHON_LIB_ZIP_FILES[digest]
+        else:
+            _PYTHON_LIB_ZIP_FILES_SIZE += len(zip_lib)
+        # Move the file to the most recently used end.
+        _PYTHON_LIB_ZIP_FILES[digest] = zip_lib
+
+        path = _python_lib_zip_file_path(digest)
+        if not os.path.exists(path):
+            if not os.path.isdir(os.path.dirname(path)):
+                os.mkdir(os.path.dirname(path))
+            with open(path, "wb") as zip_file:
+                zip_file.write(zip_lib)
+        PYTHON_LIB_ZIP_DIGESTS[path] = digest
+
+        # Delete the least recently used files, always keeping this one.
+        while _PYTHON_LIB_ZIP_FILES_SIZE > PYTHON_LIB_ZIP_FILES_MAX_SIZE and len(_PYTHON_LIB_ZIP_FILES) > 1:
+            evicted_digest, evicted_zip_lib = _PYTHON_LIB_ZIP_FILES.popitem(last=False)
+            _PYTHON_LIB_ZIP_FILES_SIZE -= len(evicted_zip_lib)
+            evicted_path = _python_lib_zip_file_path(evicted_digest)
+            PYTHON_LIB_ZIP_DIGESTS.pop(evicted_path, None)
+            shutil.rmtree(os.path.dirname(evicted_path), True)
+        return path
+
+
+def _python_lib_zip_file_path(digest):
+    """
+    Return the path of the zip file whose contents have the given digest.
+    """
+    return os.path.join(_PYTHON_LIB_ZIP_DIR, digest, PYTHON_LIB_ZIP)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -92,7 +171,8 @@ def safe_exec(
 
     `python_path` is a list of filenames or directories to add to the Python
     path before execution.  If the name is not in `extra_files`, then it will
-    also be copied into the sandbox.
+    also be copied into the sandbox.  Zip files from `python_lib_zip_path`
+    are taken into account by the digest of their contents.
 
     `extra_files` is a list of (filename, contents) pairs.  These files are
     created in the sandbox.
@@ -113,6 +193,7 @@ def safe_exec(
         md5er = hashlib.md5()
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
+        update_hash(md5er, [PYTHON_LIB_ZIP_DIGESTS.get(path, path) for path in python_path or ()])
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
         if cached is not None:
@@ -6,10 +6,13 @@ import os.path
 import random
 import textwrap
 import unittest
+import zipfile
+from cStringIO import StringIO
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import python_lib_zip_path, safe_exec, update_hash
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -65,6 +68,37 @@ class TestSafeExec(unittest.TestCase):
             g, python_path=[pylib]
         )
 
+    def test_python_lib_zip(self):
+        zip_buffer = StringIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+            zip_file.write(os.path.dirname(__file__) + "/test_files/pylib/constant.py", "constant.py")
+        zip_lib = zip_buffer.getvalue()
+        path = python_lib_zip_path(zip_lib)
+        self.assertEqual(os.path.basename(path), "python_lib.zip")
+        self.assertEqual(python_lib_zip_path(zip_buffer.getvalue()), path)
+        g = {}
+        safe_exec(
+            "import constant; a = constant.THE_CONST",
+            g, python_path=[path]
+        )
+        self.assertEqual(g['a'], 23)
+
+    def test_python_lib_zip_files_deleted(self):
+        with patch('capa.safe_exec.safe_exec.PYTHON_LIB_ZIP_FILES_MAX_SIZE', 10):
+            first_path = python_lib_zip_path("first zip file")
+            self.assertTrue(os.path.exists(first_path))
+
+            # The least recently used file is deleted once the files are
+            # larger than allowed.
+            second_path = python_lib_zip_path("second zip file")
+            self.assertTrue(os.path.exists(second_path))
+            self.assertFalse(os.path.exists(first_path))
+
+            # A deleted file is written again when needed.
+            self.assertEqual(python_lib_zip_path("first zip file"), first_path)
+            self.assertTrue(os.path.exists(first_path))
+            self.assertFalse(os.path.exists(second_path))
+
     def test_raising_exceptions(self):
         g = {}
         with self.assertRaises(SafeExecException) as cm:
@@ -12,7 +12,6 @@ structure:
 }
 """
 
-import copy
 from datetime import datetime
 from importlib import import_module
 import logging
@@ -172,6 +171,105 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
         )
 
 
+class MetadataInheritanceTree(object):
+    """
+    The parents of the blocks of a course, and the inheritable metadata set on its containers.
+
+    Only the metadata set on each container is stored, so that the tree stays small when
+    cached; the metadata inherited by a block is resolved from its ancestors the first time
+    it is requested, and then shared by all the blocks that inherit it.
+    """
+    def __init__(self):
+        # dict of branch -> dict of location url -> parent location url
+        self._parents = {}
+        # dict of container location url -> inheritable metadata set on it
+        self._metadata = {}
+        # dict of location url -> resolved inherited metadata, not cached with the tree
+        self._inherited_metadata = {}
+
+    def __getstate__(self):
+        return {'_parents': self._parents, '_metadata': self._metadata}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._inherited_metadata = {}
+
+    def __repr__(self):
+        return "MetadataInheritanceTree{!r}".format((self._parents, self._metadata))
+
+    def add_container(self, url, metadata):
+        """
+        Record the inheritable metadata set on the container at the given location url.
+        """
+        if metadata:
+            self._metadata[url] = metadata
+        else:
+            self._metadata.pop(url, None)
+        self._inherited_metadata.clear()
+
+    def add_child(self, url, parent_url, branch):
+        """
+        Record the parent of the block at the given location url in the given branch.
+        """
+        self._parents.setdefault(branch, {})[url] = parent_url
+        self._inherited_metadata.clear()
+
+    def update(self, other):
+        """
+        Add the parents and metadata recorded in the other tree to this one.
+        """
+        if other is self:
+            return
+        for branch, parents in other._parents.iteritems():  # pylint: disable=protected-access
+            self._parents.setdefault(branch, {}).update(parents)
+        self._metadata.update(other._metadata)  # pylint: disable=protected-access
+        self._inherited_metadata.clear()
+
+    def get_parent(self, url, branch):
+        """
+        Return the location url of the parent of the block at the given location url in the
+        given branch, or None if it isn't known.
+        """
+        return self._parents.get(branch, {}).get(url)
+
+    def get_inherited_metadata(self, url):
+        """
+        Return the dict of the metadata inherited by the block at the given location url,
+        including the metadata set on the block itself if it is a container.
+
+        The returned dict is shared and must not be modified.
+        """
+        if self._get_any_parent(url) is None:
+            # The root of the course inherits nothing.
+            return {}
+        return self._resolve_metadata(url)
+
+    def _get_any_parent(self, url):
+        """
+        Return the location url of the parent of the block at the given location url in any
+        branch, or None if it isn't known.
+        """
+        for parents in self._parents.itervalues():
+            if url in parents:
+                return parents[url]
+        return None
+
+    def _resolve_metadata(self, url):
+        """
+        Return the metadata in effect at the given location url: the metadata set on the block
+        overriding the metadata in effect at its parent.
+        """
+        metadata = self._inherited_metadata.get(url)
+        if metadata is None:
+            parent_url = self._get_any_parent(url)
+            metadata = self._resolve_metadata(parent_url) if parent_url is not None else {}
+            if url in self._metadata:
+                metadata = metadata.copy()
+                metadata.update(self._metadata[url])
+            self._inherited_metadata[url] = metadata
+        return metadata
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     """
     A system that has a cache of module json that it will use to load modules
@@ -183,7 +281,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
             unicode(self.course_id),
             [unicode(key) for key in self.module_data.keys()],
             self.default_class,
-            [unicode(key) for key in self.cached_metadata.keys()],
+            self.cached_metadata,
         ))
 
     def __init__(self, modulestore, course_key, module_data, default_class, cached_metadata, **kwargs):
@@ -198,7 +296,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         default_class: The default_class to use when loading an
             XModuleDescriptor from the module_data
 
-        cached_metadata: the cache for handling inheritance computation. internal use only
+        cached_metadata: the MetadataInheritanceTree for handling inheritance computation. internal use only
 
         resources_fs: a filesystem, as per MakoDescriptorSystem
 
@@ -262,7 +360,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 parent = None
                 if self.cached_metadata is not None:
                     # fish the parent out of here if it's available
-                    parent_url = self.cached_metadata.get(unicode(location), {}).get('parent', {}).get(
+                    parent_url = self.cached_metadata.get_parent(
+                        unicode(location),
                         ModuleStoreEnum.Branch.published_only if location.revision is None
                         else ModuleStoreEnum.Branch.draft_preferred
                     )
@@ -300,9 +399,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                     # so when we do the lookup, we should do so with a non-draft location
                     non_draft_loc = as_published(location)
 
-                    # Convert the serialized fields values in self.cached_metadata
-                    # to python values
-                    metadata_to_inherit = self.cached_metadata.get(unicode(non_draft_loc), {})
+                    # Resolve the values this module inherits from the tree in self.cached_metadata
+                    metadata_to_inherit = self.cached_metadata.get_inherited_metadata(unicode(non_draft_loc))
                     inherit_metadata(module, metadata_to_inherit)
 
                 module._edit_info = json_data.get('edit_info')
@@ -735,44 +833,34 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        # now traverse the tree and record the parent of each block and the metadata of each container;
+        # the metadata each block inherits is only resolved when the block is loaded
+        tree = MetadataInheritanceTree()
+        branch = self.get_branch_setting()
 
-        def _compute_inherited_metadata(url):
+        def _record_descendants(url):
             """
-            Helper method for computing inherited metadata for a specific location url
+            Helper method for recording the parents and metadata of the descendants of a specific location url
             """
-            my_metadata = results_by_url[url].get('metadata', {})
-
             # go through all the children and recurse, but only if we have
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
+                tree.add_child(child, url, branch)
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+                    tree.add_container(child, results_by_url[child].get('metadata', {}))
+                    _record_descendants(child)
 
         if root is not None:
-            _compute_inherited_metadata(root)
+            tree.add_container(root, results_by_url[root].get('metadata', {}))
+            _record_descendants(root)
 
-        return metadata_to_inherit
+        return tree
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
@@ -782,15 +870,16 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id))
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
                     OK in localdev and testing environment. Not OK in production.'
                 )
 
-        if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
+        if not isinstance(tree, MetadataInheritanceTree):
+            # if not in subsystem (or cached in an older format), or we are on force refresh,
+            # then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
@@ -915,7 +1004,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         root = self.fs_root / data_dir
         resource_fs = _OSFS_INSTANCE.setdefault(root, OSFS(root, create=True))
 
-        cached_metadata = {}
+        cached_metadata = MetadataInheritanceTree()
         if apply_cached_metadata:
             cached_metadata = self._get_cached_metadata_inheritance_tree(course_key)
 
@@ -1337,7 +1426,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 resources_fs=None,
                 error_tracker=self.error_tracker,
                 render_template=self.render_template,
-                cached_metadata={},
+                cached_metadata=MetadataInheritanceTree(),
                 mixins=self.xblock_mixins,
                 select=self.xblock_select,
                 services=services,
@@ -15,6 +15,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -24,6 +25,7 @@ import dogstats_wrapper as dog_stats_api
 
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
+from openedx.core.lib.cache_utils import ProcessLRUCache
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
@@ -223,6 +225,26 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+# The cache of course structures in the memory of this process, created on
+# first use; see get_process_cache.
+_PROCESS_CACHE = None
+
+
+def get_process_cache():
+    """
+    Return the cache for keeping course structures in the memory of this
+    process, or None if the COURSE_STRUCTURE_PROCESS_CACHE_SIZE setting
+    does not enable it.
+    """
+    global _PROCESS_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'COURSE_STRUCTURE_PROCESS_CACHE_SIZE', 0) if DJANGO_AVAILABLE else 0
+    if not max_size:
+        return None
+    if _PROCESS_CACHE is None or _PROCESS_CACHE.max_size != max_size:
+        _PROCESS_CACHE = ProcessLRUCache('split_mongo.course_structure_cache.process_cache', max_size)
+    return _PROCESS_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
@@ -230,14 +252,24 @@ class CourseStructureCache(object):
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
+
+    Optionally, the pickled structures are also kept in the memory of the
+    process, which saves fetching and decompressing the most used ones.
+    Since structures are never changed once they are saved, they don't need
+    to be invalidated.  They are kept pickled rather than deserialized since
+    the modulestore modifies the structures it gets, for example when it
+    loads their blocks' definitions.
     """
     def __init__(self):
         self.cache = None
+        self.process_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            else:
+                self.process_cache = get_process_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
@@ -245,17 +277,24 @@ class CourseStructureCache(object):
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+            pickled_data = self.process_cache.get(key) if self.process_cache is not None else None
+            tagger.tag(from_process_cache=str(pickled_data is not None).lower())
 
-            if compressed_pickled_data is None:
-                # Always log cache misses, because they are unexpected
-                tagger.sample_rate = 1
-                return None
+            if pickled_data is None:
+                compressed_pickled_data = self.cache.get(key)
+                tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+                if compressed_pickled_data is None:
+                    # Always log cache misses, because they are unexpected
+                    tagger.sample_rate = 1
+                    return None
+
+                tagger.measure('compressed_size', len(compressed_pickled_data))
+
+                pickled_data = zlib.decompress(compressed_pickled_data)
+                if self.process_cache is not None:
+                    self.process_cache.set(key, pickled_data, len(pickled_data))
 
-            pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
             return pickle.loads(pickled_data)
@@ -275,6 +314,8 @@ class CourseStructureCache(object):
 
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
+            if self.process_cache is not None:
+                self.process_cache.set(key, pickled_data, len(pickled_data))
 
 
 class MongoConnection(object):
@@ -84,6 +84,7 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_structure_index
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -1209,20 +1210,22 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
+        # No need of the index unless only the blocks of a single type or no orphans are wanted
+        structure_index = None
+        blocks = course.structure['blocks']
+        block_ids = blocks.iterkeys()
 
-        if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+        if isinstance(qualifiers.get('block_type'), basestring) or not include_orphans:
+            structure_index = self._get_structure_index(course)
+            if isinstance(qualifiers.get('block_type'), basestring):
+                block_ids = structure_index.get_blocks_of_type(qualifiers['block_type'])
 
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        for block_id in block_ids:
+            if _block_matches_all(blocks[block_id]):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
                         block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
+                        structure_index.has_path_to_root(block_id)
                     ):
                         items.append(block_id)
                 else:
@@ -1262,6 +1265,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :return Bool: whether or not component has path to the root
         """
+        if path_cache is None and parents_cache is None:
+            return self._get_structure_index(course).has_path_to_root(block_key)
 
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
@@ -1301,14 +1306,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.get_parents(BlockKey.from_usage_key(locator))
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if structure_index.has_path_to_root(valid_parent)
         ]
 
         if len(parent_ids) == 0:
@@ -1322,6 +1328,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             block_id=parent_ids[0].id,
         )
 
+    def _get_structure_index(self, course):
+        """
+        Return the StructureIndex of the given course's structure.
+
+        :param course: CourseEnvelope of the course
+        """
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        if bulk_write_record.active and course.structure['_id'] not in bulk_write_record.structures_in_db:
+            # The structure is being edited in this bulk operation, so its index can't be reused.
+            return StructureIndex(course.structure)
+        return get_structure_index(course.structure)
+
     def get_orphans(self, course_key, **kwargs):
         """
         Return an array of all of the orphans in the course.
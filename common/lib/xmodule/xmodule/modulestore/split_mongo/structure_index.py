@@ -0,0 +1,134 @@
+"""
+Indexes of the blocks of split modulestore course structures.
+
+Answering questions such as "which blocks are discussions?" or "what are
+the parents of this block?" from a structure alone requires scanning all
+of its blocks.  A StructureIndex answers them in time proportional to the
+size of the answer instead.
+
+Since a structure is never changed once it is saved, its index is built
+the first time it is needed and kept in the memory of the process, keyed
+by the structure's version, unless the STRUCTURE_INDEX_PROCESS_CACHE_SIZE
+setting disables this.
+"""
+from collections import defaultdict
+
+try:
+    from django.conf import settings
+    DJANGO_AVAILABLE = True
+except ImportError:
+    DJANGO_AVAILABLE = False
+
+from openedx.core.lib.cache_utils import ProcessLRUCache
+
+
+# The types of the blocks that may be the root of a structure.
+ROOT_BLOCK_TYPES = ('course', 'library')
+
+# The maximum total number of blocks of the structures whose indexes are
+# kept in the memory of the process, if the STRUCTURE_INDEX_PROCESS_CACHE_SIZE
+# setting isn't set.
+DEFAULT_INDEX_CACHE_SIZE = 500000
+
+# The cache of structure indexes in the memory of this process, created on
+# first use; see get_index_cache.
+_INDEX_CACHE = None
+
+
+class StructureIndex(object):
+    """
+    An immutable index of the blocks of a structure, by block type and by
+    parent, along with which blocks have a path to the root.
+    """
+    def __init__(self, structure):
+        """
+        Arguments:
+            structure (dict) - The structure to index.  The index is only
+                valid as long as the structure's blocks and their children
+                are not changed.
+        """
+        blocks_by_type = defaultdict(list)
+        parents = defaultdict(list)
+        for block_key, block_data in structure['blocks'].iteritems():
+            blocks_by_type[block_data.block_type].append(block_key)
+            for child_key in block_data.fields.get('children', []):
+                parents[child_key].append(block_key)
+
+        self._blocks_by_type = {block_type: tuple(keys) for block_type, keys in blocks_by_type.iteritems()}
+        self._parents = {block_key: tuple(keys) for block_key, keys in parents.iteritems()}
+        self._blocks_with_path_to_root = self._find_blocks_with_path_to_root(structure['blocks'])
+
+    def get_blocks_of_type(self, block_type):
+        """
+        Returns the keys of the blocks of the given type.
+        """
+        return self._blocks_by_type.get(block_type, ())
+
+    def get_parents(self, block_key):
+        """
+        Returns the keys of the parents of the given block.
+        """
+        return self._parents.get(block_key, ())
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether the given block is a root block or a descendant of
+        one, i.e. whether it is not an orphan.
+        """
+        return block_key in self._blocks_with_path_to_root or (
+            block_key.type in ROOT_BLOCK_TYPES and block_key not in self._parents
+        )
+
+    def _find_blocks_with_path_to_root(self, blocks):
+        """
+        Returns the frozenset of the keys of all the blocks reachable from a
+        root block.
+        """
+        pending_keys = [
+            block_key for block_key in blocks
+            if block_key.type in ROOT_BLOCK_TYPES and block_key not in self._parents
+        ]
+        reachable_keys = set(pending_keys)
+        while pending_keys:
+            block_data = blocks.get(pending_keys.pop())
+            if block_data is None:
+                continue
+            for child_key in block_data.fields.get('children', []):
+                if child_key not in reachable_keys:
+                    reachable_keys.add(child_key)
+                    pending_keys.append(child_key)
+        return frozenset(reachable_keys)
+
+
+def get_index_cache():
+    """
+    Return the cache for keeping structure indexes in the memory of this
+    process, or None if the STRUCTURE_INDEX_PROCESS_CACHE_SIZE setting is 0.
+    """
+    global _INDEX_CACHE  # pylint: disable=global-statement
+    if DJANGO_AVAILABLE:
+        max_size = getattr(settings, 'STRUCTURE_INDEX_PROCESS_CACHE_SIZE', DEFAULT_INDEX_CACHE_SIZE)
+    else:
+        max_size = DEFAULT_INDEX_CACHE_SIZE
+    if not max_size:
+        return None
+    if _INDEX_CACHE is None or _INDEX_CACHE.max_size != max_size:
+        _INDEX_CACHE = ProcessLRUCache('split_mongo.structure_index_cache', max_size)
+    return _INDEX_CACHE
+
+
+def get_structure_index(structure):
+    """
+    Returns the StructureIndex of the given saved structure, which is
+    shared with all other users of the structure's version in the process
+    if the index cache is enabled.
+    """
+    index_cache = get_index_cache()
+    if index_cache is None:
+        return StructureIndex(structure)
+
+    index = index_cache.get(structure['_id'])
+    if index is None:
+        index = StructureIndex(structure)
+        index_cache.set(structure['_id'], index, len(structure['blocks']))
+    return index
@@ -8,6 +8,7 @@ from nose.tools import assert_equals, assert_raises, \
     assert_not_equals, assert_false, assert_true, assert_greater, assert_is_instance, assert_is_none
 # pylint: enable=E0611
 from path import Path as path
+import cPickle as pickle
 import pymongo
 import logging
 import shutil
@@ -39,7 +40,7 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, MetadataInheritanceTree
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
@@ -801,6 +802,64 @@ class TestMongoKeyValueStore(unittest.TestCase):
                 self.kvs.delete(KeyValueStore.Key(scope, None, None, 'foo'))
 
 
+
+class TestMetadataInheritanceTree(unittest.TestCase):
+    """
+    Tests for MetadataInheritanceTree.
+    """
+    BRANCH = ModuleStoreEnum.Branch.published_only
+
+    def setUp(self):
+        super(TestMetadataInheritanceTree, self).setUp()
+        self.tree = MetadataInheritanceTree()
+        self.tree.add_container('course', {'graded': False, 'due': 'course_due'})
+        self.tree.add_child('chapter', 'course', self.BRANCH)
+        self.tree.add_container('chapter', {})
+        self.tree.add_child('sequential', 'chapter', self.BRANCH)
+        self.tree.add_container('sequential', {'graded': True})
+        self.tree.add_child('problem', 'sequential', self.BRANCH)
+        self.tree.add_child('html', 'chapter', self.BRANCH)
+
+    def _assert_tree(self, tree):
+        """
+        Assert that the given tree matches the one built in setUp.
+        """
+        assert_equals(tree.get_parent('problem', self.BRANCH), 'sequential')
+        assert_equals(tree.get_parent('chapter', self.BRANCH), 'course')
+        assert_equals(tree.get_parent('course', self.BRANCH), None)
+        assert_equals(tree.get_parent('problem', ModuleStoreEnum.Branch.draft_preferred), None)
+
+        assert_equals(tree.get_inherited_metadata('course'), {})
+        assert_equals(tree.get_inherited_metadata('chapter'), {'graded': False, 'due': 'course_due'})
+        assert_equals(tree.get_inherited_metadata('html'), {'graded': False, 'due': 'course_due'})
+        assert_equals(tree.get_inherited_metadata('sequential'), {'graded': True, 'due': 'course_due'})
+        assert_equals(tree.get_inherited_metadata('problem'), {'graded': True, 'due': 'course_due'})
+        assert_equals(tree.get_inherited_metadata('unknown'), {})
+
+    def test_inherited_metadata(self):
+        self._assert_tree(self.tree)
+
+    def test_inherited_metadata_is_shared(self):
+        assert_true(self.tree.get_inherited_metadata('html') is self.tree.get_inherited_metadata('chapter'))
+
+    def test_pickle(self):
+        self.tree.get_inherited_metadata('problem')
+        tree = pickle.loads(pickle.dumps(self.tree, pickle.HIGHEST_PROTOCOL))
+        # The resolved metadata is not pickled with the tree.
+        assert_equals(tree._inherited_metadata, {})
+        self._assert_tree(tree)
+
+    def test_update(self):
+        tree = MetadataInheritanceTree()
+        tree.add_child('vertical', 'chapter', ModuleStoreEnum.Branch.draft_preferred)
+        assert_equals(tree.get_inherited_metadata('vertical'), {})
+
+        tree.update(self.tree)
+        assert_equals(tree.get_parent('vertical', ModuleStoreEnum.Branch.draft_preferred), 'chapter')
+        assert_equals(tree.get_inherited_metadata('vertical'), {'graded': False, 'due': 'course_due'})
+        self._assert_tree(tree)
+
+
 def _build_requested_filter(requested_filter):
     """
     Returns requested filter_params string.
@@ -0,0 +1,163 @@
+""" Test the behavior of split_mongo/structure_index """
+import os
+import timeit
+import unittest
+from bson.objectid import ObjectId
+from mock import patch
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_structure_index
+
+
+def _make_structure(children_map):
+    """
+    Return a structure with a block for each key of the given dict of BlockKeys to lists of child BlockKeys.
+    """
+    return {
+        '_id': ObjectId(),
+        'blocks': {
+            block_key: BlockData(block_type=block_key.type, fields={'children': children} if children else {})
+            for block_key, children in children_map.iteritems()
+        },
+    }
+
+
+class TestStructureIndex(unittest.TestCase):
+    """ Test the lookups of a StructureIndex """
+    COURSE = BlockKey('course', 'course')
+    CHAPTER = BlockKey('chapter', 'chapter')
+    DISCUSSION_1 = BlockKey('discussion', 'discussion_1')
+    DISCUSSION_2 = BlockKey('discussion', 'discussion_2')
+    ORPHAN_VERTICAL = BlockKey('vertical', 'orphan_vertical')
+    ORPHAN_HTML = BlockKey('html', 'orphan_html')
+
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.structure = _make_structure({
+            self.COURSE: [self.CHAPTER],
+            self.CHAPTER: [self.DISCUSSION_1, self.DISCUSSION_2],
+            self.DISCUSSION_1: [],
+            self.DISCUSSION_2: [],
+            self.ORPHAN_VERTICAL: [self.ORPHAN_HTML, self.DISCUSSION_2],
+            self.ORPHAN_HTML: [],
+        })
+        self.index = StructureIndex(self.structure)
+
+    def test_get_blocks_of_type(self):
+        self.assertItemsEqual(self.index.get_blocks_of_type('discussion'), [self.DISCUSSION_1, self.DISCUSSION_2])
+        self.assertItemsEqual(self.index.get_blocks_of_type('course'), [self.COURSE])
+        self.assertItemsEqual(self.index.get_blocks_of_type('problem'), [])
+
+    def test_get_parents(self):
+        self.assertItemsEqual(self.index.get_parents(self.COURSE), [])
+        self.assertItemsEqual(self.index.get_parents(self.DISCUSSION_1), [self.CHAPTER])
+        self.assertItemsEqual(self.index.get_parents(self.DISCUSSION_2), [self.CHAPTER, self.ORPHAN_VERTICAL])
+        self.assertItemsEqual(self.index.get_parents(self.ORPHAN_VERTICAL), [])
+
+    def test_has_path_to_root(self):
+        for block_key in (self.COURSE, self.CHAPTER, self.DISCUSSION_1, self.DISCUSSION_2):
+            self.assertTrue(self.index.has_path_to_root(block_key))
+        for block_key in (self.ORPHAN_VERTICAL, self.ORPHAN_HTML):
+            self.assertFalse(self.index.has_path_to_root(block_key))
+
+    def test_has_path_to_root_with_cycle(self):
+        self.structure['blocks'][self.ORPHAN_HTML].fields['children'] = [self.ORPHAN_VERTICAL]
+        index = StructureIndex(self.structure)
+        self.assertFalse(index.has_path_to_root(self.ORPHAN_VERTICAL))
+        self.assertFalse(index.has_path_to_root(self.ORPHAN_HTML))
+
+    def test_get_structure_index(self):
+        index = get_structure_index(self.structure)
+        self.assertItemsEqual(index.get_blocks_of_type('discussion'), [self.DISCUSSION_1, self.DISCUSSION_2])
+        self.assertIs(get_structure_index(self.structure), index)
+        self.assertIsNot(get_structure_index(_make_structure({self.COURSE: []})), index)
+
+    @patch('xmodule.modulestore.split_mongo.structure_index.get_index_cache', return_value=None)
+    def test_get_structure_index_without_cache(self, _mock_get_index_cache):
+        index = get_structure_index(self.structure)
+        self.assertItemsEqual(index.get_blocks_of_type('discussion'), [self.DISCUSSION_1, self.DISCUSSION_2])
+        self.assertIsNot(get_structure_index(self.structure), index)
+
+
+# Numbers of chapters, sequentials per chapter, verticals per sequential and
+# problems per vertical of the benchmarked course: 10,000 blocks in all.
+BENCHMARK_COURSE_SHAPE = (9, 10, 10, 10)
+
+
+@unittest.skipUnless(os.environ.get('STRUCTURE_INDEX_PERF_TEST'), 'Structure index benchmark')
+class StructureIndexBenchmark(unittest.TestCase):
+    """
+    Times looking up the blocks of a type and the parents of a block in a
+    synthetic 10,000 block course by scanning all of its blocks, as split
+    modulestore did before structures were indexed, and with a StructureIndex.
+    """
+    def setUp(self):
+        super(StructureIndexBenchmark, self).setUp()
+        children_map = {}
+
+        def add_blocks(block_key, block_types, counts):
+            """
+            Adds `block_key` to children_map, along with the tree of its
+            descendants, which has counts[0] children of type block_types[0]
+            and so on.
+            """
+            children_map[block_key] = []
+            if not counts:
+                return
+            for index in xrange(counts[0]):
+                child_key = BlockKey(block_types[0], '{}_{}'.format(block_key.id, index))
+                children_map[block_key].append(child_key)
+                add_blocks(child_key, block_types[1:], counts[1:])
+
+        block_types = ('chapter', 'sequential', 'vertical', 'problem')
+        add_blocks(BlockKey('course', 'course'), block_types, BENCHMARK_COURSE_SHAPE)
+        self.structure = _make_structure(children_map)
+        self.problem_key = max(self.scan_blocks_of_type('problem'))
+
+    def scan_blocks_of_type(self, block_type):
+        """
+        Returns the keys of the blocks of the given type, by scanning all of
+        the structure's blocks, as SplitMongoModuleStore.get_items did.
+        """
+        return [
+            block_key for block_key, block_data in self.structure['blocks'].iteritems()
+            if block_data.block_type == block_type
+        ]
+
+    def scan_parents(self, block_key):
+        """
+        Returns the keys of the parents of the given block, by scanning all
+        of the structure's blocks, as SplitMongoModuleStore did.
+        """
+        return [
+            parent_key for parent_key, block_data in self.structure['blocks'].iteritems()
+            if block_key in block_data.fields.get('children', [])
+        ]
+
+    def _time(self, description, func, number):
+        """
+        Prints and returns the average time, in seconds, of `number` calls of `func`.
+        """
+        duration = timeit.timeit(func, number=number) / number
+        print "{}: {:.1f}us".format(description, duration * 1000000)
+        return duration
+
+    def test_lookups(self):
+        self.assertEqual(len(self.structure['blocks']), 10000)
+        self._time('Building the index', lambda: StructureIndex(self.structure), 10)
+        index = StructureIndex(self.structure)
+
+        scan_type_duration = self._time(
+            'Blocks of a type, by scanning', lambda: self.scan_blocks_of_type('sequential'), 100
+        )
+        index_type_duration = self._time(
+            'Blocks of a type, from the index', lambda: index.get_blocks_of_type('sequential'), 100
+        )
+        scan_parents_duration = self._time('Parents, by scanning', lambda: self.scan_parents(self.problem_key), 100)
+        index_parents_duration = self._time('Parents, from the index', lambda: index.get_parents(self.problem_key), 100)
+
+        self.assertItemsEqual(index.get_blocks_of_type('sequential'), self.scan_blocks_of_type('sequential'))
+        self.assertItemsEqual(index.get_parents(self.problem_key), self.scan_parents(self.problem_key))
+        self.assertLess(index_type_duration, scan_type_duration)
+        self.assertLess(index_parents_duration, scan_parents_duration)
@@ -18,7 +18,7 @@ from .exceptions import NotFoundError
 from .fields import Date
 from .mako_module import MakoModuleDescriptor
 from .progress import Progress
-from .x_module import XModule, STUDENT_VIEW
+from .x_module import HandlerNeeds, XModule, STUDENT_VIEW
 from .xml_module import XmlDescriptor
 
 log = logging.getLogger(__name__)
@@ -144,6 +144,11 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
     }
     js_module_name = "Sequence"
 
+    # Switching tabs only records the new position, so it needn't load the state of the children.
+    handler_needs = {
+        'goto_position': HandlerNeeds(scopes=[Scope.user_state]),
+    }
+
     def __init__(self, *args, **kwargs):
         super(SequenceModule, self).__init__(*args, **kwargs)
 
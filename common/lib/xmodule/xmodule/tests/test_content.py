@@ -208,6 +208,24 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_stream_data_chunk_size(self):
+        """
+        Test that stream_data and stream_data_in_range of StaticContentStream send chunks of
+        the given size, and that those of StaticContent send the data they hold.
+        """
+        item = FakeGridFsItem(SAMPLE_STRING)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+        chunks = list(static_content_stream.stream_data(chunk_size=100))
+        self.assertEqual(''.join(chunks), SAMPLE_STRING)
+        self.assertEqual(max(len(chunk) for chunk in chunks), 100)
+
+        chunks = list(static_content_stream.stream_data_in_range(100, 1500, chunk_size=2048))
+        self.assertEqual(chunks, [SAMPLE_STRING[100:1501]])
+
+        static_content = StaticContent('loc', 'name', 'type', SAMPLE_STRING, length=len(SAMPLE_STRING))
+        self.assertEqual(''.join(static_content.stream_data()), SAMPLE_STRING)
+        self.assertEqual(''.join(static_content.stream_data_in_range(100, 1500)), SAMPLE_STRING[100:1501])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -11,9 +11,11 @@ from datetime import datetime
 from webob import Response
 
 from xblock.core import XBlock
+from xblock.fields import Scope
 
 from xmodule.exceptions import NotFoundError
 from xmodule.fields import RelativeTime
+from xmodule.x_module import HandlerNeeds
 from opaque_keys.edx.locator import CourseLocator
 
 from .transcripts_utils import (
@@ -39,6 +41,10 @@ class VideoStudentViewHandlers(object):
     """
     Handlers for video module instance.
     """
+    # Saving the player state only touches the student's own fields.
+    handler_needs = {
+        'save_user_state': HandlerNeeds(scopes=[Scope.user_state, Scope.preferences, Scope.user_info]),
+    }
 
     def handle_ajax(self, dispatch, data):
         """
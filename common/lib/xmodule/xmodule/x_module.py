@@ -182,6 +182,35 @@ def dummy_track(_event_type, _event):
     pass
 
 
+class HandlerNeeds(namedtuple('HandlerNeeds', ['scopes', 'services'])):
+    """
+    The user scopes and runtime services that an XBlock handler uses.
+
+    Blocks declare these for their cheap, frequently called handlers in their `handler_needs`
+    class attribute, so that runtimes can bind the block to just those when invoking them.
+
+    scopes: the :class:`~xblock.fields.Scope`s whose user data the handler reads or writes
+    services: the names of the runtime services the handler uses
+    """
+    def __new__(cls, scopes, services=()):
+        return super(HandlerNeeds, cls).__new__(cls, frozenset(scopes), frozenset(services))
+
+
+def get_handler_needs(block, handler_name, suffix=''):
+    """
+    Return the :class:`HandlerNeeds` declared for the handler `handler_name` of `block`, or None
+    if the handler must be invoked on a fully bound block.
+
+    Handlers of XModules are all dispatched through `xmodule_handler`, so for those the `suffix`
+    names the `handle_ajax` dispatch, and the declaration is looked up on the block's module class.
+    """
+    if handler_name == 'xmodule_handler':
+        block_class, name = getattr(block, 'module_class', None), suffix
+    else:
+        block_class, name = type(block), handler_name
+    return getattr(block_class, 'handler_needs', {}).get(name)
+
+
 class HTMLSnippet(object):
     """
     A base class defining an interface for an object that is able to present an
@@ -289,6 +318,11 @@ class XModuleMixin(XModuleFields, XBlock):
     # student interacts with the module on the page.  A specific example is
     # FoldIt, which posts grade-changing updates through a separate API.
     always_recalculate_grades = False
+
+    # Maps the names of handlers (or, for XModules, of `handle_ajax` dispatches) to the
+    # HandlerNeeds they declare. See `get_handler_needs`.
+    handler_needs = {}
+
     # The default implementation of get_icon_class returns the icon_class
     # attribute of the class
     #
@@ -18,7 +18,7 @@ from student.roles import CourseStaffRole, CourseInstructorRole
 
 from xmodule_django.models import CourseKeyField
 
-from util.keyword_substitution import substitute_keywords_with_data
+from util.keyword_substitution import KeywordTemplate, substitute_keywords_with_data
 from util.query import use_read_replica_if_available
 
 log = logging.getLogger(__name__)
@@ -288,7 +288,8 @@ class CourseEmailTemplate(models.Model):
 
         Any keywords encoded in the form %%KEYWORD%% found in the message
         body are substituted with user data before the body is inserted into
-        the template.
+        the template.  The message body may be given as a KeywordTemplate, so
+        that it is only searched for keywords once for many recipients.
 
         Output is returned as a unicode string.  It is not encoded as utf-8.
         Such encoding is left to the email code, which will use the value
@@ -298,6 +299,8 @@ class CourseEmailTemplate(models.Model):
         # Substitute all %%-encoded keywords in the message body
         if 'user_id' in context and 'course_id' in context:
             message_body = substitute_keywords_with_data(message_body, context)
+        elif isinstance(message_body, KeywordTemplate):
+            message_body = message_body.string
 
         result = format_string.format(**context)
 
@@ -4,10 +4,14 @@ This module contains celery task functions for handling the sending of bulk emai
 to a course.
 """
 from collections import Counter
+from functools import partial
 import json
 import logging
+from multiprocessing.pool import ThreadPool
+from Queue import Queue
 import random
 import re
+import sys
 from time import sleep
 
 import dogstats_wrapper as dog_stats_api
@@ -41,6 +45,7 @@ from bulk_email.models import (
 )
 from courseware.courses import get_course
 from openedx.core.lib.courses import course_image_url
+from student.models import anonymous_ids_for_users
 from student.roles import CourseStaffRole, CourseInstructorRole
 from instructor_task.models import InstructorTask
 from instructor_task.subtasks import (
@@ -49,6 +54,7 @@ from instructor_task.subtasks import (
     check_subtask_is_valid,
     update_subtask_status,
 )
+from util.keyword_substitution import KeywordTemplate
 from util.query import use_read_replica_if_available
 from util.date_utils import get_default_time_display
 from openedx.core.djangoapps.theming import helpers as theming_helpers
@@ -484,51 +490,64 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+
+    # Find the keywords in the message once, and fetch the anonymous ids they
+    # need for the whole batch, rather than for each recipient:
+    text_message = KeywordTemplate(course_email.text_message)
+    html_message = KeywordTemplate(course_email.html_message)
+    if '%%USER_ID%%' in text_message.keywords | html_message.keywords:
+        anonymous_ids = anonymous_ids_for_users([recipient['pk'] for recipient in to_list], None)
+    else:
+        anonymous_ids = {}
+
+    num_connections = max(settings.BULK_EMAIL_CONNECTIONS_PER_TASK, 1)
+    connections = []
+    send_pool = ThreadPool(num_connections) if num_connections > 1 else None
     try:
-        connection = get_connection()
-        connection.open()
+        for __ in range(num_connections):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
+        free_connections = Queue()
+        for connection in connections:
+            free_connections.put(connection)
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Emails are sent to the recipients at the end of the list, one on each connection.
+            # At the end of processing these users, they will be removed from the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                course_email.subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            recipients = to_list[:-num_connections - 1:-1]
+            first_recipient_num = recipient_num + 1
+            email_msgs = []
+            for recipient_num, current_recipient in enumerate(recipients, first_recipient_num):
+                # Update context with user-specific values from the recipient:
+                email = current_recipient['email']
+                email_context['email'] = email
+                email_context['name'] = current_recipient['profile__name']
+                email_context['user_id'] = current_recipient['pk']
+                email_context['anonymous_user_id'] = anonymous_ids.get(current_recipient['pk'])
+                email_context['course_id'] = course_email.course_id
+
+                # Construct message content using templates and context:
+                plaintext_msg = course_email_template.render_plaintext(text_message, email_context)
+                html_msg = course_email_template.render_htmltext(html_message, email_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    course_email.subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
+                email_msgs.append(email_msg)
 
-            try:
                 log.info(
                     "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
@@ -540,82 +559,116 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     current_recipient['profile__name'],
                     email
                 )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
-                    # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
-                        parent_task_id,
-                        task_id,
-                        email_id,
-                        recipient_num,
-                        total_recipients,
-                        email,
-                        exc.smtp_error
-                    )
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
-
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
 
+            # Send the emails concurrently, each on a connection of its own.
+            send = partial(
+                _send_email_message,
+                free_connections,
+                subtask_status.retried_nomax > 0,
+                _statsd_tag(course_title),
+            )
+            if send_pool is not None:
+                send_errors = send_pool.map(send, email_msgs)
             else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
-                else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
+                send_errors = [send(email_msg) for email_msg in email_msgs]
+
+            # Account for each recipient in turn.  An error that requires the task to be retried
+            # is raised only once all of the recipients sent to alongside it are accounted for.
+            retry_exc_info = None
+            unsent_recipients = []
+            for recipient_num, (current_recipient, send_error) in enumerate(
+                    zip(recipients, send_errors), first_recipient_num
+            ):
+                email = current_recipient['email']
+                try:
+                    try:
+                        if send_error is not None:
+                            raise send_error[0], send_error[1], send_error[2]
+
+                    except SMTPDataError as exc:
+                        # According to SMTP spec, we'll retry error codes in the 4xx range.
+                        # 5xx range indicates hard failure.
+                        total_recipients_failed += 1
+                        log.error(
+                            "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                            Recipient num: %s/%s, Email address: %s",
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            recipient_num,
+                            total_recipients,
+                            email
+                        )
+                        if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                            # This will cause the outer handler to catch the exception and retry the entire task.
+                            raise exc
+                        else:
+                            # This will fall through and not retry the message.
+                            log.warning(
+                                'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                                Email not delivered to %s due to error %s',
+                                parent_task_id,
+                                task_id,
+                                email_id,
+                                recipient_num,
+                                total_recipients,
+                                email,
+                                exc.smtp_error
+                            )
+                            dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                            subtask_status.increment(failed=1)
+
+                    except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+                        # This will fall through and not retry the message.
+                        total_recipients_failed += 1
+                        log.error(
+                            "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                            EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            recipient_num,
+                            total_recipients,
+                            email,
+                            exc
+                        )
+                        dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                        subtask_status.increment(failed=1)
+
+                    else:
+                        total_recipients_successful += 1
+                        log.info(
+                            "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                            Recipient num: %s/%s, Email address: %s,",
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            recipient_num,
+                            total_recipients,
+                            email
+                        )
+                        dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                        if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                            log.info('Email with id %s sent to %s', email_id, email)
+                        else:
+                            log.debug('Email with id %s sent to %s', email_id, email)
+                        subtask_status.increment(succeeded=1)
+
+                except Exception:  # pylint: disable=broad-except
+                    # Keep the user on the list, so that they are emailed when the task is retried.
+                    if retry_exc_info is None:
+                        retry_exc_info = sys.exc_info()
+                    unsent_recipients.append(current_recipient)
+                    continue
+
+                recipients_info[email] += 1
+
+            # Remove the users that were emailed from the end of the list only once they have
             # successfully been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+            to_list[len(to_list) - len(recipients):] = unsent_recipients[::-1]
+            if retry_exc_info is not None:
+                raise retry_exc_info[0], retry_exc_info[1], retry_exc_info[2]
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -696,7 +749,40 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if send_pool is not None:
+            send_pool.terminate()
+        for connection in connections:
+            connection.close()
+
+
+def _send_email_message(free_connections, throttle, statsd_tag, email_msg):
+    """
+    Sends `email_msg` on one of the open SMTP connections in the
+    `free_connections` queue, and returns the connection to the queue.
+
+    If `throttle` is set, the connection is rate limited: it waits for
+    BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS before sending.
+
+    Returns None if the email was sent, or the `sys.exc_info()` of the
+    error that it could not be sent because of, to be handled by the caller.
+    """
+    connection = free_connections.get()
+    try:
+        # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+        # but if a task has been retried for rate-limiting reasons, then we sleep
+        # for a period of time between all emails sent on each connection.  Choice of
+        # the value depends on the number of workers that might be sending email in
+        # parallel, and what the SES throttle rate is.
+        if throttle:
+            sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+
+        with dog_stats_api.timer('course_email.single_send.time.overall', tags=[statsd_tag]):
+            connection.send_messages([email_msg])
+    except Exception:  # pylint: disable=broad-except
+        return sys.exc_info()
+    finally:
+        free_connections.put(connection)
+    return None
 
 
 def _get_current_task():
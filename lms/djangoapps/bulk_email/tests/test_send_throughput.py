@@ -0,0 +1,151 @@
+"""
+Throughput benchmark for sending bulk email on several SMTP connections.
+
+Emails are sent to a local fake SMTP server which delays each of its replies,
+so that the time taken is dominated by SMTP round trips, as it is in
+production.  This is skipped on regular unittest runs; set the environment
+variable BULK_EMAIL_PERF_TEST to run it.
+"""
+import json
+import os
+import SocketServer
+import threading
+import time
+import unittest
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from bulk_email.models import CourseEmail, SEND_TO_MYSELF, SEND_TO_STAFF, SEND_TO_LEARNERS
+from instructor_task.tasks import send_bulk_course_email
+from instructor_task.tests.factories import InstructorTaskFactory
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase
+
+# Number of students emailed per run.
+NUM_STUDENTS = 49
+
+# Delay in seconds before each reply of the fake SMTP server.
+SMTP_REPLY_LATENCY = 0.01
+
+# Numbers of connections per subtask to time sending with.
+CONNECTIONS_PER_TASK = (1, 2, 4, 8)
+
+
+class FakeSMTPHandler(SocketServer.StreamRequestHandler):
+    """
+    Speaks just enough SMTP for Django's SMTP email backend, and counts the
+    messages it is sent.
+    """
+    def handle(self):
+        self._reply('220 localhost Fake SMTP server')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self._reply('250 localhost')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in ('.\r\n', ''):
+                    pass
+                with self.server.lock:
+                    self.server.num_messages += 1
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+    def _reply(self, line):
+        """
+        Sends a reply line to the client, after the server's latency.
+        """
+        time.sleep(self.server.latency)
+        self.wfile.write(line + '\r\n')
+        self.wfile.flush()
+
+
+class FakeSMTPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """
+    A local SMTP server with a thread per connection.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, latency):
+        SocketServer.TCPServer.__init__(self, ('localhost', 0), FakeSMTPHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.num_messages = 0
+
+
+@unittest.skipUnless(os.environ.get('BULK_EMAIL_PERF_TEST'), 'Bulk email throughput benchmark')
+class BulkEmailSendThroughput(InstructorTaskCourseTestCase):
+    """
+    Times sending a bulk email with different numbers of SMTP connections
+    per subtask.
+    """
+    def setUp(self):
+        super(BulkEmailSendThroughput, self).setUp()
+        self.initialize_course()
+        self.instructor = self.create_instructor('instructor')
+        for index in xrange(NUM_STUDENTS):
+            self.create_student('robot%d' % index)
+
+        # load initial content (since we don't run migrations as part of tests):
+        call_command("loaddata", "course_email_template.json")
+
+        self.smtp_server = FakeSMTPServer(SMTP_REPLY_LATENCY)
+        server_thread = threading.Thread(target=self.smtp_server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        self.addCleanup(self.smtp_server.server_close)
+        self.addCleanup(self.smtp_server.shutdown)
+
+    def _send_email(self):
+        """
+        Sends an email to everyone in the course, and returns the number of
+        recipients that it was sent to.
+        """
+        course_email = CourseEmail.create(
+            self.course.id,
+            self.instructor,
+            [SEND_TO_MYSELF, SEND_TO_STAFF, SEND_TO_LEARNERS],
+            "Test Subject",
+            "<p>This is a test message</p>",
+        )
+        task_id = str(uuid4())
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            requester=self.instructor,
+            task_input=json.dumps({'email_id': course_email.id}),
+            task_key='dummy value',
+            task_id=task_id,
+        )
+        status = send_bulk_course_email.apply([instructor_task.id, {}], task_id=task_id).get()
+        return status['succeeded']
+
+    def test_throughput(self):
+        durations = {}
+        for num_connections in CONNECTIONS_PER_TASK:
+            self.smtp_server.num_messages = 0
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST='localhost',
+                EMAIL_PORT=self.smtp_server.server_address[1],
+                BULK_EMAIL_CONNECTIONS_PER_TASK=num_connections,
+            ):
+                start = time.time()
+                num_sent = self._send_email()
+                durations[num_connections] = time.time() - start
+
+            self.assertEqual(num_sent, NUM_STUDENTS + 1)
+            self.assertEqual(self.smtp_server.num_messages, num_sent)
+            print "{} connection(s): {} emails in {:.2f}s, {:.1f} emails/s".format(
+                num_connections, num_sent, durations[num_connections], num_sent / durations[num_connections]
+            )
+
+        self.assertLess(durations[max(CONNECTIONS_PER_TASK)], durations[1])
@@ -29,6 +29,7 @@ from celery.states import SUCCESS, FAILURE  # pylint: disable=no-name-in-module,
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -246,6 +247,32 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
                 send_bulk_course_email, 'emailed', num_emails, expected_succeeds, skipped=expected_skipped
             )
 
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=4)
+    def test_successful_on_several_connections(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(get_conn.call_count, 4)
+        self.assertEquals(get_conn.return_value.send_messages.call_count, num_emails)
+
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=4)
+    def test_retry_on_several_connections(self):
+        # The recipients sent to alongside the one whose email is throttled
+        # should be accounted for, and not sent to again when the task is retried.
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = chain(
+                [None, SMTPDataError(455, "Throttling: Sending rate exceeded")], repeat(None)
+            )
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails, retried_nomax=1)
+        self.assertEquals(get_conn.return_value.send_messages.call_count, num_emails + 1)
+
     def _test_email_address_failures(self, exception):
         """Test that celery handles bad address errors by failing and not retrying."""
         # Select number of emails to fit into a single subtask.
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ccx', '0003_add_master_course_staff_in_ccx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customcourseforedx',
+            name='overrides_version',
+            field=models.CharField(default=b'', max_length=32, blank=True),
+        ),
+    ]
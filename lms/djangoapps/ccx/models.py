@@ -29,6 +29,10 @@ class CustomCourseForEdX(models.Model):
     # if not empty, this field contains a json serialized list of
     # the master course modules
     structure_json = models.TextField(verbose_name='Structure JSON', blank=True, null=True)
+    # identifies the current version of the field overrides of this ccx,
+    # which the overrides shared between requests are cached under; it is
+    # changed in the same transaction as the overrides themselves
+    overrides_version = models.CharField(max_length=32, blank=True, default='')
 
     class Meta(object):
         app_label = 'ccx'
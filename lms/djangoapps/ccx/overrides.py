@@ -4,7 +4,9 @@ by the individual custom courses feature.
 """
 import json
 import logging
+from uuid import uuid4
 
+from django.core.cache import cache
 from django.db import transaction
 
 import request_cache
@@ -18,6 +20,9 @@ from lms.djangoapps.ccx.models import CcxFieldOverride, CustomCourseForEdX
 
 log = logging.getLogger(__name__)
 
+CCX_OVERRIDES_CACHE_KEY = u'ccx.overrides.{ccx_id}.{version}'
+CCX_OVERRIDES_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
     """
@@ -89,10 +94,15 @@ def get_override_for_ccx(ccx, block, name, default=None):
 
     block_overrides = overrides.get(clean_ccx_key, {})
     if name in block_overrides:
-        try:
-            return block.fields[name].from_json(block_overrides[name])
-        except KeyError:
+        field = block.fields.get(name)
+        if field is None:
             return block_overrides[name]
+
+        values_cache = request_cache.get_cache('ccx-override-values')
+        cache_key = (ccx.id, clean_ccx_key, name)
+        if cache_key not in values_cache:
+            values_cache[cache_key] = field.from_json(block_overrides[name])
+        return values_cache[cache_key]
     else:
         return default
 
@@ -116,26 +126,53 @@ def _get_overrides_for_ccx(ccx):
     """
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
+
+    The overrides are shared between requests through the django cache,
+    under the version of the CCX's overrides read along with the CCX.  Since
+    the version is changed in the same transaction as the overrides, a request
+    can't store overrides under a version they are not current for.  Overrides
+    loaded from the django cache don't include their model instances.
     """
     overrides_cache = request_cache.get_cache('ccx-overrides')
 
     if ccx not in overrides_cache:
-        overrides = {}
-        query = CcxFieldOverride.objects.filter(
-            ccx=ccx,
-        )
-
-        for override in query:
-            block_overrides = overrides.setdefault(override.location, {})
-            block_overrides[override.field] = json.loads(override.value)
-            block_overrides[override.field + "_id"] = override.id
-            block_overrides[override.field + "_instance"] = override
+        cache_key = CCX_OVERRIDES_CACHE_KEY.format(ccx_id=ccx.id, version=ccx.overrides_version)
+        overrides = cache.get(cache_key)
+        if overrides is None:
+            overrides = {}
+            shared_overrides = {}
+            query = CcxFieldOverride.objects.filter(
+                ccx=ccx,
+            )
+
+            for override in query:
+                value = json.loads(override.value)
+                for block_overrides in (
+                        overrides.setdefault(override.location, {}),
+                        shared_overrides.setdefault(override.location, {}),
+                ):
+                    block_overrides[override.field] = value
+                    block_overrides[override.field + "_id"] = override.id
+                overrides[override.location][override.field + "_instance"] = override
+
+            cache.set(cache_key, shared_overrides, CCX_OVERRIDES_CACHE_TIMEOUT)
 
         overrides_cache[ccx] = overrides
 
     return overrides_cache[ccx]
 
 
+def _bump_overrides_version(ccx):
+    """
+    Starts a new version of the overrides of the `ccx`, so that the overrides
+    shared under its previous versions are no longer used once the change is
+    committed.  Must be called after the overrides are changed, in the same
+    transaction.
+    """
+    ccx.overrides_version = uuid4().hex
+    CustomCourseForEdX.objects.filter(id=ccx.id).update(overrides_version=ccx.overrides_version)
+
+
 @transaction.atomic
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -146,7 +183,7 @@ def override_field_for_ccx(ccx, block, name, value):
     field = block.fields[name]
     value_json = field.to_json(value)
     serialized_value = json.dumps(value_json)
-    override_has_changes = False
+    override_has_changes = created = False
     clean_ccx_key = _clean_ccx_key(block.location)
 
     override = get_override_for_ccx(ccx, block, name + "_instance")
@@ -169,10 +206,15 @@ def override_field_for_ccx(ccx, block, name, value):
         override.value = serialized_value
         override.save()
 
+    if created or override_has_changes:
+        _bump_overrides_version(ccx)
+
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name + "_instance"] = override
+    request_cache.get_cache('ccx-override-values').pop((ccx.id, clean_ccx_key, name), None)
 
 
+@transaction.atomic
 def clear_override_for_ccx(ccx, block, name):
     """
     Clears a previously set field override for the `ccx`.  `block` and `name`
@@ -186,6 +228,7 @@ def clear_override_for_ccx(ccx, block, name):
             location=block.location,
             field=name).delete()
 
+        _bump_overrides_version(ccx)
         clear_ccx_field_info_from_ccx_map(ccx, block, name)
 
     except CcxFieldOverride.DoesNotExist:
@@ -196,8 +239,9 @@ def clear_ccx_field_info_from_ccx_map(ccx, block, name):  # pylint: disable=inva
     """
     Remove field information from ccx overrides mapping dictionary
     """
+    clean_ccx_key = _clean_ccx_key(block.location)
+    request_cache.get_cache('ccx-override-values').pop((ccx.id, clean_ccx_key, name), None)
     try:
-        clean_ccx_key = _clean_ccx_key(block.location)
         ccx_override_map = _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})
         ccx_override_map.pop(name)
         ccx_override_map.pop(name + "_id")
@@ -206,6 +250,7 @@ def clear_ccx_field_info_from_ccx_map(ccx, block, name):  # pylint: disable=inva
         pass
 
 
+@transaction.atomic
 def bulk_delete_ccx_override_fields(ccx, ids):
     """
     Bulk delete for CcxFieldOverride model
@@ -214,3 +259,4 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        _bump_overrides_version(ccx)
@@ -21,7 +21,7 @@ from xmodule.modulestore.tests.django_utils import (
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from lms.djangoapps.ccx.models import CustomCourseForEdX
-from lms.djangoapps.ccx.overrides import override_field_for_ccx
+from lms.djangoapps.ccx.overrides import clear_override_for_ccx, get_override_for_ccx, override_field_for_ccx
 
 from lms.djangoapps.ccx.tests.utils import flatten, iter_blocks
 
@@ -113,7 +113,8 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         # One SELECT and one INSERT.
         # One inner SAVEPOINT/RELEASE SAVEPOINT pair around the INSERT caused by the
         # transaction.atomic down in Django's get_or_create()/_create_object_from_params().
-        with self.assertNumQueries(6):
+        # One UPDATE of the version of the ccx's overrides.
+        with self.assertNumQueries(7):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
 
     def test_override_num_queries_update_existing_field(self):
@@ -124,7 +125,7 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         new_ccx_start = datetime.datetime(2015, 12, 25, 00, 00, tzinfo=pytz.UTC)
         chapter = self.ccx_course.get_children()[0]
         override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(4):
             override_field_for_ccx(self.ccx, chapter, 'start', new_ccx_start)
 
     def test_override_num_queries_field_value_not_changed(self):
@@ -148,7 +149,8 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         # One SELECT and one INSERT.
         # One inner SAVEPOINT/RELEASE SAVEPOINT pair around the INSERT caused by the
         # transaction.atomic down in Django's get_or_create()/_create_object_from_params().
-        with self.assertNumQueries(6):
+        # One UPDATE of the version of the ccx's overrides.
+        with self.assertNumQueries(7):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
 
     def test_override_is_inherited(self):
@@ -173,3 +175,61 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    def test_overrides_shared_between_requests(self):
+        """
+        Test that overrides are loaded from the database only once, rather
+        than on every request.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+    def test_shared_overrides_invalidated(self):
+        """
+        Test that changing or clearing an override isn't hidden by the
+        overrides shared between requests.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        new_ccx_start = datetime.datetime(2015, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+        RequestCache.clear_request_cache()
+        override_field_for_ccx(self.ccx, chapter, 'start', new_ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), new_ccx_start)
+
+        clear_override_for_ccx(self.ccx, chapter, 'start')
+        RequestCache.clear_request_cache()
+        self.assertIsNone(get_override_for_ccx(self.ccx, chapter, 'start'))
+
+    def test_shared_overrides_versioned_with_ccx(self):
+        """
+        Test that overrides shared by a request which read the CCX before
+        they were changed aren't used by requests reading it afterwards.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        new_ccx_start = datetime.datetime(2015, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        stale_ccx = CustomCourseForEdX.objects.get(id=self.ccx.id)
+
+        RequestCache.clear_request_cache()
+        override_field_for_ccx(self.ccx, chapter, 'start', new_ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEqual(get_override_for_ccx(stale_ccx, chapter, 'start'), ccx_start)
+
+        RequestCache.clear_request_cache()
+        current_ccx = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        self.assertEqual(get_override_for_ccx(current_ccx, chapter, 'start'), new_ccx_start)
@@ -31,6 +31,7 @@ def get_course_blocks(
         user,
         starting_block_usage_key,
         transformers=None,
+        collected_block_structure=None,
 ):
     """
     A higher order function implemented on top of the
@@ -48,6 +49,12 @@ def get_course_blocks(
             transformers whose transform methods are to be called.
             If None, COURSE_BLOCK_ACCESS_TRANSFORMERS is used.
 
+        collected_block_structure (BlockStructureBlockData) - An
+            already collected block structure for the course, such as
+            the one returned by get_course_in_cache, to use instead of
+            fetching it from the cache.  Useful when transforming the
+            course for many users in a row.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at starting_block_usage_key, that has undergone the
@@ -64,4 +71,5 @@ def get_course_blocks(
     return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
         transformers,
         starting_block_usage_key,
+        collected_block_structure,
     )
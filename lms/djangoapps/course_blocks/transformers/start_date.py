@@ -1,8 +1,14 @@
 """
 Start Date Transformer implementation.
 """
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from django.utils.timezone import UTC
+
 from openedx.core.lib.block_structure.transformer import BlockStructureTransformer, FilteringTransformerMixin
-from lms.djangoapps.courseware.access_utils import check_start_date
+from lms.djangoapps.courseware.access_utils import check_start_date, start_dates_enforced
+from student.roles import CourseBetaTesterRole
 from xmodule.course_metadata_utils import DEFAULT_START_DATE
 
 from .utils import get_field_on_block
@@ -24,8 +30,10 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
 
     Staff users are exempted from visibility rules.
     """
-    VERSION = 1
+    VERSION = 2
     MERGED_START_DATE = 'merged_start_date'
+    START_DATES = 'start_dates'
+    BETA_START_DATES = 'beta_start_dates'
 
     @classmethod
     def name(cls):
@@ -53,6 +61,11 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
         """
         block_structure.request_xblock_fields('days_early_for_beta')
 
+        # The distinct dates on which blocks start, for all users and for
+        # beta testers respectively.
+        start_dates = set()
+        beta_start_dates = set()
+
         for block_key in block_structure.topological_traversal():
 
             # compute merged value of start date from all parents
@@ -83,6 +96,36 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
                 merged_start_value
             )
 
+            start_dates.add(merged_start_value)
+            days_early_for_beta = block_structure.get_xblock(block_key).days_early_for_beta
+            if days_early_for_beta is not None:
+                beta_start_dates.add(merged_start_value - timedelta(days_early_for_beta))
+
+        block_structure.set_transformer_data(cls, cls.START_DATES, sorted(start_dates))
+        if beta_start_dates:
+            block_structure.set_transformer_data(
+                cls, cls.BETA_START_DATES, sorted(start_dates | beta_start_dates)
+            )
+
+    def get_user_signature(self, usage_info, block_structure):
+        if usage_info.has_staff_access:
+            return 'staff'
+        if not start_dates_enforced(usage_info.user, usage_info.course_key):
+            return 'all'
+
+        # Users for whom the same start dates have passed have access to
+        # the same blocks.  Beta testers only differ from other users if
+        # some blocks start early for beta testers.
+        beta_start_dates = block_structure.get_transformer_data(self, self.BETA_START_DATES)
+        is_beta_tester = bool(beta_start_dates) and CourseBetaTesterRole(usage_info.course_key).has_user(
+            usage_info.user
+        )
+        if is_beta_tester:
+            start_dates = beta_start_dates
+        else:
+            start_dates = block_structure.get_transformer_data(self, self.START_DATES)
+        return (is_beta_tester, bisect_left(start_dates, datetime.now(UTC())))
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access:
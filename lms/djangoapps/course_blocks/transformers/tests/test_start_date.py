@@ -4,12 +4,16 @@ Tests for StartDateTransformer.
 import ddt
 from datetime import timedelta
 from django.utils.timezone import now
+from freezegun import freeze_time
 from mock import patch
 from nose.plugins.attrib import attr
 
 from courseware.tests.factories import BetaTesterFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from student.tests.factories import UserFactory
+from ...usage_info import CourseUsageInfo
 from ..start_date import StartDateTransformer, DEFAULT_START_DATE
-from .helpers import BlockParentsMapTestCase, update_block
+from .helpers import BlockParentsMapTestCase, publish_course, update_block
 
 
 @attr('shard_3')
@@ -119,3 +123,28 @@ class StartDateTransformerTestCase(BlockParentsMapTestCase):
             blocks_with_differing_student_access,
             self.transformers,
         )
+
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_user_signature(self):
+        block = self.get_block(1)
+        block.start = self.StartDateType.start(self.StartDateType.future)
+        update_block(block)
+        publish_course(self.course)
+        block_structure = get_course_in_cache(self.course.id)
+        other_student = UserFactory.create(is_staff=False, username='other_student', password=self.password)
+
+        def get_user_signature(user):
+            """
+            Returns the transformer's user signature for the given user.
+            """
+            usage_info = CourseUsageInfo(self.course.id, user)
+            return StartDateTransformer().get_user_signature(usage_info, block_structure)
+
+        self.assertEquals(get_user_signature(self.student), get_user_signature(other_student))
+        self.assertNotEquals(get_user_signature(self.student), get_user_signature(self.beta_user))
+        self.assertNotEquals(get_user_signature(self.student), get_user_signature(self.staff))
+
+        # The signature changes once the block starts.
+        signature_before_start = get_user_signature(self.student)
+        with freeze_time(self.StartDateType.NEXT_MONTH + timedelta(days=1)):
+            self.assertNotEquals(get_user_signature(self.student), signature_before_start)
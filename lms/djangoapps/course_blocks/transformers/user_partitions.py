@@ -68,6 +68,17 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
             merged_group_access = _MergedGroupAccess(user_partitions, xblock, merged_parent_access_list)
             block_structure.set_transformer_block_field(block_key, cls, 'merged_group_access', merged_group_access)
 
+    def get_user_signature(self, usage_info, block_structure):
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return ()
+
+        # Users in the same groups have access to the same blocks.
+        user_groups = self._get_user_groups(usage_info, user_partitions)
+        return tuple(sorted(
+            (partition_id, group.id) for partition_id, group in user_groups.iteritems()
+        ))
+
     def transform_block_filters(self, usage_info, block_structure):
         result_list = SplitTestTransformer().transform_block_filters(usage_info, block_structure)
 
@@ -75,9 +86,7 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
         if not user_partitions:
             return [block_structure.create_universal_filter()]
 
-        user_groups = _get_user_partition_groups(
-            usage_info.course_key, user_partitions, usage_info.user
-        )
+        user_groups = self._get_user_groups(usage_info, user_partitions)
         group_access_filter = block_structure.create_removal_filter(
             lambda block_key: not block_structure.get_transformer_block_field(
                 block_key, self, 'merged_group_access'
@@ -87,6 +96,22 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
         result_list.append(group_access_filter)
         return result_list
 
+    @staticmethod
+    def _get_user_groups(usage_info, user_partitions):
+        """
+        Returns the user's group in each of the given user partitions, as
+        returned by _get_user_partition_groups.
+
+        The groups are cached within the usage_info, since they are
+        needed for both the user signature and the transform, and
+        looking them up may assign the user to groups.
+        """
+        if usage_info.user_partition_groups is None:
+            usage_info.user_partition_groups = _get_user_partition_groups(
+                usage_info.course_key, user_partitions, usage_info.user
+            )
+        return usage_info.user_partition_groups
+
 
 class _MergedGroupAccess(object):
     """
@@ -67,6 +67,9 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
                 )
             )
 
+    def get_user_signature(self, usage_info, block_structure):
+        return usage_info.has_staff_access
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Visibility check.
         if usage_info.has_staff_access:
@@ -22,6 +22,11 @@ class CourseUsageInfo(object):
         # Cached value of whether the user has staff access (bool/None)
         self._has_staff_access = None
 
+        # Cached mapping of user partition IDs to the user's group in
+        # each partition, as computed by the UserPartitionTransformer
+        # (dict/None)
+        self.user_partition_groups = None
+
     @property
     def has_staff_access(self):
         '''
@@ -2,7 +2,7 @@
 django admin pages for courseware model
 '''
 
-from courseware.models import StudentModule, OfflineComputedGrade, OfflineComputedGradeLog
+from courseware.models import StudentModule, OfflineComputedGrade, OfflineComputedGradeLog, PersistentCourseGrade
 from ratelimitbackend import admin
 
 admin.site.register(StudentModule)
@@ -10,3 +10,5 @@ admin.site.register(StudentModule)
 admin.site.register(OfflineComputedGrade)
 
 admin.site.register(OfflineComputedGradeLog)
+
+admin.site.register(PersistentCourseGrade)
@@ -156,11 +156,6 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
@@ -171,6 +166,15 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def has_providers_for_course(cls, course):
+        """
+        Returns whether any override providers are enabled for the given
+        course, i.e. whether the fields of its blocks may be overridden for
+        a user.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -188,6 +192,11 @@ class OverrideFieldData(FieldData):
             cache_key = ENABLED_OVERRIDE_PROVIDERS_KEY.format(course_id=unicode(course.id))
         enabled_providers = request_cache.data.get(cache_key, NOTSET)
         if enabled_providers == NOTSET:
+            if cls.provider_classes is None:
+                cls.provider_classes = tuple(
+                    (resolve_dotted(name) for name in
+                     settings.FIELD_OVERRIDE_PROVIDERS))
+
             enabled_providers = tuple(
                 (provider_class for provider_class in cls.provider_classes if provider_class.enabled_for(course))
             )
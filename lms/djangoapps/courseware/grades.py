@@ -19,7 +19,7 @@ from openedx.core.djangoapps.content.block_structure.api import get_course_in_ca
 from openedx.core.lib.cache_utils import memoized
 from courseware.model_data import FieldDataCache, ScoresClient
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
-from student.models import anonymous_id_for_user
+from student.models import anonymous_id_for_user, anonymous_ids_for_users
 from util.db import outer_atomic
 from util.module_utils import yield_dynamic_descriptor_descendants
 from xblock.core import XBlock
@@ -27,13 +27,17 @@ from xmodule import graders, block_metadata_utils
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import PersistentCourseGrade, StudentModule, chunks
 from .module_render import get_module_for_descriptor
 from .transformers.grades import GradesTransformer
 
 
 log = logging.getLogger("edx.courseware")
 
+# The number of students iterate_grades_for grades together, sharing a single
+# fetch of the course's block structure and bulk queries for their scores.
+GRADING_BATCH_SIZE = 100
+
 
 class ProgressSummary(object):
     """
@@ -262,13 +266,27 @@ def answer_distributions(course_key):
     return answer_counts
 
 
-def grade(student, course, keep_raw_scores=False, course_structure=None):
+def grade(
+        student,
+        course,
+        keep_raw_scores=False,
+        course_structure=None,
+        scores_client=None,
+        submissions_scores=None,
+        subsection_grades=None,
+):
     """
     Returns the grade of the student.
 
     Also sends a signal to update the minimum grade requirement status.
+
+    The scores_client, submissions_scores and subsection_grades arguments can
+    be used to provide score data that was already fetched for the student,
+    for example by iterate_grades_for; see _grade.
     """
-    grade_summary = _grade(student, course, keep_raw_scores, course_structure)
+    grade_summary = _grade(
+        student, course, keep_raw_scores, course_structure, scores_client, submissions_scores, subsection_grades
+    )
     responses = GRADES_UPDATED.send_robust(
         sender=None,
         username=student.username,
@@ -283,7 +301,15 @@ def grade(student, course, keep_raw_scores=False, course_structure=None):
     return grade_summary
 
 
-def _grade(student, course, keep_raw_scores, course_structure=None):
+def _grade(
+        student,
+        course,
+        keep_raw_scores,
+        course_structure=None,
+        scores_client=None,
+        submissions_scores=None,
+        subsection_grades=None,
+):
     """
     Unwrapped version of "grade"
 
@@ -294,34 +320,32 @@ def _grade(student, course, keep_raw_scores, course_structure=None):
     - course: a CourseDescriptor
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - scores_client : an initialized ScoresClient for the student, which must
+      hold scores for all of the graded blocks; fetched if None
+    - submissions_scores : the student's scores from the submissions API;
+      fetched if None
+    - subsection_grades : the student's stored subsection grades, as returned
+      by PersistentCourseGrade.get_subsection_grades; fetched if None
+
+    If the ENABLE_PERSISTENT_GRADES feature is enabled, the student's stored
+    subsection grades are used rather than recalculating every score, unless
+    raw scores are requested. They are calculated and stored if the student
+    has none yet for the current version of the course.
 
     More information on the format is in the docstring for CourseGrader.
     """
-    if course_structure is None:
-        course_structure = get_course_blocks(student, course.location)
-    grading_context_result = grading_context(course_structure)
-    scorable_locations = [block.location for block in grading_context_result['all_graded_blocks']]
-
-    with outer_atomic():
-        scores_client = ScoresClient.create_for_locations(course.id, student.id, scorable_locations)
-
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    # We need to import this here to avoid a circular dependency of the form:
-    # XBlock --> submissions --> Django Rest Framework error strings -->
-    # Django translation --> ... --> courseware --> submissions
-    from submissions import api as sub_api  # installed from the edx-submissions repository
-
-    with outer_atomic():
-        submissions_scores = sub_api.get_scores(
-            course.id.to_deprecated_string(),
-            anonymous_id_for_user(student, course.id)
+    if persistent_grades_enabled() and not keep_raw_scores:
+        totaled_scores = _get_persistent_totaled_scores(
+            student, course, course_structure, scores_client, submissions_scores, subsection_grades
+        )
+        raw_scores = []
+    else:
+        grading_context_result, scores_client, submissions_scores = _get_grading_inputs(
+            student, course, course_structure, scores_client, submissions_scores
+        )
+        totaled_scores, raw_scores = _calculate_totaled_scores(
+            student, grading_context_result, submissions_scores, scores_client, keep_raw_scores
         )
-
-    totaled_scores, raw_scores = _calculate_totaled_scores(
-        student, grading_context_result, submissions_scores, scores_client, keep_raw_scores
-    )
 
     with outer_atomic():
         # Grading policy might be overriden by a CCX, need to reset it
@@ -343,6 +367,45 @@ def _grade(student, course, keep_raw_scores, course_structure=None):
     return grade_summary
 
 
+def _get_grading_inputs(student, course, course_structure=None, scores_client=None, submissions_scores=None):
+    """
+    Returns the grading context of the course for the student, along with the
+    student's ScoresClient and scores from the submissions API, fetching any
+    of them that are not given.
+    """
+    if course_structure is None:
+        course_structure = get_course_blocks(student, course.location)
+    grading_context_result = grading_context(course_structure)
+
+    if scores_client is None:
+        scorable_locations = [block.location for block in grading_context_result['all_graded_blocks']]
+        with outer_atomic():
+            scores_client = ScoresClient.create_for_locations(course.id, student.id, scorable_locations)
+
+    if submissions_scores is None:
+        submissions_scores = _get_submissions_scores(student, course)
+
+    return grading_context_result, scores_client, submissions_scores
+
+
+def _get_submissions_scores(student, course):
+    """
+    Returns a dict of item_ids -> (earned, possible) point tuples. This *only*
+    grabs scores that were registered with the submissions API, which for the
+    moment means only openassessment (edx-ora2).
+    """
+    # We need to import this here to avoid a circular dependency of the form:
+    # XBlock --> submissions --> Django Rest Framework error strings -->
+    # Django translation --> ... --> courseware --> submissions
+    from submissions import api as sub_api  # installed from the edx-submissions repository
+
+    with outer_atomic():
+        return sub_api.get_scores(
+            course.id.to_deprecated_string(),
+            anonymous_id_for_user(student, course.id)
+        )
+
+
 def _calculate_totaled_scores(
         student,
         grading_context_result,
@@ -358,79 +421,233 @@ def _calculate_totaled_scores(
     for section_format, sections in grading_context_result['all_graded_sections'].iteritems():
         format_scores = []
         for section_info in sections:
-            section = section_info['section_block']
-            section_name = block_metadata_utils.display_name_with_default(section)
-
-            with outer_atomic():
-                # Check to
-                # see if any of our locations are in the scores from the submissions
-                # API. If scores exist, we have to calculate grades for this section.
-                should_grade_section = any(
-                    unicode(descendant.location) in submissions_scores
-                    for descendant in section_info['scored_descendants']
+            graded_total, scores = _calculate_section_score(
+                student, section_info, submissions_scores, scores_client
+            )
+            if keep_raw_scores:
+                raw_scores += scores
+
+            # Add the graded total to totaled_scores
+            if graded_total.possible > 0:
+                format_scores.append(graded_total)
+            else:
+                log.info(
+                    "Unable to grade a section with a total possible score of zero. " +
+                    str(section_info['section_block'].location)
                 )
 
-                if not should_grade_section:
-                    should_grade_section = any(
-                        descendant.location in scores_client
-                        for descendant in section_info['scored_descendants']
-                    )
+        totaled_scores[section_format] = format_scores
 
-                # If we haven't seen a single problem in the section, we don't have
-                # to grade it at all! We can assume 0%
-                if should_grade_section:
-                    scores = []
+    return totaled_scores, raw_scores
 
-                    for descendant in section_info['scored_descendants']:
 
-                        (correct, total) = get_score(
-                            student,
-                            descendant,
-                            scores_client,
-                            submissions_scores,
-                        )
-                        if correct is None and total is None:
-                            continue
-
-                        if settings.GENERATE_PROFILE_SCORES:  # for debugging!
-                            if total > 1:
-                                correct = random.randrange(max(total - 2, 1), total + 1)
-                            else:
-                                correct = total
-
-                        graded = descendant.graded
-                        if not total > 0:
-                            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                            graded = False
-
-                        scores.append(
-                            Score(
-                                correct,
-                                total,
-                                graded,
-                                block_metadata_utils.display_name_with_default_escaped(descendant),
-                                descendant.location
-                            )
-                        )
+def _calculate_section_score(student, section_info, submissions_scores, scores_client):
+    """
+    Returns a tuple of the graded total Score of a graded section, as passed
+    to the grader, and the list of the Scores of its problems.
+    """
+    section = section_info['section_block']
+    section_name = block_metadata_utils.display_name_with_default(section)
 
-                    __, graded_total = graders.aggregate_scores(scores, section_name)
-                    if keep_raw_scores:
-                        raw_scores += scores
-                else:
-                    graded_total = Score(0.0, 1.0, True, section_name, None)
+    with outer_atomic():
+        # Check to
+        # see if any of our locations are in the scores from the submissions
+        # API. If scores exist, we have to calculate grades for this section.
+        should_grade_section = any(
+            unicode(descendant.location) in submissions_scores
+            for descendant in section_info['scored_descendants']
+        )
+
+        if not should_grade_section:
+            should_grade_section = any(
+                descendant.location in scores_client
+                for descendant in section_info['scored_descendants']
+            )
+
+        # If we haven't seen a single problem in the section, we don't have
+        # to grade it at all! We can assume 0%
+        if not should_grade_section:
+            return Score(0.0, 1.0, True, section_name, None), []
+
+        scores = []
+
+        for descendant in section_info['scored_descendants']:
+
+            (correct, total) = get_score(
+                student,
+                descendant,
+                scores_client,
+                submissions_scores,
+            )
+            if correct is None and total is None:
+                continue
 
-                # Add the graded total to totaled_scores
-                if graded_total.possible > 0:
-                    format_scores.append(graded_total)
+            if settings.GENERATE_PROFILE_SCORES:  # for debugging!
+                if total > 1:
+                    correct = random.randrange(max(total - 2, 1), total + 1)
                 else:
-                    log.info(
-                        "Unable to grade a section with a total possible score of zero. " +
-                        str(section.location)
-                    )
+                    correct = total
 
-        totaled_scores[section_format] = format_scores
+            graded = descendant.graded
+            if not total > 0:
+                # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+                graded = False
 
-    return totaled_scores, raw_scores
+            scores.append(
+                Score(
+                    correct,
+                    total,
+                    graded,
+                    block_metadata_utils.display_name_with_default_escaped(descendant),
+                    descendant.location
+                )
+            )
+
+        __, graded_total = graders.aggregate_scores(scores, section_name)
+
+    return graded_total, scores
+
+
+def persistent_grades_enabled():
+    """
+    Returns whether students' subsection grades are stored as they change.
+    """
+    return settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False)
+
+
+def calculate_subsection_grades(
+        student,
+        course,
+        course_structure=None,
+        scores_client=None,
+        submissions_scores=None,
+):
+    """
+    Calculates the student's grade in each of the graded subsections of the
+    course, in the format stored by PersistentCourseGrade.
+
+    Returns a list with a dict for each graded subsection, grouped by
+    assignment type and in course order within each, with the keys:
+
+    - usage_key : the subsection's usage key, as a string
+    - format : the subsection's assignment type
+    - section : the subsection's display name
+    - earned : the graded points earned in the subsection
+    - possible : the graded points possible in the subsection
+    """
+    grading_context_result, scores_client, submissions_scores = _get_grading_inputs(
+        student, course, course_structure, scores_client, submissions_scores
+    )
+    return [
+        _subsection_grade(student, section_format, section_info, submissions_scores, scores_client)
+        for section_format, sections in grading_context_result['all_graded_sections'].iteritems()
+        for section_info in sections
+    ]
+
+
+def _subsection_grade(student, section_format, section_info, submissions_scores, scores_client):
+    """
+    Calculates the student's grade in a single graded subsection; see
+    calculate_subsection_grades.
+    """
+    graded_total, __ = _calculate_section_score(student, section_info, submissions_scores, scores_client)
+    return {
+        'usage_key': unicode(section_info['section_block'].location),
+        'format': section_format,
+        'section': graded_total.section,
+        'earned': graded_total.earned,
+        'possible': graded_total.possible,
+    }
+
+
+def _totaled_scores_from_subsection_grades(subsection_grades):
+    """
+    Returns the totaled scores for the given subsection grades, in the same
+    form as _calculate_totaled_scores.
+    """
+    totaled_scores = {}
+    for subsection_grade in subsection_grades:
+        format_scores = totaled_scores.setdefault(subsection_grade['format'], [])
+        # Sections with a total possible score of zero can't be graded.
+        if subsection_grade['possible'] > 0:
+            format_scores.append(
+                Score(subsection_grade['earned'], subsection_grade['possible'], True, subsection_grade['section'], None)
+            )
+    return totaled_scores
+
+
+def _get_persistent_totaled_scores(
+        student,
+        course,
+        course_structure=None,
+        scores_client=None,
+        submissions_scores=None,
+        subsection_grades=None,
+):
+    """
+    Returns the student's totaled scores from their stored subsection grades,
+    calculating and storing them first if they have none, or if they were
+    calculated from a different version of the course.
+    """
+    if subsection_grades is not None:
+        return _totaled_scores_from_subsection_grades(subsection_grades)
+
+    if course_structure is None:
+        collected_block_structure = get_course_in_cache(course.id)
+        course_version = collected_block_structure.collected_version
+    else:
+        collected_block_structure = None
+        course_version = course_structure.collected_version
+
+    with outer_atomic():
+        persistent_grade = _current_persistent_grades(course.id, course_version).filter(user=student).first()
+
+    if persistent_grade is not None:
+        subsection_grades = persistent_grade.get_subsection_grades()
+    else:
+        if course_structure is None:
+            course_structure = get_course_blocks(
+                student, course.location, collected_block_structure=collected_block_structure
+            )
+        subsection_grades = calculate_subsection_grades(
+            student, course, course_structure, scores_client, submissions_scores
+        )
+        with outer_atomic():
+            PersistentCourseGrade.save_subsection_grades(student.id, course.id, subsection_grades, course_version)
+
+    return _totaled_scores_from_subsection_grades(subsection_grades)
+
+
+def _current_persistent_grades(course_key, course_version):
+    """
+    Returns the stored grades in the course that were calculated from the
+    given version of its collected block structure, and so are up to date
+    with its content.
+    """
+    if not course_version:
+        return PersistentCourseGrade.objects.none()
+    return PersistentCourseGrade.objects.filter(course_id=course_key, course_version=course_version)
+
+
+def invalidate_persistent_grades(user_id, course_key):
+    """
+    Deletes the user's stored grades in the course, because one of their
+    scores changed or was deleted, or because the content they can see
+    changed. They are recalculated in full the next time they are needed.
+
+    This is a single query, made in the transaction of the change, so that
+    writing a score doesn't also have to regrade the student.
+    """
+    invalidate_persistent_grades_for_users([user_id], course_key)
+
+
+def invalidate_persistent_grades_for_users(user_ids, course_key):
+    """
+    Deletes the stored grades in the course of all of the given users; see
+    invalidate_persistent_grades.
+    """
+    if persistent_grades_enabled():
+        PersistentCourseGrade.objects.filter(user_id__in=user_ids, course_id=course_key).delete()
 
 
 def grade_for_percentage(grade_cutoffs, percentage):
@@ -649,28 +866,178 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in batches of GRADING_BATCH_SIZE. The course's block
+    structure is fetched only once, and the score data of each batch is fetched
+    with a constant number of queries, rather than a few queries per student.
+    If the ENABLE_PERSISTENT_GRADES feature is enabled, students with stored
+    subsection grades for the current version of the course are graded from
+    those instead.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+    collected_block_structure = get_course_in_cache(course.id)
+    scorable_locations = [
+        block_key for block_key in collected_block_structure if possibly_scored(block_key)
+    ]
+
+    for student_batch in chunks(students, GRADING_BATCH_SIZE):
+        if persistent_grades_enabled() and not keep_raw_scores:
+            with outer_atomic():
+                persistent_grades = {
+                    persistent_grade.user_id: persistent_grade.get_subsection_grades()
+                    for persistent_grade in _current_persistent_grades(
+                        course.id, collected_block_structure.collected_version
+                    ).filter(user_id__in=[student.id for student in student_batch])
+                }
+        else:
+            persistent_grades = {}
+
+        students_to_grade = [student for student in student_batch if student.id not in persistent_grades]
+        scores_clients, submissions_scores = _prefetch_scores_for_batch(course, students_to_grade, scorable_locations)
+
+        for student in student_batch:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    subsection_grades = persistent_grades.get(student.id)
+                    if subsection_grades is None:
+                        course_structure = get_course_blocks(
+                            student,
+                            course.location,
+                            collected_block_structure=collected_block_structure,
+                        )
+                    else:
+                        course_structure = None
+                    gradeset = grade(
+                        student,
+                        course,
+                        keep_raw_scores,
+                        course_structure=course_structure,
+                        scores_client=scores_clients.get(student.id),
+                        submissions_scores=submissions_scores.get(student.id),
+                        subsection_grades=subsection_grades,
+                    )
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+
+
+def iterate_subsection_grades_for(course, students):
+    """
+    Given a course and an iterable of students (User), calculates each
+    student's subsection grades afresh, in the format returned by
+    calculate_subsection_grades, and yields a tuple of:
+
+    (student, subsection_grades, err_msg)
+
+    If an error occurred, subsection_grades will be None and err_msg will be
+    an exception message. If there was no error, err_msg is an empty string.
+
+    As with iterate_grades_for, students are graded in batches.
+    """
+    collected_block_structure = get_course_in_cache(course.id)
+    scorable_locations = [
+        block_key for block_key in collected_block_structure if possibly_scored(block_key)
+    ]
+
+    for student_batch in chunks(students, GRADING_BATCH_SIZE):
+        scores_clients, submissions_scores = _prefetch_scores_for_batch(course, student_batch, scorable_locations)
+        for student in student_batch:
             try:
-                gradeset = grade(student, course, keep_raw_scores)
-                yield student, gradeset, ""
+                subsection_grades = calculate_subsection_grades(
+                    student,
+                    course,
+                    course_structure=get_course_blocks(
+                        student,
+                        course.location,
+                        collected_block_structure=collected_block_structure,
+                    ),
+                    scores_client=scores_clients.get(student.id),
+                    submissions_scores=submissions_scores.get(student.id),
+                )
+                yield student, subsection_grades, ""
             except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
                 log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
+                    'Cannot calculate subsection grades of student %s (%s) in course %s because of exception: %s',
                     student.username,
                     student.id,
                     course.id,
                     exc.message
                 )
-                yield student, {}, exc.message
+                yield student, None, exc.message
+
+
+def _prefetch_scores_for_batch(course, students, scorable_locations):
+    """
+    Returns the result of _prefetch_scores_for_students for the given batch
+    of students, or empty dicts if there are none or the scores can't be
+    fetched.
+    """
+    if not students:
+        return {}, {}
+    try:
+        return _prefetch_scores_for_students(course, students, scorable_locations)
+    except Exception:  # pylint: disable=broad-except
+        # Fall back to fetching the scores of each student separately, so
+        # that a single bad record doesn't fail the grading of the batch.
+        log.exception('Cannot prefetch scores for a batch of students in course %s', course.id)
+        return {}, {}
+
+
+def _prefetch_scores_for_students(course, students, scorable_locations):
+    """
+    Fetches the score data needed to grade all of the given students, using a
+    constant number of queries.
+
+    Returns a tuple of two dicts, both keyed by user id: the first maps to each
+    student's ScoresClient, and the second to each student's scores from the
+    submissions API, in the format returned by submissions.api.get_scores.
+    """
+    # We need to import this here to avoid a circular dependency of the form:
+    # XBlock --> submissions --> Django Rest Framework error strings -->
+    # Django translation --> ... --> courseware --> submissions
+    from submissions.models import ScoreSummary  # installed from the edx-submissions repository
+
+    with outer_atomic():
+        scores_clients = ScoresClient.create_for_users(
+            course.id, [student.id for student in students], scorable_locations
+        )
+
+    # The anonymous ids are only needed to look up existing submissions, which
+    # can't exist without the ids having been stored already, so there is no
+    # need to store them here.  Unlike anonymous_id_for_user(save=False), this
+    # doesn't remember them on the students, so a later anonymous_id_for_user
+    # call for the same student objects still stores them.
+    anonymous_ids = anonymous_ids_for_users([student.id for student in students], course.id, save=False)
+    user_ids_by_anonymous_id = {anonymous_id: user_id for user_id, anonymous_id in anonymous_ids.iteritems()}
+    submissions_scores = {student.id: {} for student in students}
+    with outer_atomic():
+        # This mirrors submissions.api.get_scores, for many students at once.
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=unicode(course.id),
+            student_item__student_id__in=user_ids_by_anonymous_id.keys(),
+        ).select_related('latest', 'student_item')
+        for summary in score_summaries:
+            if summary.latest.is_hidden():
+                continue
+            user_id = user_ids_by_anonymous_id[summary.student_item.student_id]
+            submissions_scores[user_id][summary.student_item.item_id] = (
+                summary.latest.points_earned, summary.latest.points_possible
+            )
+
+    return scores_clients, submissions_scores
 
 
 def _get_mock_request(student):
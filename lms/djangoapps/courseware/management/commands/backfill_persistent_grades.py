@@ -0,0 +1,107 @@
+"""
+Command to calculate and store the subsection grades of enrolled students.
+"""
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from xmodule.modulestore.django import modulestore
+
+from courseware.grades import iterate_subsection_grades_for
+from courseware.models import PersistentCourseGrade
+from student.models import CourseEnrollment
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms backfill_persistent_grades 'edX/DemoX/Demo_Course' --settings=devstack
+        $ ./manage.py lms backfill_persistent_grades 'edX/DemoX/Demo_Course' --check --settings=devstack
+    """
+    args = '<course_id course_id ...>'
+    help = 'Calculates and stores the subsection grades of the students enrolled in one or more courses.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            '--check',
+            help='Only compare the stored grades with freshly calculated ones, and report the students whose '
+                 'grades differ, without storing anything.',
+            action='store_true',
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        if len(args) < 1:
+            raise CommandError('At least one course must be specified.')
+        try:
+            course_keys = [CourseKey.from_string(arg) for arg in args]
+        except InvalidKeyError:
+            raise CommandError('Invalid key specified.')
+
+        for course_key in course_keys:
+            course = modulestore().get_course(course_key, depth=0)
+            if course is None:
+                raise CommandError('Course {} not found.'.format(course_key))
+            if options.get('check'):
+                self._check_course(course)
+            else:
+                self._backfill_course(course)
+
+    def _backfill_course(self, course):
+        """
+        Stores the subsection grades of all the students enrolled in the course.
+        """
+        log.info('Storing subsection grades for course %s.', course.id)
+        num_stored = 0
+        # The version is read before any grades are calculated, so that grades
+        # calculated after the course changes are never stored as current.
+        course_version = get_course_in_cache(course.id).collected_version
+        students = CourseEnrollment.objects.users_enrolled_in(course.id)
+        for student, subsection_grades, err_msg in iterate_subsection_grades_for(course, students):
+            if err_msg:
+                continue
+            PersistentCourseGrade.save_subsection_grades(student.id, course.id, subsection_grades, course_version)
+            num_stored += 1
+        log.info('Stored subsection grades of %d students in course %s.', num_stored, course.id)
+
+    def _check_course(self, course):
+        """
+        Logs the enrolled students whose stored subsection grades differ from
+        their current ones, or were calculated from a different version of the
+        course.
+        """
+        course_version = get_course_in_cache(course.id).collected_version
+        stored_grades = {
+            persistent_grade.user_id: (
+                persistent_grade.get_subsection_grades()
+                if persistent_grade.course_version == course_version else None
+            )
+            for persistent_grade in PersistentCourseGrade.objects.filter(course_id=course.id)
+        }
+        students = CourseEnrollment.objects.users_enrolled_in(course.id).filter(id__in=stored_grades.keys())
+        num_mismatched = 0
+        for student, subsection_grades, err_msg in iterate_subsection_grades_for(course, students):
+            if err_msg:
+                continue
+            if subsection_grades != stored_grades[student.id]:
+                num_mismatched += 1
+                log.warning(
+                    'Stored subsection grades of student %s (%s) in course %s are out of date.',
+                    student.username,
+                    student.id,
+                    course.id,
+                )
+        log.info(
+            'Checked subsection grades of %d students in course %s: %d out of date.',
+            len(stored_grades),
+            course.id,
+            num_mismatched,
+        )
@@ -0,0 +1,56 @@
+"""
+Tests for the backfill_persistent_grades management command.
+"""
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mock import patch
+
+from courseware.grades import calculate_subsection_grades
+from courseware.model_data import set_score
+from courseware.models import PersistentCourseGrade
+from student.models import CourseEnrollment
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class TestBackfillPersistentGrades(SharedModuleStoreTestCase):
+    """
+    Test that the command stores the subsection grades of enrolled students,
+    and reports the students whose stored grades are out of date.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestBackfillPersistentGrades, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        sequential = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        vertical = ItemFactory.create(parent=sequential, category='vertical')
+        cls.problem = ItemFactory.create(parent=vertical, category='problem')
+
+    def setUp(self):
+        super(TestBackfillPersistentGrades, self).setUp()
+        self.students = [UserFactory.create() for __ in range(3)]
+        for student in self.students:
+            CourseEnrollment.enroll(student, self.course.id)
+        set_score(self.students[0].id, self.problem.location, 1, 1)
+
+    def test_backfill(self):
+        call_command('backfill_persistent_grades', unicode(self.course.id))
+        for student in self.students:
+            self.assertEqual(
+                PersistentCourseGrade.objects.get(user=student, course_id=self.course.id).get_subsection_grades(),
+                calculate_subsection_grades(student, self.course),
+            )
+
+    def test_check(self):
+        call_command('backfill_persistent_grades', unicode(self.course.id))
+        set_score(self.students[1].id, self.problem.location, 1, 1)
+        with patch('courseware.management.commands.backfill_persistent_grades.log') as mock_log:
+            call_command('backfill_persistent_grades', unicode(self.course.id), check=True)
+        self.assertEqual(mock_log.warning.call_count, 1)
+        self.assertEqual(mock_log.warning.call_args[0][2], self.students[1].id)
+
+    def test_invalid_course(self):
+        with self.assertRaises(CommandError):
+            call_command('backfill_persistent_grades', 'not/a/course')
@@ -43,7 +43,7 @@ from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
 from xblock.fields import Scope, UserScope
 from xmodule.modulestore.django import modulestore
 from xblock.core import XBlockAside
-from courseware.user_state_client import DjangoXBlockUserStateClient
+from courseware.user_state_client import DjangoXBlockUserStateClient, flush_pending_state, pop_pending_state
 
 
 log = logging.getLogger(__name__)
@@ -686,7 +686,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, scopes=None):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -699,12 +699,24 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: Ignored
         asides: The list of aside types to load, or None to prefetch no asides.
+        scopes: The scopes to load when descriptors are added, or None to load all of them.
+            The data for any other scope is loaded the first time that scope is used, in a
+            single batch for all the descriptors added until then. Pass an empty list to load
+            every scope lazily.
         """
         if asides is None:
             self.asides = []
         else:
             self.asides = asides
 
+        self.scopes = scopes
+        self._deferred_fields = defaultdict(list)
+
+        # The number of rows loaded into this cache, and the rows that have since been read,
+        # so that callers can report how much of what was prefetched was actually used.
+        self.rows_fetched = 0
+        self._rows_used = set()
+
         assert isinstance(course_id, CourseKey)
         self.course_id = course_id
         self.user = user
@@ -737,7 +749,43 @@ class FieldDataCache(object):
                 if scope not in self.cache:
                     continue
 
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+                if self.scopes is not None and scope not in self.scopes:
+                    self._deferred_fields[scope].append((fields, descriptors))
+                    continue
+
+                self._cache_fields(scope, fields, descriptors)
+
+    def _cache_deferred_fields(self, scope):
+        """
+        Load the data for `scope` that was deferred when descriptors were added.
+        """
+        deferred = self._deferred_fields.pop(scope, None)
+        if deferred:
+            fields = set().union(*(deferred_fields for deferred_fields, __ in deferred))
+            descriptors = [descriptor for __, deferred_descriptors in deferred for descriptor in deferred_descriptors]
+            self._cache_fields(scope, fields, descriptors)
+
+    def _cache_fields(self, scope, fields, descriptors):
+        """
+        Load the data for `fields` of `descriptors` into the cache for `scope`.
+        """
+        rows_cached = len(self.cache[scope])
+        self.cache[scope].cache_fields(fields, descriptors, self.asides)
+        self.rows_fetched += len(self.cache[scope]) - rows_cached
+
+    def _record_row_used(self, key):
+        """
+        Record that the row that stores `key` was read.
+        """
+        cache_key = self.cache[key.scope]._cache_key_for_kvs_key(key)  # pylint: disable=protected-access
+        self._rows_used.add((key.scope, cache_key))
+
+    @property
+    def rows_used(self):
+        """
+        The number of rows in this cache that have been read.
+        """
+        return len(self._rows_used)
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -782,7 +830,7 @@ class FieldDataCache(object):
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         select_for_update=False, asides=None):
+                                         select_for_update=False, asides=None, scopes=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -792,8 +840,9 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return whether the field data
             should be cached
         select_for_update: Ignored
+        scopes: The scopes to load up front, or None to load all of them. See `FieldDataCache`.
         """
-        cache = FieldDataCache([], course_id, user, select_for_update, asides=asides)
+        cache = FieldDataCache([], course_id, user, select_for_update, asides=asides, scopes=scopes)
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
@@ -827,7 +876,10 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
-        return self.cache[key.scope].get(key)
+        self._cache_deferred_fields(key.scope)
+        value = self.cache[key.scope].get(key)
+        self._record_row_used(key)
+        return value
 
     @contract(kv_dict="dict(DjangoKeyValueStore_Key: *)")
     def set_many(self, kv_dict):
@@ -855,6 +907,7 @@ class FieldDataCache(object):
             by_scope[key.scope][key] = value
 
         for scope, set_many_data in by_scope.iteritems():
+            self._cache_deferred_fields(scope)
             try:
                 self.cache[scope].set_many(set_many_data)
                 # If save is successful on these fields, add it to
@@ -883,6 +936,7 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
+        self._cache_deferred_fields(key.scope)
         self.cache[key.scope].delete(key)
 
     @contract(key=DjangoKeyValueStore.Key, returns=bool)
@@ -904,7 +958,11 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             return False
 
-        return self.cache[key.scope].has(key)
+        self._cache_deferred_fields(key.scope)
+        if self.cache[key.scope].has(key):
+            self._record_row_used(key)
+            return True
+        return False
 
     @contract(key=DjangoKeyValueStore.Key, returns="datetime|None")
     def last_modified(self, key):
@@ -924,6 +982,7 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             return None
 
+        self._cache_deferred_fields(key.scope)
         return self.cache[key.scope].last_modified(key)
 
     def __len__(self):
@@ -956,15 +1015,20 @@ class ScoresClient(object):
             course_id=self.course_key,
             module_state_key__in=set(locations),
         )
+        self._add_scores(scores_qset.values_list('module_state_key', 'grade', 'max_grade'))
+        self._has_fetched = True
+
+    def _add_scores(self, score_rows):
+        """
+        Add the given (module_state_key, grade, max_grade) rows to our lookup.
+        """
         # Locations in StudentModule don't necessarily have course key info
         # attached to them (since old mongo identifiers don't include runs).
         # So we have to add that info back in before we put it into our lookup.
         self._locations_to_scores.update({
             UsageKey.from_string(location).map_into_course(self.course_key): self.Score(correct, total)
-            for location, correct, total
-            in scores_qset.values_list('module_state_key', 'grade', 'max_grade')
+            for location, correct, total in score_rows
         })
-        self._has_fetched = True
 
     def get(self, location):
         """
@@ -988,22 +1052,71 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients for many users at once, with the score data for
+        all of them fetched in a single query.
+
+        Returns a dict mapping each of the given user ids to its ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        if not clients:
+            return clients
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        score_rows_by_user = defaultdict(list)
+        for user_id, location, correct, total in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade'
+        ):
+            score_rows_by_user[user_id].append((location, correct, total))
+
+        for user_id, client in clients.iteritems():
+            client._add_scores(score_rows_by_user[user_id])  # pylint: disable=protected-access
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
     """
     Set the score and max_score for the specified user and xblock usage.
+
+    Any state of the block that is waiting to be saved is saved along with the score, and the
+    rest of the pending state before it, so that it can be read by anything the score triggers.
+
+    The user's stored subsection grades, if any, are marked out of date by the new score.
     """
+    # Imported here to avoid a circular import, as courseware.grades uses this module.
+    from courseware.grades import invalidate_persistent_grades
+
+    pending_state = pop_pending_state(user_id, usage_key)
+    flush_pending_state()
+
+    defaults = {
+        'grade': score,
+        'max_grade': max_score,
+    }
+    if pending_state is not None:
+        defaults.update(state=json.dumps(pending_state), module_type=usage_key.block_type)
+
     student_module, created = StudentModule.objects.get_or_create(
         student_id=user_id,
         module_state_key=usage_key,
         course_id=usage_key.course_key,
-        defaults={
-            'grade': score,
-            'max_grade': max_score,
-        }
+        defaults=defaults,
     )
     if not created:
+        if pending_state is not None:
+            current_state = json.loads(student_module.state) if student_module.state else {}
+            current_state.update(pending_state)
+            student_module.state = json.dumps(current_state)
         student_module.grade = score
         student_module.max_grade = max_score
         student_module.save()
+
+    invalidate_persistent_grades(user_id, usage_key.course_key)
@@ -12,8 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-import logging
 import itertools
+import json
+import logging
 
 from django.contrib.auth.models import User
 from django.conf import settings
@@ -34,9 +35,12 @@ log = logging.getLogger("edx.courseware")
 def chunks(items, chunk_size):
     """
     Yields the values from items in chunks of size chunk_size
+
+    `items` is consumed lazily, one chunk at a time, so it may be a generator
+    of any length.
     """
-    items = list(items)
-    return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
+    items = iter(items)
+    return iter(lambda: list(itertools.islice(items, chunk_size)), [])
 
 
 class ChunkingManager(models.Manager):
@@ -343,6 +347,62 @@ class OfflineComputedGradeLog(models.Model):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
 
 
+class PersistentCourseGrade(TimeStampedModel):
+    """
+    Stores the grade of each graded subsection of a course for a user, so that
+    the user's course grade can be computed without recalculating every score.
+
+    The subsection grades are calculated when they are first needed, and
+    deleted whenever the user's scores or course groups change; see
+    `courseware.signals`. They are only used while the course's content is
+    unchanged, which is checked using the stamp of the collected course block
+    structure they were calculated from.
+    """
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # A list of the subsection grades, stored as JSON; see
+    # `courseware.grades.calculate_subsection_grades` for their format.
+    subsection_grades = models.TextField(default='[]')
+
+    # The collected_version of the course's collected block structure when the
+    # subsection grades were calculated.  The block structure is collected
+    # afresh when the course is published, so grades stored for an earlier
+    # version may be out of date.
+    course_version = models.CharField(max_length=255, blank=True, default='')
+
+    def get_subsection_grades(self):
+        """
+        Returns the list of subsection grades.
+        """
+        return json.loads(self.subsection_grades)
+
+    def set_subsection_grades(self, subsection_grades):
+        """
+        Sets the list of subsection grades; the caller must save the model.
+        """
+        self.subsection_grades = json.dumps(subsection_grades)
+
+    @classmethod
+    def save_subsection_grades(cls, user_id, course_id, subsection_grades, course_version):
+        """
+        Creates or replaces the subsection grades stored for the given user
+        and course, calculated from the given version of the course.
+        """
+        cls.objects.update_or_create(
+            user_id=user_id,
+            course_id=course_id,
+            defaults={'subsection_grades': json.dumps(subsection_grades), 'course_version': course_version or ''},
+        )
+
+    def __unicode__(self):
+        return u"[PersistentCourseGrade] {}: {}".format(self.user_id, self.course_id)
+
+
 class StudentFieldOverride(TimeStampedModel):
     """
     Holds the value of a specific field overriden for a student.  This is used
@@ -5,7 +5,7 @@ Module rendering
 import hashlib
 import json
 import logging
-from collections import OrderedDict
+from collections import namedtuple, OrderedDict
 from functools import partial
 
 import dogstats_wrapper as dog_stats_api
@@ -32,6 +32,7 @@ from xblock.exceptions import NoSuchHandlerError, NoSuchViewError
 from xblock.reference.plugins import FSService
 
 import static_replace
+from course_blocks.api import get_course_blocks
 from courseware.access import has_access, get_user_role
 from courseware.entrance_exams import (
     get_entrance_exam_score,
@@ -46,14 +47,17 @@ from courseware.masquerade import (
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache, set_score
 from courseware.models import SCORE_CHANGED
+from courseware.user_state_client import write_behind
 from edxmako.shortcuts import render_to_string
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from openedx.core.djangoapps.bookmarks.services import BookmarksService
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from lms.djangoapps.verify_student.services import ReverificationService
 from openedx.core.djangoapps.credit.services import CreditService
 from openedx.core.djangoapps.util.user_utils import SystemUser
+from openedx.core.lib.cache_utils import ProcessLRUCache
 from openedx.core.lib.xblock_utils import (
     replace_course_urls,
     replace_jump_to_id_urls,
@@ -70,6 +74,7 @@ from util.model_utils import slugify
 from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from xblock.runtime import KvsFieldData
 from xblock_django.user_service import DjangoXBlockUserService
+from xmodule.block_metadata_utils import display_name_with_default_escaped, url_name_for_block
 from xmodule.contentstore.django import contentstore
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.exceptions import NotFoundError, ProcessingError
@@ -77,7 +82,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.mixin import wrap_with_license
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from xmodule.x_module import XModuleDescriptor
+from xmodule.x_module import XModuleDescriptor, get_handler_needs
 from .field_overrides import OverrideFieldData
 
 log = logging.getLogger(__name__)
@@ -118,6 +123,20 @@ def make_track_function(request):
     return function
 
 
+# The chapters and sections of a course, as shown in its table of contents.
+# Each TocChapter's sections are a tuple of TocSections.
+TocChapter = namedtuple('TocChapter', ['location', 'url_name', 'display_name', 'hide_from_toc', 'sections'])
+TocSection = namedtuple('TocSection', [
+    'location', 'url_name', 'display_name', 'format', 'due', 'graded', 'hide_from_toc', 'is_time_limited'
+])
+
+# The maximum total number of chapters and sections of the tables of contents
+# kept in the memory of the process.
+TOC_SKELETON_CACHE_SIZE = 100000
+
+_TOC_SKELETON_CACHE = ProcessLRUCache('courseware.toc_skeleton_cache', TOC_SKELETON_CACHE_SIZE)
+
+
 def toc_for_course(user, request, course, active_chapter, active_section, field_data_cache):
     '''
     Create a table of contents from the module store
@@ -146,89 +165,220 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     NOTE: assumes that if we got this far, user has access to course.  Returns
     None if this is not the case.
 
-    field_data_cache must include data from the course module and 2 levels of its descendants
+    Unless the fields of the course's blocks may be overridden for the user,
+    the chapters and sections are taken from the course's cached block
+    structure, and only the user's access to them is checked at request
+    time.  Otherwise, field_data_cache must include data from the course
+    module and 2 levels of its descendants.
     '''
+    if OverrideFieldData.has_providers_for_course(course):
+        with modulestore().bulk_operations(course.id):
+            chapters = _get_toc_chapters_from_modules(user, request, course, field_data_cache)
+    else:
+        chapters = _get_toc_chapters_from_block_structure(user, course)
+    if chapters is None:
+        return None, None, None
+
+    toc_chapters = list()
+
+    # Check for content which needs to be completed
+    # before the rest of the content is made available
+    required_content = milestones_helpers.get_required_content(course, user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if not user_must_complete_entrance_exam(request, user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+
+    previous_of_active_section, next_of_active_section = None, None
+    last_processed_section, last_processed_chapter = None, None
+    found_active_section = False
+    for chapter in chapters:
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (bool)
+        display_id = slugify(chapter.display_name)
+        local_hide_from_toc = False
+        if required_content:
+            if unicode(chapter.location) not in required_content:
+                local_hide_from_toc = True
+
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc or local_hide_from_toc:
+            continue
+
+        sections = list()
+        for section in chapter.sections:
+            # skip the section if it is hidden from the user
+            if section.hide_from_toc:
+                continue
+
+            is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
+            if is_section_active:
+                found_active_section = True
+
+            section_context = {
+                'display_name': section.display_name,
+                'url_name': section.url_name,
+                'format': section.format if section.format is not None else '',
+                'due': section.due,
+                'active': is_section_active,
+                'graded': section.graded,
+            }
+            _add_timed_exam_info(user, course, section, section_context)
+
+            # update next and previous of active section, if applicable
+            if is_section_active:
+                if last_processed_section:
+                    previous_of_active_section = last_processed_section.copy()
+                    previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
+            elif found_active_section and not next_of_active_section:
+                next_of_active_section = section_context.copy()
+                next_of_active_section['chapter_url_name'] = chapter.url_name
+
+            sections.append(section_context)
+            last_processed_section = section_context
+            last_processed_chapter = chapter
+
+        toc_chapters.append({
+            'display_name': chapter.display_name,
+            'display_id': display_id,
+            'url_name': chapter.url_name,
+            'sections': sections,
+            'active': chapter.url_name == active_chapter
+        })
+    return {
+        'chapters': toc_chapters,
+        'previous_of_active_section': previous_of_active_section,
+        'next_of_active_section': next_of_active_section,
+    }
 
-    with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(
-            user, request, course, field_data_cache, course.id, course=course
+
+def _get_toc_chapters_from_modules(user, request, course, field_data_cache):
+    """
+    Returns the list of TocChapters of the course that the user has access
+    to, read from the course's modules bound to the user, or None if the
+    user doesn't have access to the course.
+    """
+    course_module = get_module_for_descriptor(
+        user, request, course, field_data_cache, course.id, course=course
+    )
+    if course_module is None:
+        return None
+
+    return [
+        TocChapter(
+            location=chapter.location,
+            url_name=chapter.url_name,
+            display_name=chapter.display_name_with_default_escaped,
+            hide_from_toc=chapter.hide_from_toc,
+            sections=tuple(
+                TocSection(
+                    location=section.location,
+                    url_name=section.url_name,
+                    display_name=section.display_name_with_default_escaped,
+                    format=section.format,
+                    due=section.due,
+                    graded=section.graded,
+                    hide_from_toc=section.hide_from_toc,
+                    is_time_limited=getattr(section, 'is_time_limited', False),
+                )
+                for section in chapter.get_display_items()
+            ),
         )
-        if course_module is None:
-            return None, None, None
-
-        toc_chapters = list()
-        chapters = course_module.get_display_items()
-
-        # Check for content which needs to be completed
-        # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course, user)
-
-        # The user may not actually have to complete the entrance exam, if one is required
-        if not user_must_complete_entrance_exam(request, user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
-
-        previous_of_active_section, next_of_active_section = None, None
-        last_processed_section, last_processed_chapter = None, None
-        found_active_section = False
-        for chapter in chapters:
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (bool)
-            display_id = slugify(chapter.display_name_with_default_escaped)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
-                continue
+        for chapter in course_module.get_display_items()
+    ]
 
-            sections = list()
-            for section in chapter.get_display_items():
-                # skip the section if it is hidden from the user
-                if section.hide_from_toc:
-                    continue
-
-                is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
-                if is_section_active:
-                    found_active_section = True
-
-                section_context = {
-                    'display_name': section.display_name_with_default_escaped,
-                    'url_name': section.url_name,
-                    'format': section.format if section.format is not None else '',
-                    'due': section.due,
-                    'active': is_section_active,
-                    'graded': section.graded,
-                }
-                _add_timed_exam_info(user, course, section, section_context)
-
-                # update next and previous of active section, if applicable
-                if is_section_active:
-                    if last_processed_section:
-                        previous_of_active_section = last_processed_section.copy()
-                        previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
-                elif found_active_section and not next_of_active_section:
-                    next_of_active_section = section_context.copy()
-                    next_of_active_section['chapter_url_name'] = chapter.url_name
-
-                sections.append(section_context)
-                last_processed_section = section_context
-                last_processed_chapter = chapter
-
-            toc_chapters.append({
-                'display_name': chapter.display_name_with_default_escaped,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
-                'sections': sections,
-                'active': chapter.url_name == active_chapter
-            })
-        return {
-            'chapters': toc_chapters,
-            'previous_of_active_section': previous_of_active_section,
-            'next_of_active_section': next_of_active_section,
+
+def _get_toc_chapters_from_block_structure(user, course):
+    """
+    Returns the list of TocChapters of the course that the user has access
+    to, read from the course's cached block structure, or None if the user
+    doesn't have access to the course.
+
+    The chapters and sections of the course are shared by all its users,
+    and are kept in the memory of the process for each collected version of
+    its block structure.  Only the user's access to them is determined for
+    each request.
+    """
+    collected_block_structure = get_course_in_cache(course.id)
+    toc_skeleton = _get_toc_skeleton(collected_block_structure)
+    user_block_structure = get_course_blocks(
+        user, course.location, collected_block_structure=collected_block_structure
+    )
+    if course.location not in user_block_structure:
+        return None
+
+    # Access to content that is blocked by unfulfilled milestones, such as
+    # gated subsections, isn't part of the block structure's transforms.
+    if has_access(user, 'staff', course, course.id):
+        blocked_content = set()
+    else:
+        blocked_content = {
+            milestone['content_id']
+            for milestone in milestones_helpers.get_course_content_milestones(course.id, None, 'requires', user.id)
         }
 
+    def is_accessible(toc_block):
+        """
+        Returns whether the user has access to the given TocChapter or TocSection.
+        """
+        return toc_block.location in user_block_structure and unicode(toc_block.location) not in blocked_content
+
+    return [
+        chapter._replace(sections=tuple(section for section in chapter.sections if is_accessible(section)))
+        for chapter in toc_skeleton
+        if is_accessible(chapter)
+    ]
+
+
+def _get_toc_skeleton(collected_block_structure):
+    """
+    Returns the tuple of all the TocChapters of the course whose collected
+    block structure is given, regardless of the access of any user to them.
+    """
+    cache_key = (collected_block_structure.root_block_usage_key, collected_block_structure.collected_version)
+    toc_skeleton = _TOC_SKELETON_CACHE.get(cache_key)
+    if toc_skeleton is not None:
+        return toc_skeleton
+
+    def get_field(usage_key, field_name):
+        """
+        Returns the value of the given field of the given block.
+        """
+        return collected_block_structure.get_xblock_field(usage_key, field_name)
+
+    toc_skeleton = tuple(
+        TocChapter(
+            location=chapter_key,
+            url_name=url_name_for_block(collected_block_structure[chapter_key]),
+            display_name=display_name_with_default_escaped(collected_block_structure[chapter_key]),
+            hide_from_toc=get_field(chapter_key, 'hide_from_toc'),
+            sections=tuple(
+                TocSection(
+                    location=section_key,
+                    url_name=url_name_for_block(collected_block_structure[section_key]),
+                    display_name=display_name_with_default_escaped(collected_block_structure[section_key]),
+                    format=get_field(section_key, 'format'),
+                    due=get_field(section_key, 'due'),
+                    graded=get_field(section_key, 'graded'),
+                    hide_from_toc=get_field(section_key, 'hide_from_toc'),
+                    is_time_limited=get_field(section_key, 'is_time_limited') or False,
+                )
+                for section_key in collected_block_structure.get_children(chapter_key)
+            ),
+        )
+        for chapter_key in collected_block_structure.get_children(collected_block_structure.root_block_usage_key)
+    )
+
+    # The structure of a course that was collected without being cached has
+    # no version, so its table of contents isn't cached either.
+    if collected_block_structure.collected_version is not None:
+        _TOC_SKELETON_CACHE.set(
+            cache_key,
+            toc_skeleton,
+            len(toc_skeleton) + sum(len(chapter.sections) for chapter in toc_skeleton),
+        )
+    return toc_skeleton
+
 
 def _add_timed_exam_info(user, course, section, section_context):
     """
@@ -352,11 +502,12 @@ def get_xqueue_callback_url_prefix(request):
 def get_module_for_descriptor(user, request, descriptor, field_data_cache, course_key,
                               position=None, wrap_xmodule_display=True, grade_bucket_type=None,
                               static_asset_path='', disable_staff_debug_info=False,
-                              course=None):
+                              course=None, handler_needs=None):
     """
     Implements get_module, extracting out the request-specific functionality.
 
     disable_staff_debug_info : If this is True, exclude staff debug information in the rendering of the module.
+    handler_needs : The HandlerNeeds of the only handler that will be invoked on the module, if any.
 
     See get_module() docstring for further details.
     """
@@ -384,7 +535,8 @@ def get_module_for_descriptor(user, request, descriptor, field_data_cache, cours
         user_location=user_location,
         request_token=xblock_request_token(request),
         disable_staff_debug_info=disable_staff_debug_info,
-        course=course
+        course=course,
+        handler_needs=handler_needs,
     )
 
 
@@ -393,7 +545,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
                                descriptor, course_id, track_function, xqueue_callback_url_prefix,
                                request_token, position=None, wrap_xmodule_display=True, grade_bucket_type=None,
                                static_asset_path='', user_location=None, disable_staff_debug_info=False,
-                               course=None):
+                               course=None, handler_needs=None):
     """
     Helper function that returns a module system and student_data bound to a user and a descriptor.
 
@@ -409,6 +561,8 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     Arguments:
         see arguments for get_module()
         request_token (str): A token unique to the request use by xblock initialization
+        handler_needs (HandlerNeeds): If set, the module system is only used to invoke a handler
+            that declared these needs, and leaves out the user services that it doesn't declare
 
     Returns:
         (LmsModuleSystem, KvsFieldData):  (module system, student_data) bound to, primarily, the user and descriptor
@@ -666,7 +820,8 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
     ))
 
-    if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
+    # Handlers don't render the staff debug info, so skip the access checks it needs when binding for one.
+    if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF') and handler_needs is None:
         if is_masquerading_as_specific_student(user, course_id):
             # When masquerading as a specific student, we want to show the debug button
             # unconditionally to enable resetting the state of the student we are masquerading as.
@@ -694,15 +849,33 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     is_pure_xblock = isinstance(descriptor, XBlock) and not isinstance(descriptor, XModuleDescriptor)
     module_class = getattr(descriptor, 'module_class', None)
     is_lti_module = not is_pure_xblock and issubclass(module_class, LTIModule)
+    # The id is only looked up in reverse through the user service, so a handler that doesn't use
+    # that service needn't wait for the id to be recorded.
+    save_anonymous_id = handler_needs is None or 'user' in handler_needs.services
     if is_pure_xblock or is_lti_module:
-        anonymous_student_id = anonymous_id_for_user(user, course_id)
+        anonymous_student_id = anonymous_id_for_user(user, course_id, save=save_anonymous_id)
     else:
-        anonymous_student_id = anonymous_id_for_user(user, None)
+        anonymous_student_id = anonymous_id_for_user(user, None, save=save_anonymous_id)
 
     field_data = LmsFieldData(descriptor._field_data, student_data)  # pylint: disable=protected-access
 
     user_is_staff = bool(has_access(user, u'staff', descriptor.location, course_id))
 
+    services = {
+        'fs': FSService(),
+        'field-data': field_data,
+        'user': DjangoXBlockUserService(user, user_is_staff=user_is_staff),
+        "reverification": ReverificationService(),
+        'proctoring': ProctoringService(),
+        'credit': CreditService(),
+        'bookmarks': BookmarksService(user=user),
+    }
+    if handler_needs is not None:
+        services = {
+            name: service for name, service in services.iteritems()
+            if name == 'field-data' or name in handler_needs.services
+        }
+
     system = LmsModuleSystem(
         track_function=track_function,
         render_template=render_to_string,
@@ -743,15 +916,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         mixins=descriptor.runtime.mixologist._mixins,  # pylint: disable=protected-access
         wrappers=block_wrappers,
         get_real_user=user_by_anonymous_id,
-        services={
-            'fs': FSService(),
-            'field-data': field_data,
-            'user': DjangoXBlockUserService(user, user_is_staff=user_is_staff),
-            "reverification": ReverificationService(),
-            'proctoring': ProctoringService(),
-            'credit': CreditService(),
-            'bookmarks': BookmarksService(user=user),
-        },
+        services=services,
         get_user_role=lambda: get_user_role(user, course_id),
         descriptor_runtime=descriptor._runtime,  # pylint: disable=protected-access
         rebind_noauth_module_to_user=rebind_noauth_module_to_user,
@@ -789,7 +954,7 @@ def get_module_for_descriptor_internal(user, descriptor, student_data, course_id
                                        track_function, xqueue_callback_url_prefix, request_token,
                                        position=None, wrap_xmodule_display=True, grade_bucket_type=None,
                                        static_asset_path='', user_location=None, disable_staff_debug_info=False,
-                                       course=None):
+                                       course=None, handler_needs=None):
     """
     Actually implement get_module, without requiring a request.
 
@@ -797,6 +962,7 @@ def get_module_for_descriptor_internal(user, descriptor, student_data, course_id
 
     Arguments:
         request_token (str): A unique token for this request, used to isolate xblock rendering
+        handler_needs (HandlerNeeds): The needs of the only handler that will be invoked on the module, if any
     """
 
     (system, student_data) = get_module_system_for_user(
@@ -813,7 +979,8 @@ def get_module_for_descriptor_internal(user, descriptor, student_data, course_id
         user_location=user_location,
         request_token=request_token,
         disable_staff_debug_info=disable_staff_debug_info,
-        course=course
+        course=course,
+        handler_needs=handler_needs,
     )
 
     descriptor.bind_for_student(
@@ -948,10 +1115,15 @@ def handle_xblock_callback(request, course_id, usage_id, handler, suffix=None):
         return _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course=course)
 
 
-def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_info=False, course=None):
+def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_info=False, course=None,
+                           handler=None, suffix=None):
     """
     Gets a module instance based on its `usage_id` in a course, for a given request/user
 
+    If `handler` (and its `suffix`) are given, the module is only used to invoke that handler, so if
+    the block declares the handler's needs, the module is bound to just the user data and services
+    that the handler declares.
+
     Returns (instance, tracking_context)
     """
     user = request.user
@@ -986,11 +1158,15 @@ def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_inf
         tracking_context['module']['original_usage_version'] = unicode(descriptor_orig_version)
 
     unused_masquerade, user = setup_masquerade(request, course_id, has_access(user, 'staff', descriptor, course_id))
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-        course_id,
-        user,
-        descriptor
-    )
+    handler_needs = get_handler_needs(descriptor, handler, suffix) if handler else None
+    if handler_needs is not None:
+        field_data_cache = FieldDataCache([descriptor], course_id, user, scopes=handler_needs.scopes)
+    else:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            course_id,
+            user,
+            descriptor
+        )
     instance = get_module_for_descriptor(
         user,
         request,
@@ -998,7 +1174,8 @@ def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_inf
         field_data_cache,
         usage_key.course_key,
         disable_staff_debug_info=disable_staff_debug_info,
-        course=course
+        course=course,
+        handler_needs=handler_needs,
     )
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -1038,7 +1215,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course
     newrelic.agent.add_custom_parameter('org', unicode(course_key.org))
 
     with modulestore().bulk_operations(course_key):
-        instance, tracking_context = get_module_by_usage_id(request, course_id, usage_id, course=course)
+        instance, tracking_context = get_module_by_usage_id(
+            request, course_id, usage_id, course=course, handler=handler, suffix=suffix
+        )
 
         # Name the transaction so that we can view XBlock handlers separately in
         # New Relic. The suffix is necessary for XModule handlers because the
@@ -1051,7 +1230,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course
         req = django_to_webob_request(request)
         try:
             with tracker.get_tracker().context(tracking_context_name, tracking_context):
-                resp = instance.handle(handler, req, suffix)
+                # Coalesce the state the handler writes, so that each block it changes is saved once.
+                with write_behind():
+                    resp = instance.handle(handler, req, suffix)
                 if suffix == 'problem_check' \
                         and course \
                         and getattr(course, 'entrance_exam_enabled', False) \
@@ -0,0 +1,102 @@
+"""
+Signal handlers that keep the stored subsection grades of students up to date.
+
+Stored grades are deleted whenever they may have gone out of date, and are
+recalculated the next time they are needed.  Scores stored in StudentModule
+do so directly; see `courseware.model_data.set_score`.
+"""
+# pylint: disable=unused-argument
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from student.models import user_by_anonymous_id
+from submissions.models import score_set, score_reset
+
+from .grades import invalidate_persistent_grades, invalidate_persistent_grades_for_users, persistent_grades_enabled
+from .models import StudentModule
+
+log = logging.getLogger("edx.courseware")
+
+
+@receiver([score_set, score_reset])
+def _invalidate_persistent_grades_on_score_change(sender, **kwargs):
+    """
+    Consume the signals of the Submissions API that indicate a score change,
+    and delete the stored grades of the student in the course. See the
+    definitions of submissions.models.score_set and score_reset for a
+    description of the signals.
+    """
+    if not persistent_grades_enabled():
+        return
+
+    anonymous_user_id = kwargs.get('anonymous_user_id')
+    course_id = kwargs.get('course_id')
+    user = user_by_anonymous_id(anonymous_user_id) if anonymous_user_id else None
+    if None in (user, course_id):
+        log.error(
+            "Persistent grades: Required signal parameter is None. user: %s, course_id: %s",
+            user, course_id
+        )
+        return
+
+    try:
+        course_key = CourseKey.from_string(course_id)
+    except InvalidKeyError:
+        log.error("Persistent grades: Invalid course_id %s", course_id)
+        return
+
+    invalidate_persistent_grades(user.id, course_key)
+
+
+@receiver(post_delete, sender=StudentModule)
+def _invalidate_persistent_grades(sender, instance, **kwargs):
+    """
+    Deletes the stored grades of a student when any of their state in the
+    course is deleted, for example when an instructor deletes their state of
+    a problem, as the score it held no longer counts.
+    """
+    invalidate_persistent_grades(instance.student_id, instance.course_id)
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def _invalidate_persistent_grades_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Deletes the stored grades of students whose cohorts or other course
+    groups change, as the content they can see, and so their grades, may
+    depend on them.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear') or not persistent_grades_enabled():
+        return
+
+    if reverse:
+        # The groups of a user changed.
+        if action == 'pre_clear':
+            groups = instance.course_groups.all()
+        else:
+            groups = CourseUserGroup.objects.filter(pk__in=pk_set)
+        for course_key in set(groups.values_list('course_id', flat=True)):
+            invalidate_persistent_grades(instance.id, course_key)
+    else:
+        # The users of a group changed.
+        user_ids = instance.users.values_list('id', flat=True) if action == 'pre_clear' else pk_set
+        invalidate_persistent_grades_for_users(list(user_ids), instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=CourseUserGroupPartitionGroup)
+def _invalidate_persistent_grades_on_content_group_change(sender, instance, **kwargs):
+    """
+    Deletes the stored grades of the members of a cohort when the content
+    group it is linked to changes.
+    """
+    if not persistent_grades_enabled():
+        return
+
+    try:
+        cohort = instance.course_user_group
+    except CourseUserGroup.DoesNotExist:
+        return
+    invalidate_persistent_grades_for_users(list(cohort.users.values_list('id', flat=True)), cohort.course_id)
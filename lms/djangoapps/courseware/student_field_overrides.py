@@ -4,10 +4,18 @@ by the individual due dates feature.
 """
 import json
 
+from django.core.cache import cache
+
+import request_cache
+
 from .field_overrides import FieldOverrideProvider
 from .models import StudentFieldOverride
 
 
+HAS_OVERRIDES_CACHE_KEY = u'courseware.student_field_overrides.has_overrides.{course_id}'
+HAS_OVERRIDES_CACHE_TIMEOUT = 60 * 60
+
+
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
     """
     A concrete implementation of
@@ -43,19 +51,90 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    course_overrides = _get_course_overrides_for_user(user, block.runtime.course_id)
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, value in course_overrides.get(_location_key(block.location), {}).iteritems():
+        field = block.fields[name]
+        overrides[name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_course_overrides_for_user(user, course_id):
+    """
+    Gets all of the individual student overrides for given user in the
+    course, loading them with a single query the first time they are needed
+    in a request.  Returns a dictionary, keyed by location, of dictionaries
+    of the serialized override values keyed by field name.
+    """
+    overrides_cache = request_cache.get_cache('student-field-overrides')
+    if (course_id, user.id) not in overrides_cache:
+        prefetch_overrides_for_users(course_id, [user])
+    return overrides_cache[(course_id, user.id)]
+
+
+def prefetch_overrides_for_users(course_id, users):
+    """
+    Loads the individual student overrides of all of the given `users` in the
+    course with a single query, and caches them for the rest of the request.
+    Courses in which no overrides have been made don't need any query at all.
+    """
+    overrides_cache = request_cache.get_cache('student-field-overrides')
+    users_overrides = {user.id: {} for user in users}
+    if users_overrides and _course_has_overrides(course_id):
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_id,
+            student_id__in=users_overrides.keys(),
+        )
+        for override in query:
+            block_overrides = users_overrides[override.student_id].setdefault(_location_key(override.location), {})
+            block_overrides[override.field] = override.value
+
+    for user_id, overrides in users_overrides.iteritems():
+        overrides_cache[(course_id, user_id)] = overrides
+
+
+def _course_has_overrides(course_id):
+    """
+    Returns whether any individual student overrides have been made in the
+    course.  The answer is cached, and is set whenever an override is made.
+    """
+    cache_key = HAS_OVERRIDES_CACHE_KEY.format(course_id=course_id)
+    has_overrides = cache.get(cache_key)
+    if has_overrides is None:
+        has_overrides = StudentFieldOverride.objects.filter(course_id=course_id).exists()
+        # Only add the answer: an override made since the query above has
+        # already set the flag, and a stale False must not replace it.
+        cache.add(cache_key, has_overrides, HAS_OVERRIDES_CACHE_TIMEOUT)
+    return has_overrides
+
+
+def _location_key(location):
+    """
+    Returns the key that overrides of the block at `location` are cached
+    under: the same string that its location is stored as in the database.
+    """
+    return StudentFieldOverride._meta.get_field('location').get_prep_value(location)  # pylint: disable=protected-access
+
+
+def _update_cached_overrides(user, block, name, value):
+    """
+    Updates the overrides cached for the `user` after the override of the
+    field `name` of `block` has been set to the serialized `value`, or
+    cleared if `value` is None.
+    """
+    if user.id in getattr(block, '_student_overrides', {}):
+        del block._student_overrides[user.id]  # pylint: disable=protected-access
+
+    overrides_cache = request_cache.get_cache('student-field-overrides')
+    course_overrides = overrides_cache.get((block.runtime.course_id, user.id))
+    if course_overrides is not None:
+        block_overrides = course_overrides.setdefault(_location_key(block.location), {})
+        if value is None:
+            block_overrides.pop(name, None)
+        else:
+            block_overrides[name] = value
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -70,6 +149,8 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    cache.set(HAS_OVERRIDES_CACHE_KEY.format(course_id=block.runtime.course_id), True, HAS_OVERRIDES_CACHE_TIMEOUT)
+    _update_cached_overrides(user, block, name, override.value)
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +168,4 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    _update_cached_overrides(user, block, name, None)
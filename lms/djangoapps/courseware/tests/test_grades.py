@@ -11,25 +11,33 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
 
 from courseware.grades import (
+    calculate_subsection_grades,
     grade,
     iterate_grades_for,
+    _prefetch_scores_for_students,
     ProgressSummary,
     get_module_score
 )
 from courseware.module_render import get_module
 from courseware.model_data import FieldDataCache, set_score
+from courseware.models import PersistentCourseGrade
 from courseware.tests.helpers import (
     LoginEnrollmentTestCase,
     get_request_for_user
 )
+from course_blocks.api import get_course_blocks
+from instructor.enrollment import reset_student_attempts
+from openedx.core.djangoapps.content.block_structure.api import update_course_in_cache
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
+from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from student.tests.factories import UserFactory
-from student.models import CourseEnrollment
+from student.models import CourseEnrollment, anonymous_id_for_user, user_by_anonymous_id
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 
 
-def _grade_with_errors(student, course, keep_raw_scores=False):
+def _grade_with_errors(student, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -40,7 +48,7 @@ def _grade_with_errors(student, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 @attr('shard_1')
@@ -127,6 +135,24 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    @patch('courseware.grades.GRADING_BATCH_SIZE', 2)
+    def test_grades_batched(self):
+        """Scores are prefetched once per batch of students."""
+        with patch(
+            'courseware.grades._prefetch_scores_for_students', wraps=_prefetch_scores_for_students
+        ) as mock_prefetch:
+            all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students)
+        self.assertEqual(mock_prefetch.call_count, 3)
+        self.assertEqual(len(all_gradesets), 5)
+        self.assertEqual(len(all_errors), 0)
+
+    @patch('courseware.grades._prefetch_scores_for_students', MagicMock(side_effect=Exception()))
+    def test_prefetch_exception(self):
+        """If prefetching fails, the students are still graded one by one."""
+        all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students)
+        self.assertEqual(len(all_gradesets), 5)
+        self.assertEqual(len(all_errors), 0)
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -144,6 +170,179 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         return students_to_gradesets, students_to_errors
 
 
+@attr('shard_1')
+class TestBatchedGrades(SharedModuleStoreTestCase):
+    """
+    Test that grades computed by iterate_grades_for in batches match the grades
+    computed for each student individually.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestBatchedGrades, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        sequential = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        vertical = ItemFactory.create(parent=sequential, category='vertical')
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 3',
+            choices=[False, False, True, False],
+            choice_names=['choice_0', 'choice_1', 'choice_2', 'choice_3']
+        )
+        cls.problems = [
+            ItemFactory.create(parent=vertical, category='problem', data=problem_xml)
+            for __ in range(2)
+        ]
+
+    def setUp(self):
+        super(TestBatchedGrades, self).setUp()
+        self.students = [UserFactory.create() for __ in range(5)]
+        for index, student in enumerate(self.students):
+            CourseEnrollment.enroll(student, self.course.id)
+            for problem in self.problems[:index % 3]:
+                set_score(student.id, problem.location, index % 2, 1)
+
+    @patch('courseware.grades.GRADING_BATCH_SIZE', 2)
+    def test_batched_grades_match_individual_grades(self):
+        for student, gradeset, err_msg in iterate_grades_for(self.course, self.students, keep_raw_scores=True):
+            self.assertEqual(err_msg, "")
+            expected_gradeset = grade(student, self.course, keep_raw_scores=True)
+            self.assertEqual(gradeset['percent'], expected_gradeset['percent'])
+            self.assertEqual(gradeset['grade'], expected_gradeset['grade'])
+            self.assertEqual(
+                [(score.earned, score.possible) for score in gradeset['raw_scores']],
+                [(score.earned, score.possible) for score in expected_gradeset['raw_scores']],
+            )
+
+    def test_anonymous_ids_stored_after_grading(self):
+        list(iterate_grades_for(self.course, self.students))
+        for student in self.students:
+            anonymous_id = anonymous_id_for_user(student, self.course.id)
+            self.assertEqual(user_by_anonymous_id(anonymous_id), student)
+
+
+@attr('shard_1')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentGrades(SharedModuleStoreTestCase):
+    """
+    Test that grades computed from stored subsection grades match the grades
+    computed from every score, and that out of date stored grades are deleted.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestPersistentGrades, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 3',
+            choices=[False, False, True, False],
+            choice_names=['choice_0', 'choice_1', 'choice_2', 'choice_3']
+        )
+        cls.problems = []
+        for section_format in ('Homework', 'Homework', 'Exam'):
+            sequential = ItemFactory.create(parent=chapter, category='sequential', graded=True, format=section_format)
+            vertical = ItemFactory.create(parent=sequential, category='vertical')
+            cls.problems.append(ItemFactory.create(parent=vertical, category='problem', data=problem_xml))
+
+    def setUp(self):
+        super(TestPersistentGrades, self).setUp()
+        self.student = UserFactory.create()
+        CourseEnrollment.enroll(self.student, self.course.id)
+        set_score(self.student.id, self.problems[0].location, 1, 1)
+
+    def _set_score(self, problem, earned):
+        """
+        Sets the student's score on the problem.
+        """
+        set_score(self.student.id, problem.location, earned, 1)
+
+    def _assert_grade_matches_uncached_grade(self):
+        """
+        Asserts that the student's grade matches the one calculated from
+        every score.
+        """
+        gradeset = grade(self.student, self.course)
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': False}):
+            expected_gradeset = grade(self.student, self.course)
+        self.assertEqual(gradeset['percent'], expected_gradeset['percent'])
+        self.assertEqual(gradeset['section_breakdown'], expected_gradeset['section_breakdown'])
+
+    def test_grades_stored_on_first_use(self):
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student).exists())
+        self._assert_grade_matches_uncached_grade()
+        self.assertEqual(
+            PersistentCourseGrade.objects.get(user=self.student, course_id=self.course.id).get_subsection_grades(),
+            calculate_subsection_grades(self.student, self.course),
+        )
+
+    def _assert_grades_invalidated(self):
+        """
+        Asserts that the student has no stored grades, and that they are
+        recalculated correctly.
+        """
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student, course_id=self.course.id).exists())
+        self._assert_grade_matches_uncached_grade()
+
+    def test_grades_invalidated_on_score_change(self):
+        grade(self.student, self.course)
+        # Only the stored grades are deleted: the student isn't regraded.
+        with patch('courseware.grades.get_course_blocks') as mock_get_course_blocks:
+            self._set_score(self.problems[2], 1)
+            self._set_score(self.problems[0], 0)
+        self.assertFalse(mock_get_course_blocks.called)
+        self._assert_grades_invalidated()
+        self.assertEqual(
+            PersistentCourseGrade.objects.get(user=self.student, course_id=self.course.id).get_subsection_grades(),
+            calculate_subsection_grades(self.student, self.course),
+        )
+
+    def test_grades_invalidated_on_cohort_change(self):
+        grade(self.student, self.course)
+        cohort = CohortFactory(course_id=self.course.id, users=[self.student])
+        self._assert_grades_invalidated()
+
+        CourseUserGroupPartitionGroup.objects.create(course_user_group=cohort, partition_id=0, group_id=1)
+        self._assert_grades_invalidated()
+
+    def test_grades_recalculated_for_new_course_version(self):
+        grade(self.student, self.course)
+        persistent_grade = PersistentCourseGrade.objects.get(user=self.student, course_id=self.course.id)
+        # The stored grades are used for as long as the course is unchanged.
+        persistent_grade.set_subsection_grades([])
+        persistent_grade.save()
+        self.assertEqual(grade(self.student, self.course)['percent'], 0.0)
+
+        # Publishing the course collects its block structure afresh.
+        update_course_in_cache(self.course.id)
+        self._assert_grade_matches_uncached_grade()
+        self.assertGreater(grade(self.student, self.course)['percent'], 0.0)
+        self.assertNotEqual(
+            PersistentCourseGrade.objects.get(user=self.student, course_id=self.course.id).course_version,
+            persistent_grade.course_version,
+        )
+
+    def test_grades_updated_on_state_deleted(self):
+        grade(self.student, self.course)
+        reset_student_attempts(
+            self.course.id, self.student, self.problems[0].location, requesting_user=self.student, delete_module=True
+        )
+        self._assert_grade_matches_uncached_grade()
+        self.assertEqual(grade(self.student, self.course)['percent'], 0.0)
+
+    def test_iterate_grades_for_stored_grades(self):
+        grade(self.student, self.course)
+        other_student = UserFactory.create()
+        CourseEnrollment.enroll(other_student, self.course.id)
+        with patch('courseware.grades.get_course_blocks', wraps=get_course_blocks) as mock_get_course_blocks:
+            gradesets = {
+                student: gradeset
+                for student, gradeset, __ in iterate_grades_for(self.course, [self.student, other_student])
+            }
+        # The course blocks are only fetched for the student without stored grades.
+        self.assertEqual(mock_get_course_blocks.call_count, 1)
+        self.assertEqual(gradesets[self.student]['percent'], grade(self.student, self.course)['percent'])
+        self.assertEqual(gradesets[other_student]['percent'], 0.0)
+
+
 class TestFieldDataCacheScorableLocations(SharedModuleStoreTestCase):
     """
     Make sure we can filter the locations we pull back student state for via
@@ -0,0 +1,123 @@
+"""
+Benchmark of grading all the students of a course, comparing grading each
+student on their own with the batched grading of iterate_grades_for.
+
+The students, their enrollments and their scores are created in bulk, so that
+a course of thousands of students can be set up in reasonable time.  This is
+skipped on regular unittest runs; set the environment variable
+GRADES_PERF_TEST to run it.
+"""
+import os
+import time
+import unittest
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
+from courseware.grades import grade, iterate_grades_for
+from courseware.models import StudentModule
+from student.models import CourseEnrollment
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+# Number of students enrolled in the course.
+NUM_STUDENTS = 5000
+
+# Number of graded problems in the course, each in its own subsection.
+NUM_PROBLEMS = 10
+
+# Number of students whose grading queries are counted.
+QUERY_SAMPLE_SIZE = 100
+
+
+@unittest.skipUnless(os.environ.get('GRADES_PERF_TEST'), 'Grade iteration benchmark')
+class GradeIterationBenchmark(SharedModuleStoreTestCase):
+    """
+    Times grading every student of a course one at a time, as was done before
+    students were graded in batches, and with iterate_grades_for.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(GradeIterationBenchmark, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 3',
+            choices=[False, False, True, False],
+            choice_names=['choice_0', 'choice_1', 'choice_2', 'choice_3']
+        )
+        cls.problems = []
+        for __ in xrange(NUM_PROBLEMS):
+            sequential = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+            vertical = ItemFactory.create(parent=sequential, category='vertical')
+            cls.problems.append(ItemFactory.create(parent=vertical, category='problem', data=problem_xml))
+
+    def setUp(self):
+        super(GradeIterationBenchmark, self).setUp()
+        User.objects.bulk_create([
+            User(username='perf{}'.format(index), email='perf{}@example.com'.format(index))
+            for index in xrange(NUM_STUDENTS)
+        ])
+        self.students = list(User.objects.filter(username__startswith='perf').order_by('pk'))
+        CourseEnrollment.objects.bulk_create([
+            CourseEnrollment(user=student, course_id=self.course.id, mode='honor', is_active=True)
+            for student in self.students
+        ])
+        # Each student has answered a different number of the problems.
+        StudentModule.objects.bulk_create([
+            StudentModule(
+                student=student,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                module_type='problem',
+                state='{}',
+                grade=index % 2,
+                max_grade=1,
+            )
+            for index, student in enumerate(self.students)
+            for problem in self.problems[:index % (NUM_PROBLEMS + 1)]
+        ])
+
+    def _grade_individually(self, students):
+        """
+        Returns the gradesets of `students`, graded one at a time.
+        """
+        return [grade(student, self.course) for student in students]
+
+    def _grade_in_batches(self, students):
+        """
+        Returns the gradesets of `students`, graded by iterate_grades_for.
+        """
+        return [gradeset for __, gradeset, __ in iterate_grades_for(self.course, students)]
+
+    def _benchmark(self, description, grade_students):
+        """
+        Grades all the students with `grade_students`, and prints how long it
+        took, and how many queries grading the first QUERY_SAMPLE_SIZE of them
+        made.  Django only remembers the last few thousand queries, so the
+        queries can't be counted for all of the students.
+
+        Returns the gradesets, and the number of queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            grade_students(self.students[:QUERY_SAMPLE_SIZE])
+
+        start = time.time()
+        gradesets = grade_students(self.students)
+        duration = time.time() - start
+        print "{}: {} students in {:.1f}s, {:.1f} students/s, {} queries for {} students".format(
+            description, len(gradesets), duration, len(gradesets) / duration, len(queries), QUERY_SAMPLE_SIZE
+        )
+        return gradesets, len(queries)
+
+    def test_grade_iteration(self):
+        individual_gradesets, individual_queries = self._benchmark('One student at a time', self._grade_individually)
+        batched_gradesets, batched_queries = self._benchmark('iterate_grades_for', self._grade_in_batches)
+
+        self.assertEqual(
+            [gradeset['percent'] for gradeset in batched_gradesets],
+            [gradeset['percent'] for gradeset in individual_gradesets],
+        )
+        self.assertLess(batched_queries, individual_queries)
@@ -52,6 +52,59 @@ class StudentModuleFactory(cmfStudentModuleFactory):
     course_id = course_id
 
 
+@attr('shard_1')
+class TestDeferredScopes(TestCase):
+    """Tests for FieldDataCaches that only load some of the scopes up front"""
+    def setUp(self):
+        super(TestDeferredScopes, self).setUp()
+        prefs = StudentPrefsFactory.create()
+        self.user = prefs.student
+        self.mock_descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+        ])
+        with self.assertNumQueries(1):
+            self.field_data_cache = FieldDataCache(
+                [self.mock_descriptor], course_id, self.user, scopes=[Scope.user_state]
+            )
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_get_deferred_scope(self):
+        with self.assertNumQueries(1):
+            self.assertEquals('old_value', self.kvs.get(prefs_key('existing_field')))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.kvs.has(prefs_key('existing_field')))
+
+    def test_set_deferred_scope(self):
+        with self.assertNumQueries(2):
+            self.kvs.set(prefs_key('existing_field'), 'new_value')
+        self.assertEquals(1, XModuleStudentPrefsField.objects.all().count())
+        self.assertEquals('new_value', json.loads(XModuleStudentPrefsField.objects.all()[0].value))
+
+    def test_deferred_descriptors_loaded_in_one_batch(self):
+        with self.assertNumQueries(0):
+            self.field_data_cache.add_descriptors_to_cache([
+                mock_descriptor([mock_field(Scope.preferences, 'other_field')])
+            ])
+        with self.assertNumQueries(1):
+            self.assertEquals('old_value', self.kvs.get(prefs_key('existing_field')))
+
+    def test_rows_fetched_and_used(self):
+        StudentPrefsFactory.create(student=self.user, field_name='other_field')
+        descriptor = mock_descriptor([
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.preferences, 'other_field'),
+        ])
+        field_data_cache = FieldDataCache([descriptor], course_id, self.user, scopes=[])
+        self.assertEquals(0, field_data_cache.rows_fetched)
+
+        kvs = DjangoKeyValueStore(field_data_cache)
+        kvs.get(prefs_key('existing_field'))
+        self.assertTrue(kvs.has(prefs_key('existing_field')))
+        self.assertEquals(2, field_data_cache.rows_fetched)
+        self.assertEquals(1, field_data_cache.rows_used)
+
+
 @attr('shard_1')
 class TestInvalidScopes(TestCase):
     def setUp(self):
@@ -39,6 +39,7 @@ from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache, update_course_in_cache
 from openedx.core.lib.courses import course_image_url
 from openedx.core.lib.gating import api as gating_api
 from student.models import anonymous_id_for_user
@@ -514,6 +515,29 @@ class TestHandleXBlockCallback(SharedModuleStoreTestCase, LoginEnrollmentTestCas
         )
         self.assertIsInstance(response, HttpResponse)
 
+    def test_xmodule_dispatch_with_handler_needs(self):
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=course)
+        sequential = ItemFactory.create(category='sequential', parent=chapter)
+        ItemFactory.create(category='vertical', parent=sequential)
+        ItemFactory.create(category='vertical', parent=sequential)
+
+        request = self.request_factory.post('dummy_url', data={'position': 2})
+        request.user = self.mock_user
+        with patch.object(FieldDataCache, 'cache_for_descriptor_descendents') as mock_cache_descendents:
+            response = render.handle_xblock_callback(
+                request,
+                unicode(course.id),
+                quote_slashes(unicode(sequential.location)),
+                'xmodule_handler',
+                'goto_position',
+            )
+        self.assertEquals(response.status_code, 200)
+        # Only the sequential's own state was loaded to record its position.
+        self.assertFalse(mock_cache_descendents.called)
+        student_module = StudentModule.objects.get(student=self.mock_user, module_state_key=sequential.location)
+        self.assertEquals(json.loads(student_module.state)['position'], 2)
+
     def test_bad_course_id(self):
         request = self.request_factory.post('dummy_url')
         request.user = self.mock_user
@@ -635,6 +659,9 @@ class TestTOC(ModuleStoreTestCase):
                 self.field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
                     self.course_key, self.request.user, self.toy_course, depth=2
                 )
+        # The table of contents is read from the course's block structure,
+        # which is normally collected when the course is published.
+        get_course_in_cache(self.course_key)
 
     # Mongo makes 3 queries to load the course to depth 2:
     #     - 1 for the course
@@ -643,11 +670,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 5 queries to render the toc:
-    #     - it loads the active version at the start of the bulk operation
-    #     - it loads 4 definitions, because it instantiates 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 5))
+    # Neither makes any queries to render the toc, since it is read from the
+    # course's cached block structure.
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 0))
     @ddt.unpack
     def test_toc_toy_from_chapter(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -685,11 +710,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 5 queries to render the toc:
-    #     - it loads the active version at the start of the bulk operation
-    #     - it loads 4 definitions, because it instantiates 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 5))
+    # Neither makes any queries to render the toc, since it is read from the
+    # course's cached block structure.
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 0))
     @ddt.unpack
     def test_toc_toy_from_section(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -719,6 +742,48 @@ class TestTOC(ModuleStoreTestCase):
             self.assertEquals(actual['previous_of_active_section']['url_name'], 'Toy_Videos')
             self.assertEquals(actual['next_of_active_section']['url_name'], 'video_123456789012')
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_without_modules(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_request_and_course(setup_finds, setup_sends)
+            with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+                actual = render.toc_for_course(
+                    self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+                )
+            self.assertFalse(mock_get_module.called)
+            self.assertEquals(
+                [chapter['url_name'] for chapter in actual['chapters']],
+                [chapter.url_name for chapter in self.toy_course.get_children()]
+            )
+
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_skeleton_cached_by_version(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_request_and_course(setup_finds, setup_sends)
+            get_toc_skeleton = render._get_toc_skeleton  # pylint: disable=protected-access
+            toc_skeleton = get_toc_skeleton(get_course_in_cache(self.course_key))
+            self.assertIs(get_toc_skeleton(get_course_in_cache(self.course_key)), toc_skeleton)
+
+            update_course_in_cache(self.course_key)
+            new_toc_skeleton = get_toc_skeleton(get_course_in_cache(self.course_key))
+            self.assertIsNot(new_toc_skeleton, toc_skeleton)
+            self.assertEquals(new_toc_skeleton, toc_skeleton)
+
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_with_field_overrides(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_request_and_course(setup_finds, setup_sends)
+            with patch.object(OverrideFieldData, 'has_providers_for_course', return_value=True):
+                with patch('courseware.module_render.get_course_in_cache') as mock_get_course_in_cache:
+                    actual = render.toc_for_course(
+                        self.request.user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+                    )
+            self.assertFalse(mock_get_course_in_cache.called)
+            self.assertIn(self.chapter, [chapter['url_name'] for chapter in actual['chapters']])
+
 
 @attr('shard_1')
 @ddt.ddt
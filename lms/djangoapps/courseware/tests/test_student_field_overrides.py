@@ -0,0 +1,98 @@
+"""
+Tests for `student_field_overrides` module.
+"""
+import datetime
+
+from django.utils.timezone import utc
+from mock import patch
+from nose.plugins.attrib import attr
+
+from request_cache.middleware import RequestCache
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from ..student_field_overrides import (
+    HAS_OVERRIDES_CACHE_KEY,
+    HAS_OVERRIDES_CACHE_TIMEOUT,
+    clear_override_for_user,
+    get_override_for_user,
+    override_field_for_user,
+    prefetch_overrides_for_users,
+)
+
+
+@attr('shard_1')
+class TestStudentFieldOverrides(ModuleStoreTestCase):
+    """
+    Make sure individual student overrides are loaded in bulk.
+    """
+    def setUp(self):
+        super(TestStudentFieldOverrides, self).setUp()
+        self.due = datetime.datetime(2010, 5, 12, 2, 42, tzinfo=utc)
+        self.extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        self.course = CourseFactory.create()
+        self.blocks = [ItemFactory.create(due=self.due, parent=self.course) for __ in range(3)]
+        self.user = UserFactory.create()
+        self.other_user = UserFactory.create()
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def _reset_caches(self):
+        """
+        Forget the overrides cached for the request and on the blocks, as
+        would happen on the next request.
+        """
+        RequestCache.clear_request_cache()
+        for block in self.blocks:
+            block._student_overrides = {}  # pylint: disable=protected-access
+
+    def test_course_without_overrides(self):
+        with self.assertNumQueries(1):
+            for block in self.blocks:
+                self.assertIsNone(get_override_for_user(self.user, block, 'due'))
+
+    def test_overrides_loaded_once_per_course(self):
+        override_field_for_user(self.user, self.blocks[0], 'due', self.extended)
+        override_field_for_user(self.user, self.blocks[2], 'due', self.extended)
+        self._reset_caches()
+
+        # The course is known to have overrides, so only they are queried.
+        with self.assertNumQueries(1):
+            overrides = [get_override_for_user(self.user, block, 'due') for block in self.blocks]
+        self.assertEqual(overrides, [self.extended, None, self.extended])
+
+    def test_prefetch_overrides_for_users(self):
+        override_field_for_user(self.user, self.blocks[0], 'due', self.extended)
+        override_field_for_user(self.other_user, self.blocks[1], 'due', self.extended)
+        self._reset_caches()
+
+        with self.assertNumQueries(1):
+            prefetch_overrides_for_users(self.course.id, [self.user, self.other_user])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_override_for_user(self.user, self.blocks[0], 'due'), self.extended)
+            self.assertIsNone(get_override_for_user(self.user, self.blocks[1], 'due'))
+            self.assertIsNone(get_override_for_user(self.other_user, self.blocks[0], 'due'))
+            self.assertEqual(get_override_for_user(self.other_user, self.blocks[1], 'due'), self.extended)
+
+    def test_cached_overrides_updated(self):
+        block = self.blocks[0]
+        self.assertIsNone(get_override_for_user(self.user, block, 'due'))
+
+        override_field_for_user(self.user, block, 'due', self.extended)
+        self.assertEqual(get_override_for_user(self.user, block, 'due'), self.extended)
+
+        clear_override_for_user(self.user, block, 'due')
+        self.assertIsNone(get_override_for_user(self.user, block, 'due'))
+
+    @patch('courseware.student_field_overrides.cache')
+    def test_has_overrides_flag_only_added(self, mock_cache):
+        # The flag of a course that is not in the cache is only added, so
+        # that an override made meanwhile is not forgotten.
+        mock_cache.get.return_value = None
+        prefetch_overrides_for_users(self.course.id, [self.user])
+        cache_key = HAS_OVERRIDES_CACHE_KEY.format(course_id=self.course.id)
+        mock_cache.add.assert_called_once_with(cache_key, False, HAS_OVERRIDES_CACHE_TIMEOUT)
+        self.assertFalse(mock_cache.set.called)
+
+        override_field_for_user(self.user, self.blocks[0], 'due', self.extended)
+        mock_cache.set.assert_called_once_with(cache_key, True, HAS_OVERRIDES_CACHE_TIMEOUT)
@@ -6,11 +6,15 @@ defined in edx_user_state_client.
 from collections import defaultdict
 from unittest import skip
 
+from django.db import DatabaseError
 from django.test import TestCase
+from mock import patch
 
 from edx_user_state_client.tests import UserStateClientTestBase
-from courseware.user_state_client import DjangoXBlockUserStateClient
-from courseware.tests.factories import UserFactory
+from courseware.model_data import set_score
+from courseware.models import StudentModule
+from courseware.user_state_client import DjangoXBlockUserStateClient, write_behind
+from courseware.tests.factories import UserFactory, location
 
 
 class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
@@ -67,3 +71,90 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestWriteBehind(TestCase):
+    """
+    Tests of buffering the writes of the DjangoUserStateClient.
+    """
+    multi_db = True
+
+    def setUp(self):
+        super(TestWriteBehind, self).setUp()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user)
+        self.block_key = location('test_problem')
+
+    def _stored_state(self):
+        """
+        Return the stored state of the test block.
+        """
+        return self.client.get(self.user.username, self.block_key).state
+
+    def test_writes_coalesced(self):
+        with write_behind():
+            with self.assertNumQueries(0):
+                self.client.set(self.user.username, self.block_key, {'a_field': 1})
+                self.client.set(self.user.username, self.block_key, {'a_field': 2, 'other_field': 3})
+            self.assertFalse(StudentModule.objects.filter(module_state_key=self.block_key).exists())
+
+        self.assertEqual(self._stored_state(), {'a_field': 2, 'other_field': 3})
+
+    def test_one_history_row_per_block(self):
+        self.client.set(self.user.username, self.block_key, {'a_field': 1})
+        with write_behind():
+            self.client.set(self.user.username, self.block_key, {'a_field': 2})
+            self.client.set(self.user.username, self.block_key, {'a_field': 3})
+
+        self.assertEqual(len(list(self.client.get_history(self.user.username, self.block_key))), 2)
+
+    def test_read_saves_pending_state(self):
+        with write_behind():
+            self.client.set(self.user.username, self.block_key, {'a_field': 1})
+            self.assertEqual(self._stored_state(), {'a_field': 1})
+
+    def test_saved_with_score(self):
+        with write_behind():
+            self.client.set(self.user.username, self.block_key, {'a_field': 1})
+            set_score(self.user.id, self.block_key, 1, 2)
+            student_module = StudentModule.objects.get(module_state_key=self.block_key)
+            self.assertEqual(student_module.grade, 1)
+            self.assertEqual(self._stored_state(), {'a_field': 1})
+
+    def test_saved_on_error(self):
+        with self.assertRaises(ValueError):
+            with write_behind():
+                self.client.set(self.user.username, self.block_key, {'a_field': 1})
+                raise ValueError()
+
+        self.assertEqual(self._stored_state(), {'a_field': 1})
+
+    def test_buffer_cleared_when_save_fails(self):
+        other_block_key = location('other_problem')
+        save_state = DjangoXBlockUserStateClient.save_state
+
+        def save_state_failing_for_test_block(client, user, usage_key, state):
+            """
+            Fail to save the state of the test block only.
+            """
+            if usage_key == self.block_key:
+                raise DatabaseError()
+            return save_state(client, user, usage_key, state)
+
+        with patch.object(
+            DjangoXBlockUserStateClient, 'save_state', autospec=True, side_effect=save_state_failing_for_test_block
+        ):
+            with self.assertRaises(DatabaseError):
+                with write_behind():
+                    self.client.set(self.user.username, self.block_key, {'a_field': 1})
+                    self.client.set(self.user.username, other_block_key, {'a_field': 2})
+
+        # The state of the other block is saved nonetheless.
+        self.assertEqual(self.client.get(self.user.username, other_block_key).state, {'a_field': 2})
+
+        # Later writes of the thread are saved rather than left in the buffer.
+        self.client.set(self.user.username, self.block_key, {'a_field': 3})
+        self.assertTrue(StudentModule.objects.filter(module_state_key=self.block_key).exists())
+        with write_behind():
+            self.client.set(self.user.username, self.block_key, {'a_field': 4})
+        self.assertEqual(self._stored_state(), {'a_field': 4})
@@ -13,14 +13,16 @@ from HTMLParser import HTMLParser
 from nose.plugins.attrib import attr
 from freezegun import freeze_time
 
+import pymongo
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.http import Http404, HttpResponseBadRequest
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.client import Client
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from mock import MagicMock, patch, create_autospec, Mock
 from opaque_keys.edx.locations import Location, SlashSeparatedCourseKey
 from pytz import UTC
@@ -39,6 +41,7 @@ from certificates.tests.factories import (
 from commerce.models import CommerceConfiguration
 from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
+from courseware.field_overrides import OverrideFieldData
 from courseware.model_data import set_score
 from courseware.module_render import toc_for_course
 from courseware.testutils import RenderXBlockTestMixin
@@ -1876,6 +1879,55 @@ class TestIndexView(ModuleStoreTestCase):
         )
         self.assertIn("Activate Block ID: test_block_id", response.content)
 
+    def _count_queries(self, url):
+        """
+        Returns the numbers of SQL queries and Mongo reads made to render the
+        page at `url`.
+        """
+        with CaptureQueriesContext(connection) as sql_queries:
+            with patch.object(pymongo.message, 'query', wraps=pymongo.message.query) as mongo_query:
+                with patch.object(pymongo.message, 'get_more', wraps=pymongo.message.get_more) as mongo_get_more:
+                    response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(sql_queries), mongo_query.call_count + mongo_get_more.call_count
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_query_counts_with_toc_from_block_structure(self, default_store):
+        """
+        Verify that building the table of contents from the course's cached
+        block structure makes no more queries than building it from the
+        course's modules, as is still done for courses with field override
+        providers.
+        """
+        user = UserFactory()
+        with modulestore().default_store(default_store):
+            course = CourseFactory.create()
+            with self.store.bulk_operations(course.id):
+                for __ in range(2):
+                    chapter = ItemFactory.create(parent=course, category='chapter')
+                    for __ in range(2):
+                        section = ItemFactory.create(parent=chapter, category='sequential', graded=True)
+                        vertical = ItemFactory.create(parent=section, category='vertical')
+                        ItemFactory.create(parent=vertical, category='problem')
+
+        CourseEnrollmentFactory(user=user, course_id=course.id)
+        self.assertTrue(self.client.login(username=user.username, password='test'))
+        url = reverse(
+            'courseware_section',
+            kwargs={'course_id': unicode(course.id), 'chapter': chapter.url_name, 'section': section.url_name}
+        )
+        # The first request collects and caches the course's block structure.
+        self._count_queries(url)
+
+        block_structure_counts = self._count_queries(url)
+        with patch.object(OverrideFieldData, 'has_providers_for_course', return_value=True):
+            module_counts = self._count_queries(url)
+
+        sql_queries, mongo_reads = block_structure_counts
+        module_sql_queries, module_mongo_reads = module_counts
+        self.assertLessEqual(sql_queries, module_sql_queries)
+        self.assertLessEqual(mongo_reads, module_mongo_reads)
+
 
 @ddt.ddt
 class TestIndexViewWithVerticalPositions(ModuleStoreTestCase):
@@ -0,0 +1,48 @@
+"""
+Table of Contents Transformer
+"""
+from openedx.core.lib.block_structure.transformer import BlockStructureTransformer
+
+
+class TableOfContentsTransformer(BlockStructureTransformer):
+    """
+    The TableOfContentsTransformer collects the fields that are shown in
+    the courseware's table of contents, so that it can be drawn without
+    instantiating the course's chapters and sections.
+
+    No runtime transformations are performed.
+
+    The following values are stored as xblock_fields on their respective blocks in the
+    block structure:
+
+        display_name: (string)
+        format: (string) what type of section it is
+        due: (datetime) when the section is due
+        graded: (boolean)
+        hide_from_toc: (boolean) whether the block is left out of the table of contents
+        is_time_limited: (boolean) whether the section is a timed exam
+    """
+    VERSION = 1
+    FIELDS_TO_COLLECT = [u'display_name', u'format', u'due', u'graded', u'hide_from_toc', u'is_time_limited']
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return u'table_of_contents'
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
+
+    def transform(self, usage_info, block_structure):
+        """
+        Perform no transformations.
+        """
+        pass
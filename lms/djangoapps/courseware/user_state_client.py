@@ -4,6 +4,11 @@ data in a Django ORM model.
 """
 
 import itertools
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from operator import attrgetter
 from time import time
 
@@ -19,6 +24,93 @@ from courseware.models import StudentModule, BaseStudentModuleHistory
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
 
 
+log = logging.getLogger(__name__)
+
+_WRITE_BEHIND = threading.local()
+
+
+@contextmanager
+def write_behind():
+    """
+    Buffer the user state that is set through :class:`DjangoXBlockUserStateClient`s in this
+    thread until the context exits, and then save it with a single write per `StudentModule`.
+
+    Repeated writes to the state of the same block, for instance by a handler that saves a block
+    more than once, are merged into one UPDATE (and so one history row) this way. The state is
+    saved when the context exits whether or not it raised, and pending state is saved early by
+    any read of it through a client, and by `set_score`, so it is never read stale.
+
+    Since the buffered state is saved when the context exits, a failure to save it is raised
+    there, after the XBlock handler has returned, and as the original error rather than as a
+    `KeyValueMultiSaveError` from the XBlock's `save`. The state of every other block in the
+    buffer is still saved, and the first error is raised afterwards.
+    """
+    if getattr(_WRITE_BEHIND, 'pending', None) is not None:
+        # Writes are already being buffered by an enclosing context, which will save them.
+        yield
+        return
+
+    _WRITE_BEHIND.pending = OrderedDict()
+    try:
+        yield
+    finally:
+        # Detach the buffer before saving it, so that the writes of this thread are no longer
+        # buffered even if saving it fails.
+        pending, _WRITE_BEHIND.pending = _WRITE_BEHIND.pending, None
+        _save_pending_state(pending)
+
+
+def _save_pending_state(pending):
+    """
+    Save all of the state in the detached buffer `pending`. If the state of a block fails to
+    save, the state of the other blocks is saved nonetheless, and the first error is raised
+    once they all have been tried.
+    """
+    exc_info = None
+    for (__, usage_key), (user, state) in pending.iteritems():
+        try:
+            DjangoXBlockUserStateClient(user).save_state(user, usage_key, state)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Saving the state of %s for user %s failed", usage_key, user.username)
+            if exc_info is None:
+                exc_info = sys.exc_info()
+    if exc_info is not None:
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+
+def pop_pending_state(user_id, usage_key):
+    """
+    Remove the state that is waiting to be saved for the block `usage_key` of the user with id
+    `user_id`, and return it, or None if there is no such state.
+    """
+    pending = getattr(_WRITE_BEHIND, 'pending', None)
+    if not pending:
+        return None
+
+    pending_write = pending.pop((user_id, usage_key), None)
+    return pending_write[1] if pending_write is not None else None
+
+
+def flush_pending_state(username=None, block_keys=None):
+    """
+    Save the state that is waiting to be saved, optionally only for the user named `username`,
+    and only for the blocks in `block_keys`.
+    """
+    pending = getattr(_WRITE_BEHIND, 'pending', None)
+    if not pending:
+        return
+
+    block_keys = set(block_keys) if block_keys is not None else None
+    for (user_id, usage_key), (user, state) in pending.items():
+        if username is not None and user.username != username:
+            continue
+        if block_keys is not None and usage_key not in block_keys:
+            continue
+
+        del pending[(user_id, usage_key)]
+        DjangoXBlockUserStateClient(user).save_state(user, usage_key, state)
+
+
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
     An interface that uses the Django ORM StudentModule as a backend.
@@ -133,6 +225,8 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported, not {}".format(scope))
 
+        flush_pending_state(username, block_keys)
+
         block_count = state_length = 0
         evt_time = time()
 
@@ -180,6 +274,8 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 are overlaid over the stored state. To delete fields, use
                 :meth:`delete` or :meth:`delete_many`.
             scope (Scope): The scope to load data from
+
+        Within a :func:`write_behind` context, the state is saved when the context exits.
         """
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
@@ -198,57 +294,78 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        pending = getattr(_WRITE_BEHIND, 'pending', None)
+        if pending is not None:
+            for usage_key, state in block_keys_to_state.items():
+                __, pending_state = pending.setdefault((user.id, usage_key), (user, {}))
+                pending_state.update(state)
+            return
+
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
-            student_module, created = StudentModule.objects.get_or_create(
-                student=user,
-                course_id=usage_key.course_key,
-                module_state_key=usage_key,
-                defaults={
-                    'state': json.dumps(state),
-                    'module_type': usage_key.block_type,
-                },
-            )
+            self._save_state(user, usage_key, state, evt_time)
 
-            num_fields_before = num_fields_after = num_new_fields_set = len(state)
-            num_fields_updated = 0
-            if not created:
-                if student_module.state is None:
-                    current_state = {}
-                else:
-                    current_state = json.loads(student_module.state)
-                num_fields_before = len(current_state)
-                current_state.update(state)
-                num_fields_after = len(current_state)
-                student_module.state = json.dumps(current_state)
-                # We just read this object, so we know that we can do an update
-                student_module.save(force_update=True)
-
-            # The rest of this method exists only to submit DataDog events.
-            # Remove it once we're no longer interested in the data.
-            #
-            # Record whether a state row has been created or updated.
-            if created:
-                self._ddog_increment(evt_time, 'set_many.state_created')
+        # Events for the entire set_many call.
+        finish_time = time()
+        self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
+        self._ddog_histogram(evt_time, 'set_many.response_time', (finish_time - evt_time) * 1000)
+
+    def save_state(self, user, usage_key, state):
+        """
+        Immediately save the fields in `state` over the stored state of the block `usage_key`
+        for `user`.
+        """
+        self._save_state(user, usage_key, state, time())
+
+    def _save_state(self, user, usage_key, state, evt_time):
+        """
+        Save the fields in `state` over the stored state of the block `usage_key` for `user`,
+        and submit the DataDog events for the write.
+        """
+        student_module, created = StudentModule.objects.get_or_create(
+            student=user,
+            course_id=usage_key.course_key,
+            module_state_key=usage_key,
+            defaults={
+                'state': json.dumps(state),
+                'module_type': usage_key.block_type,
+            },
+        )
+
+        num_fields_before = num_fields_after = num_new_fields_set = len(state)
+        num_fields_updated = 0
+        if not created:
+            if student_module.state is None:
+                current_state = {}
             else:
-                self._ddog_increment(evt_time, 'set_many.state_updated')
+                current_state = json.loads(student_module.state)
+            num_fields_before = len(current_state)
+            current_state.update(state)
+            num_fields_after = len(current_state)
+            student_module.state = json.dumps(current_state)
+            # We just read this object, so we know that we can do an update
+            student_module.save(force_update=True)
 
-            # Event to record number of fields sent in to set/set_many.
-            self._ddog_histogram(evt_time, 'set_many.fields_in', len(state))
+        # The rest of this method exists only to submit DataDog events.
+        # Remove it once we're no longer interested in the data.
+        #
+        # Record whether a state row has been created or updated.
+        if created:
+            self._ddog_increment(evt_time, 'set_many.state_created')
+        else:
+            self._ddog_increment(evt_time, 'set_many.state_updated')
 
-            # Event to record number of new fields set in set/set_many.
-            num_new_fields_set = num_fields_after - num_fields_before
-            self._ddog_histogram(evt_time, 'set_many.fields_set', num_new_fields_set)
+        # Event to record number of fields sent in to set/set_many.
+        self._ddog_histogram(evt_time, 'set_many.fields_in', len(state))
 
-            # Event to record number of existing fields updated in set/set_many.
-            num_fields_updated = max(0, len(state) - num_new_fields_set)
-            self._ddog_histogram(evt_time, 'set_many.fields_updated', num_fields_updated)
+        # Event to record number of new fields set in set/set_many.
+        num_new_fields_set = num_fields_after - num_fields_before
+        self._ddog_histogram(evt_time, 'set_many.fields_set', num_new_fields_set)
 
-        # Events for the entire set_many call.
-        finish_time = time()
-        self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
-        self._ddog_histogram(evt_time, 'set_many.response_time', (finish_time - evt_time) * 1000)
+        # Event to record number of existing fields updated in set/set_many.
+        num_fields_updated = max(0, len(state) - num_new_fields_set)
+        self._ddog_histogram(evt_time, 'set_many.fields_updated', num_fields_updated)
 
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
@@ -271,6 +388,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         self._ddog_histogram(evt_time, 'delete_many.block_count', len(block_keys))
 
+        flush_pending_state(username, block_keys)
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
             if fields is None:
@@ -309,6 +427,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+        flush_pending_state(username, [block_key])
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -145,7 +145,9 @@ class CoursewareIndex(View):
                 self._save_positions()
                 self._prefetch_and_bind_section()
 
-        return render_to_response('courseware/courseware.html', self._create_courseware_context())
+        response = render_to_response('courseware/courseware.html', self._create_courseware_context())
+        self._add_field_data_cache_metrics()
+        return response
 
     def _redirect_if_not_requested_section(self):
         """
@@ -176,6 +178,13 @@ class CoursewareIndex(View):
         newrelic.agent.add_custom_parameter('course_id', unicode(self.course_key))
         newrelic.agent.add_custom_parameter('org', unicode(self.course_key.org))
 
+    def _add_field_data_cache_metrics(self):
+        """
+        Report how many of the student data rows that were fetched for the page were used to render it.
+        """
+        newrelic.agent.add_custom_parameter('field_data_cache.rows_fetched', self.field_data_cache.rows_fetched)
+        newrelic.agent.add_custom_parameter('field_data_cache.rows_used', self.field_data_cache.rows_used)
+
     def _clean_position(self):
         """
         Verify that the given position is an integer. If it is not positive, set it to 1.
@@ -330,8 +339,10 @@ class CoursewareIndex(View):
         Prefetches all descendant data for the requested section and
         sets up the runtime, which binds the request user to the section.
         """
+        # Student data is only loaded once the page reads it, one batch per scope, so
+        # the scopes that no block on the page reads are never queried.
         self.field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-            self.course_key, self.effective_user, self.course, depth=CONTENT_DEPTH,
+            self.course_key, self.effective_user, self.course, depth=CONTENT_DEPTH, scopes=[],
         )
 
         self.course = get_module_for_descriptor(
@@ -194,10 +194,13 @@ def inline_discussion(request, course_key, discussion_id):
 
     course = get_course_with_access(request.user, 'load', course_key, check_if_enrolled=True)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
 
     try:
-        threads, query_params = get_threads(request, course, discussion_id, per_page=INLINE_THREADS_PER_PAGE)
+        # The user info is fetched while the threads are.
+        (threads, query_params), user_info = cc.utils.perform_concurrently(
+            lambda: get_threads(request, course, discussion_id, per_page=INLINE_THREADS_PER_PAGE),
+            cc_user.to_dict,
+        )
     except ValueError:
         return HttpResponseBadRequest("Invalid group_id")
 
@@ -231,10 +234,13 @@ def forum_form_discussion(request, course_key):
     course_settings = make_course_settings(course, request.user)
 
     user = cc.User.from_django_user(request.user)
-    user_info = user.to_dict()
 
     try:
-        unsafethreads, query_params = get_threads(request, course)   # This might process a search query
+        # This might process a search query.  The user info is fetched while the threads are.
+        (unsafethreads, query_params), user_info = cc.utils.perform_concurrently(
+            lambda: get_threads(request, course),
+            user.to_dict,
+        )
         is_staff = has_permission(request.user, 'openclose_thread', course.id)
         threads = [utils.prepare_content(thread, course_key, is_staff) for thread in unsafethreads]
     except cc.utils.CommentClientMaintenanceError:
@@ -0,0 +1,45 @@
+"""
+Test the behavior of the DiscussionsTransformer
+"""
+from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.course_blocks.transformers.tests.helpers import CourseStructureTestCase
+from student.tests.factories import UserFactory
+
+from ..transformers.discussions import DiscussionsTransformer
+
+
+class DiscussionsTransformerTestCase(CourseStructureTestCase):
+    """
+    Verify behavior of the DiscussionsTransformer
+    """
+    TRANSFORMER_CLASS_TO_TEST = DiscussionsTransformer
+
+    def test_discussion_fields_collected(self):
+        blocks = self.build_course([
+            {
+                u'org': u'DiscussionsTestOrg',
+                u'course': u'DT101',
+                u'run': u'run',
+                u'#type': u'course',
+                u'#ref': u'course',
+                u'#children': [
+                    {
+                        u'#type': u'discussion',
+                        u'#ref': u'discussion',
+                        u'discussion_id': u'test_discussion_id',
+                        u'discussion_category': u'Chapter / Section',
+                        u'discussion_target': u'Discussion',
+                    }
+                ]
+            }
+        ])
+        user = UserFactory.create(is_staff=True)
+        block_structure = get_course_blocks(user, blocks[u'course'].location, self.transformers)
+        expected_fields = {
+            u'discussion_id': u'test_discussion_id',
+            u'discussion_category': u'Chapter / Section',
+            u'discussion_target': u'Discussion',
+        }
+        for field_name, value in expected_fields.iteritems():
+            self.assertEqual(block_structure.get_xblock_field(blocks[u'discussion'].location, field_name), value)
+            self.assertIsNone(block_structure.get_xblock_field(blocks[u'course'].location, field_name))
@@ -16,6 +16,7 @@ from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
 
 from courseware.tests.factories import InstructorFactory
+from request_cache.middleware import RequestCache
 from courseware.tabs import get_course_tab_list
 from openedx.core.djangoapps.course_groups import cohorts
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_settings
@@ -209,6 +210,8 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
     """
     def setUp(self):
         super(CachedDiscussionIdMapTestCase, self).setUp()
+        RequestCache.clear_request_cache()
+        self.addCleanup(RequestCache.clear_request_cache)
 
         self.course = CourseFactory.create(org='TestX', number='101', display_name='Test Course')
         self.discussion = ItemFactory.create(
@@ -318,6 +321,40 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'private_discussion_id'))
         self.assertFalse(utils.discussion_category_id_access(self.course, user, 'private_discussion_id'))
 
+    def test_course_structure_loaded_once_per_request(self):
+        with mock.patch.object(
+            CourseStructure.objects, 'get', wraps=CourseStructure.objects.get
+        ) as mock_get_course_structure:
+            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+            utils.get_cached_discussion_id_map(self.course, ['test_discussion_id', 'test_discussion_id_2'], self.user)
+            utils.discussion_category_id_access(self.course, self.user, 'private_discussion_id')
+        self.assertEqual(mock_get_course_structure.call_count, 1)
+
+    def test_course_blocks_transformed_once_per_request(self):
+        with mock.patch(
+            'django_comment_client.utils.get_course_blocks', wraps=utils.get_course_blocks
+        ) as mock_get_course_blocks:
+            self.verify_discussion_metadata()
+            self.verify_discussion_metadata()
+            self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'test_discussion_id'))
+        self.assertEqual(mock_get_course_blocks.call_count, 1)
+
+    def test_single_discussion_without_transforming_course(self):
+        with mock.patch(
+            'django_comment_client.utils.get_course_blocks', wraps=utils.get_course_blocks
+        ) as mock_get_course_blocks:
+            self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'test_discussion_id'))
+            metadata = utils.get_cached_discussion_id_map(self.course, ['test_discussion_id_2'], self.user)
+        self.assertFalse(mock_get_course_blocks.called)
+        self.assertEqual(metadata['test_discussion_id_2']['title'], 'Chapter 2 / Discussion 2')
+
+    def test_get_discussion_id_map_without_loading_xblocks(self):
+        with mock.patch.object(modulestore(), 'get_item', wraps=modulestore().get_item) as mock_get_item:
+            self.verify_discussion_metadata()
+        loaded_keys = [call_args[0][0] for call_args in mock_get_item.call_args_list]
+        self.assertNotIn(self.discussion.location, loaded_keys)
+        self.assertNotIn(self.discussion2.location, loaded_keys)
+
 
 class CategoryMapTestMixin(object):
     """
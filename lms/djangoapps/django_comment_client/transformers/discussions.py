@@ -0,0 +1,45 @@
+"""
+Discussions Transformer
+"""
+from openedx.core.lib.block_structure.transformer import BlockStructureTransformer
+
+
+class DiscussionsTransformer(BlockStructureTransformer):
+    """
+    The DiscussionsTransformer collects the fields that identify and title
+    discussion blocks, so that the discussion id map of a course can be
+    built from its block structure without loading the blocks.
+
+    No runtime transformations are performed.
+
+    The following values are stored as xblock_fields on their respective blocks in the
+    block structure:
+
+        discussion_id: (string) the id of the discussion's commentable
+        discussion_category: (string) the category of the discussion
+        discussion_target: (string) the name of the discussion within its category
+    """
+    VERSION = 1
+    FIELDS_TO_COLLECT = [u'discussion_id', u'discussion_category', u'discussion_target']
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return u'discussions'
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
+
+    def transform(self, usage_info, block_structure):
+        """
+        Perform no transformations.
+        """
+        pass
@@ -5,6 +5,7 @@ import logging
 from django.conf import settings
 
 import pytz
+import request_cache
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.db import connection
@@ -23,6 +24,8 @@ from edxmako import lookup_template
 
 from courseware import courses
 from courseware.access import has_access
+from course_blocks.api import get_course_blocks
+from django_comment_client.transformers.discussions import DiscussionsTransformer
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_course_cohorted
@@ -155,19 +158,83 @@ class DiscussionIdMapIsNotCached(Exception):
     pass
 
 
+def _get_cached_discussion_keys(course):
+    """
+    Returns the dict of discussion ids to usage keys of the discussion xblocks of course, as cached in its
+    CourseStructure. The cached map is only loaded and deserialized once per request. If the discussion id map is not
+    cached for course, raises a DiscussionIdMapIsNotCached exception.
+    """
+    discussion_keys_cache = request_cache.get_cache('django_comment_client.discussion_keys')
+    cached_mapping = discussion_keys_cache.get(course.id)
+    if cached_mapping is None:
+        try:
+            cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
+        except CourseStructure.DoesNotExist:
+            raise DiscussionIdMapIsNotCached()
+        if not cached_mapping:
+            raise DiscussionIdMapIsNotCached()
+        discussion_keys_cache[course.id] = cached_mapping
+    return cached_mapping
+
+
 def get_cached_discussion_key(course, discussion_id):
     """
     Returns the usage key of the discussion xblock associated with discussion_id if it is cached. If the discussion id
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
-        raise DiscussionIdMapIsNotCached()
+    return _get_cached_discussion_keys(course).get(discussion_id)
+
+
+def _get_discussion_course_blocks(course, user):
+    """
+    Returns the course's block structure for the user. It is transformed at most once per request for each user and
+    course, as transforming it is costly and some transformers have side effects.
+    """
+    course_blocks_cache = request_cache.get_cache('django_comment_client.course_blocks')
+    cache_key = (user.id, course.id)
+    if cache_key not in course_blocks_cache:
+        course_blocks_cache[cache_key] = get_course_blocks(user, course.location)
+    return course_blocks_cache[cache_key]
+
+
+def _get_cached_discussion_id_map(course, discussion_ids, user):
+    """
+    Returns a dict mapping discussion_ids to respective discussion xblock metadata if it is cached and visible to the
+    user. Access is checked against the course's block structure for the user rather than by loading each xblock,
+    unless a single discussion is requested and the block structure hasn't been needed yet in this request. If the
+    discussion id map is not cached for course, raises a DiscussionIdMapIsNotCached exception.
+    """
+    cached_mapping = _get_cached_discussion_keys(course)
+    keys = {discussion_id: cached_mapping.get(discussion_id) for discussion_id in set(discussion_ids)}
+    if not any(keys.itervalues()):
+        return {}
+
+    course_blocks_cache = request_cache.get_cache('django_comment_client.course_blocks')
+    if len(keys) == 1 and (user.id, course.id) not in course_blocks_cache:
+        # Loading a single xblock costs much less than transforming the whole course.
+        xblock = modulestore().get_item(keys.values()[0])
+        if not (has_required_keys(xblock) and has_access(user, 'load', xblock, course.id)):
+            return {}
+        return dict([get_discussion_id_map_entry(xblock)])
+
+    block_structure = _get_discussion_course_blocks(course, user)
+    entries = {}
+    for discussion_id, key in keys.iteritems():
+        if not key or key not in block_structure:
+            continue
+        fields = {
+            field_name: block_structure.get_xblock_field(key, field_name)
+            for field_name in DiscussionsTransformer.FIELDS_TO_COLLECT
+        }
+        if any(value is None for value in fields.itervalues()):
+            log.debug("Required keys not in discussion %s, leaving out of category map", key)
+            continue
+        entries[fields['discussion_id']] = {
+            "location": key,
+            "title": fields['discussion_category'].split("/")[-1].strip() + " / " + fields['discussion_target']
+        }
+    return entries
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -176,16 +243,7 @@ def get_cached_discussion_id_map(course, discussion_ids, user):
     user. If not, returns the result of get_discussion_id_map
     """
     try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            xblock = modulestore().get_item(key)
-            if not (has_required_keys(xblock) and has_access(user, 'load', xblock, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(xblock))
-        return dict(entries)
+        return _get_cached_discussion_id_map(course, discussion_ids, user)
     except DiscussionIdMapIsNotCached:
         return get_discussion_id_map(course, user)
 
@@ -399,10 +457,7 @@ def discussion_category_id_access(course, user, discussion_id, xblock=None):
         return True
     try:
         if not xblock:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                return False
-            xblock = modulestore().get_item(key)
+            return discussion_id in _get_cached_discussion_id_map(course, [discussion_id], user)
         return has_required_keys(xblock) and has_access(user, 'load', xblock, course.id)
     except DiscussionIdMapIsNotCached:
         return discussion_id in get_discussion_categories_ids(course, user)
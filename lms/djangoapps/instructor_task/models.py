@@ -17,10 +17,11 @@ import csv
 import json
 import hashlib
 import os.path
+from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 
 from openedx.core.storage import get_storage
@@ -178,10 +179,14 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows may be passed in as any iterable, including a generator, and
+    are written out as they are consumed, so the whole dataset never has to be
+    held in memory.
     """
+    # Reports smaller than this many bytes are buffered in memory before being
+    # stored; larger ones are spooled to a temporary file on disk.
+    SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -221,6 +226,47 @@ class ReportStore(object):
             yield [unicode(item).encode('utf-8') for item in row]
 
 
+class SpooledReportRows(object):
+    """
+    An append-only collection of report rows, such as the error rows of a
+    grade report, that are produced bit by bit while another report is being
+    written. Like the rows written by `ReportStore.store_rows`, they are kept
+    in csv format and spooled to a temporary file once they grow beyond
+    ReportStore.SPOOL_MAX_SIZE, so memory use stays bounded however many rows
+    there are.
+
+    Iterating over it yields the rows appended so far, each as a list of
+    unicode strings, so it can be passed to `ReportStore.store_rows`. Use it
+    as a context manager, so that the temporary file is removed afterwards.
+    """
+    def __init__(self):
+        self._buffer = SpooledTemporaryFile(max_size=ReportStore.SPOOL_MAX_SIZE)
+        self._writer = csv.writer(self._buffer)
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._buffer.close()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, row):
+        """
+        Adds `row`, an iterable of values, to the end of the rows.
+        """
+        self._buffer.seek(0, os.SEEK_END)
+        self._writer.writerow([unicode(item).encode('utf-8') for item in row])
+        self._count += 1
+
+    def __iter__(self):
+        self._buffer.seek(0)
+        for row in csv.reader(self._buffer):
+            yield [item.decode('utf-8') for item in row]
+
+
 class DjangoStorageReportStore(ReportStore):
     """
     ReportStore implementation that delegates to django's storage api.
@@ -263,12 +309,35 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` is consumed lazily, and the csv data is spooled to a temporary
+        file once it grows beyond SPOOL_MAX_SIZE, so memory use stays bounded
+        no matter how many rows there are. The file is only handed to the
+        storage backend once it is complete.
+        """
+        with SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as output_buffer:
+            csvwriter = csv.writer(output_buffer)
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+            output_file = File(output_buffer)
+            output_file.size = output_buffer.tell()
+            output_buffer.seek(0)
+            self.store(course_id, filename, output_file)
+
+    def read_rows(self, course_id, filename):
+        """
+        Given a course_id and filename, yield the rows of a csv file written
+        by `store_rows`, each as a list of unicode strings.
+        """
+        with self.storage.open(self.path_to(course_id, filename)) as input_file:
+            for row in csv.reader(input_file):
+                yield [item.decode('utf-8') for item in row]
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file named `filename` stored for the given course_id.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        self.storage.delete(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
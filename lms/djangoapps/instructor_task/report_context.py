@@ -0,0 +1,221 @@
+"""
+Bulk loading of the per-student data shown alongside grades in the
+instructor grade report.
+
+Looking this data up one student at a time takes several queries per
+report row; GradeReportContext instead fetches it for a whole batch of
+students in a fixed number of queries.
+"""
+from collections import defaultdict
+
+from course_modes.models import CourseMode
+from certificates.models import CertificateStatuses, GeneratedCertificate
+from lms.djangoapps.teams.models import CourseTeamMembership
+from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
+from openedx.core.djangoapps.course_groups.models import CohortMembership
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from student.models import CourseEnrollment, UserProfile
+from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
+
+
+class GradeReportContext(object):
+    """
+    Per-student report data for a batch of students in a course, fetched
+    with a fixed number of queries regardless of the number of students.
+
+    Each accessor returns exactly what the corresponding per-student lookup
+    used by the grade report would (e.g. `get_cohort`,
+    `CourseEnrollment.enrollment_mode_for_user` or
+    `certificate_info_for_user`), without assigning the students to cohorts
+    or partition groups they are not already in.
+    """
+    def __init__(
+            self,
+            course,
+            users,
+            experiment_partitions=(),
+            whitelisted_user_ids=(),
+            course_is_cohorted=False,
+    ):
+        """
+        Arguments:
+            course (CourseDescriptor): The course the report is for.
+            users (list): The User objects of the students in this batch.
+            experiment_partitions (list): The course's random-scheme user
+                partitions, whose groups are shown in the report.
+            whitelisted_user_ids (iterable): Ids of the users on the course's
+                certificate whitelist.
+            course_is_cohorted (bool): Whether cohort names are needed.
+        """
+        self.course_id = course.id
+        self.experiment_partitions = experiment_partitions
+        self.whitelisted_user_ids = set(whitelisted_user_ids)
+        user_ids = [user.id for user in users]
+
+        self._cohort_names = self._load_cohort_names(user_ids) if course_is_cohorted else {}
+        self._experiment_group_ids = self._load_experiment_group_ids(user_ids) if experiment_partitions else {}
+        self._team_names = self._load_team_names(user_ids) if course.teams_enabled else {}
+        self._enrollment_modes = self._load_enrollment_modes(user_ids)
+        self._verified_user_ids = self._load_verified_user_ids(user_ids)
+        self._certificates = self._load_certificates(user_ids)
+        self._allow_certificate = dict(
+            UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'allow_certificate')
+        )
+        self._course_mode_slugs = None
+
+    def _load_cohort_names(self, user_ids):
+        """
+        Returns a dict mapping user ids to the name of the user's cohort.
+        """
+        return dict(
+            CohortMembership.objects.filter(
+                course_id=self.course_id,
+                user_id__in=user_ids,
+            ).values_list('user_id', 'course_user_group__name')
+        )
+
+    def _load_experiment_group_ids(self, user_ids):
+        """
+        Returns a dict mapping (user id, partition key) pairs to the id of the
+        group the user is assigned to, as stored in the user's course tags.
+        """
+        partition_keys = [partition.scheme.key_for_partition(partition) for partition in self.experiment_partitions]
+        return {
+            (user_id, key): value
+            for user_id, key, value in UserCourseTag.objects.filter(
+                course_id=self.course_id,
+                user_id__in=user_ids,
+                key__in=partition_keys,
+            ).values_list('user_id', 'key', 'value')
+        }
+
+    def _load_team_names(self, user_ids):
+        """
+        Returns a dict mapping user ids to the name of the user's team.
+        """
+        return dict(
+            CourseTeamMembership.objects.filter(
+                user_id__in=user_ids,
+                team__course_id=self.course_id,
+            ).values_list('user_id', 'team__name')
+        )
+
+    def _load_enrollment_modes(self, user_ids):
+        """
+        Returns a dict mapping user ids to the mode of their enrollment.
+        """
+        return dict(
+            CourseEnrollment.objects.filter(
+                course_id=self.course_id,
+                user_id__in=user_ids,
+            ).values_list('user_id', 'mode')
+        )
+
+    def _load_verified_user_ids(self, user_ids):
+        """
+        Returns the set of ids of the users who have a valid, approved
+        identity verification, as SoftwareSecurePhotoVerification.user_is_verified
+        would determine for each of them.
+        """
+        # Only users in a verified mode are shown with a verification status.
+        user_ids = [
+            user_id for user_id in user_ids
+            if self._enrollment_modes.get(user_id) in CourseMode.VERIFIED_MODES
+        ]
+        if not user_ids:
+            return set()
+        # pylint: disable=protected-access
+        earliest_allowed_date = SoftwareSecurePhotoVerification._earliest_allowed_date()
+        return set(
+            SoftwareSecurePhotoVerification.objects.filter(
+                user_id__in=user_ids,
+                status="approved",
+                created_at__gte=earliest_allowed_date,
+            ).values_list('user_id', flat=True)
+        )
+
+    def _load_certificates(self, user_ids):
+        """
+        Returns a dict mapping user ids to the (status, mode) of the user's
+        generated certificate.
+        """
+        certificates = defaultdict(lambda: (CertificateStatuses.unavailable, GeneratedCertificate.MODES.honor))
+        certificates.update({
+            user_id: (status, mode)
+            for user_id, status, mode in GeneratedCertificate.objects.filter(
+                course_id=self.course_id,
+                user_id__in=user_ids,
+            ).values_list('user_id', 'status', 'mode')
+        })
+        return certificates
+
+    def _get_course_mode_slugs(self):
+        """
+        Returns the slugs of the course's modes, fetching them on first use.
+        """
+        if self._course_mode_slugs is None:
+            self._course_mode_slugs = [mode.slug for mode in CourseMode.modes_for_course(self.course_id)]
+        return self._course_mode_slugs
+
+    def cohort_name(self, user):
+        """
+        Returns the name of the user's cohort, or '' if they have none.
+        """
+        return self._cohort_names.get(user.id, '')
+
+    def experiment_group_names(self, user):
+        """
+        Returns the names of the user's groups in each of the experiment
+        partitions, in order, with '' for partitions they aren't assigned in.
+        """
+        group_names = []
+        for partition in self.experiment_partitions:
+            group_id = self._experiment_group_ids.get((user.id, partition.scheme.key_for_partition(partition)))
+            group = None
+            if group_id is not None:
+                try:
+                    group = partition.get_group(int(group_id))
+                except NoSuchUserPartitionGroupError:
+                    pass
+            group_names.append(group.name if group else '')
+        return group_names
+
+    def team_name(self, user):
+        """
+        Returns the name of the user's team, or '' if they have none.
+        """
+        return self._team_names.get(user.id, '')
+
+    def enrollment_mode(self, user):
+        """
+        Returns the mode of the user's enrollment, or None if they have none.
+        """
+        return self._enrollment_modes.get(user.id)
+
+    def verification_status(self, user):
+        """
+        Returns the user's verification status, as shown in the grade report.
+        """
+        if self.enrollment_mode(user) not in CourseMode.VERIFIED_MODES:
+            return 'N/A'
+        return 'ID Verified' if user.id in self._verified_user_ids else 'Not ID Verified'
+
+    def certificate_info(self, user, grade):
+        """
+        Returns the user's [eligible, delivered, type] certificate info, as
+        shown in the grade report.
+        """
+        user_is_whitelisted = user.id in self.whitelisted_user_ids
+        eligible_for_certificate = 'Y' if (
+            (user_is_whitelisted or grade is not None) and self._allow_certificate.get(user.id, False)
+        ) else 'N'
+
+        status, mode = self._certificates[user.id]
+        # Old audit certificates are not shown as downloadable in courses
+        # without an honor mode; see certificate_status_for_student.
+        if mode == 'audit' and 'honor' not in self._get_course_mode_slugs():
+            status = CertificateStatuses.auditing
+
+        if status == CertificateStatuses.downloadable:
+            return [eligible_for_certificate, 'Y', mode]
+        return [eligible_for_certificate, 'N', 'N/A']
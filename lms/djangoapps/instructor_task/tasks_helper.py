@@ -5,12 +5,14 @@ running state of a course.
 """
 import json
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, islice
 from time import time
+from uuid import uuid4
 import unicodecsv
 import logging
 
@@ -34,13 +36,13 @@ from survey.models import SurveyAnswer
 from track.views import task_track
 from util.db import outer_atomic
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
+from util.query import iterate_in_pk_batches
 from xblock.runtime import KvsFieldData
 from xmodule.modulestore.django import modulestore
 from xmodule.split_test_module import get_split_user_partitions
 from django.utils.translation import ugettext as _
 from certificates.models import (
     CertificateWhitelist,
-    certificate_info_for_user,
     CertificateStatuses,
     GeneratedCertificate
 )
@@ -58,16 +60,20 @@ from instructor_analytics.basic import (
 )
 from instructor_analytics.csvs import format_dictlist
 from openassessment.data import OraAggregateData
-from instructor_task.models import ReportStore, InstructorTask, PROGRESS
-from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort
+from instructor_task.models import ReportStore, InstructorTask, PROGRESS, SpooledReportRows
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    all_subtasks_completed,
+    check_subtask_is_valid,
+    initialize_subtask_info,
+    update_subtask_status,
+)
+from instructor_task.report_context import GradeReportContext
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
 from student.models import CourseEnrollment, CourseAccessRole
-from lms.djangoapps.teams.models import CourseTeamMembership
-from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 
 # define different loggers for use within tasks and on client side
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -83,6 +89,9 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# The number of students whose per-student grade report columns are fetched together.
+GRADE_REPORT_BATCH_SIZE = 100
+
 
 class BaseInstructorTask(Task):
     """
@@ -611,6 +620,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows will do; a generator lets the rows be
+            written out as they are produced rather than held in memory.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -653,7 +664,127 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def _grade_report_header(section_labels, course_is_cohorted, experiment_partitions, teams_enabled):
+    """
+    Returns the header row of a grade report whose grade columns are
+    `section_labels`.
+    """
+    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
+    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+    teams_header = ['Team Name'] if teams_enabled else []
+    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+    return (
+        ["id", "email", "username", "grade"] + section_labels + cohorts_header +
+        group_configs_header + teams_header +
+        ['Enrollment Track', 'Verification Status'] + certificate_info_header
+    )
+
+
+def _generate_grade_report_rows(  # pylint: disable=too-many-statements
+        course, students, task_progress, err_rows, task_info_string, action_name
+):
+    """
+    Grades `students` in `course`, yielding the grade report's header row
+    followed by the CSV row for each student who was graded successfully.
+
+    An error row is appended to `err_rows` for each student who could not be
+    graded, and `task_progress` is updated as the students are graded.
+    """
+    status_interval = 100
+    course_is_cohorted = is_course_cohorted(course.id)
+    teams_enabled = course.teams_enabled
+    experiment_partitions = get_split_user_partitions(course.user_partitions)
+
+    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course.id, whitelist=True)
+    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+
+    header = None
+    current_step = {'step': 'Calculating Grades'}
+    student_counter = 0
+    total_students = task_progress.total
+    TASK_LOG.info(
+        u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
+        task_info_string,
+        action_name,
+        current_step,
+        total_students
+    )
+    # The remaining columns of each row are fetched in bulk for each batch of graded students.
+    grade_results = iter(iterate_grades_for(course.id, students))
+    for grade_results_batch in iter(lambda: list(islice(grade_results, GRADE_REPORT_BATCH_SIZE)), []):
+        report_context = GradeReportContext(
+            course,
+            [student for student, __, __ in grade_results_batch],
+            experiment_partitions=experiment_partitions,
+            whitelisted_user_ids=whitelisted_user_ids,
+            course_is_cohorted=course_is_cohorted,
+        )
+        for student, gradeset, err_msg in grade_results_batch:
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            student_counter += 1
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                student_counter,
+                total_students
+            )
+
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                if not header:
+                    header = [section['label'] for section in gradeset[u'section_breakdown']]
+                    yield _grade_report_header(header, course_is_cohorted, experiment_partitions, teams_enabled)
+
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
+
+                cohorts_group_name = [report_context.cohort_name(student)] if course_is_cohorted else []
+                group_configs_group_names = report_context.experiment_group_names(student)
+                team_name = [report_context.team_name(student)] if teams_enabled else []
+                enrollment_mode = report_context.enrollment_mode(student)
+                verification_status = report_context.verification_status(student)
+                certificate_info = report_context.certificate_info(student, gradeset['grade'])
+
+                # Not everybody has the same gradable items. If the item is not
+                # found in the user's gradeset, just assume it's a 0. The aggregated
+                # grades for their sections and overall course will be calculated
+                # without regard for the item they didn't have access to, so it's
+                # possible for a student to have a 0.0 show up in their row but
+                # still have 100% for the course.
+                row_percents = [percents.get(label, 0.0) for label in header]
+                yield (
+                    [student.id, student.email, student.username, gradeset['percent']] +
+                    row_percents + cohorts_group_name + group_configs_group_names + team_name +
+                    [enrollment_mode] + [verification_status] + certificate_info
+                )
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
+
+    TASK_LOG.info(
+        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+        task_info_string,
+        action_name,
+        current_step,
+        student_counter,
+        total_students
+    )
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name, shard_task=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -662,15 +793,32 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    Students are fetched in batches, and rows are generated lazily as they
+    are graded and streamed out to the report file, as are the error rows of
+    students who could not be graded, so memory use does not grow with the
+    number of students.
+
+    If a `shard_task` is given and more than
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK students are enrolled, the
+    students are instead split into shards that are graded in parallel by
+    `shard_task` subtasks; see `upload_grades_csv_shard`.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    if shard_task is not None and total_enrolled_students > settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK:
+        return _queue_grade_report_shards(
+            shard_task,
+            _xmodule_instance_args,
+            _entry_id,
+            action_name,
+            enrolled_students,
+            total_enrolled_students,
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -682,141 +830,278 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
     course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    teams_enabled = course.teams_enabled
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-    teams_header = ['Team Name'] if teams_enabled else []
+    with SpooledReportRows() as err_rows:
+        err_rows.append(["id", "username", "error_msg"])
+
+        # Grade the students and stream their rows out to the report as we go.
+        grade_rows = _generate_grade_report_rows(
+            course,
+            iterate_in_pk_batches(enrolled_students, GRADE_REPORT_BATCH_SIZE),
+            task_progress,
+            err_rows,
+            task_info_string,
+            action_name,
+        )
+        upload_csv_to_report_store(grade_rows, 'grade_report', course_id, start_date)
 
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+        current_step = {'step': 'Uploading CSVs'}
+        task_progress.update_task_state(extra_meta=current_step)
+        TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+        # If there are any error rows (don't count the header), write them out as well
+        if len(err_rows) > 1:
+            upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
 
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
-        task_info_string,
+
+def _queue_grade_report_shards(
+        shard_task,
+        xmodule_instance_args,
+        entry_id,
         action_name,
-        current_step,
+        enrolled_students,
+        total_enrolled_students,
+):
+    """
+    Splits the enrolled students into shards of at most
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK students, and queues a
+    `shard_task` subtask to grade each of them.
 
-        total_enrolled_students
-    )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    The shards are built before the subtasks are recorded, so that the number
+    of subtasks the report waits for is always the number queued, even if
+    enrollments change meanwhile.
 
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
-        TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-            task_info_string,
-            action_name,
-            current_step,
-            student_counter,
-            total_enrolled_students
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, if the subtasks have already been queued by an
+    # earlier run of this task, don't queue a second set of them.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(
+            u"Task %s has already queued its grade report shards! InstructorTask = %s", entry.task_id, entry
         )
+        return json.loads(entry.task_output)
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + teams_header +
-                    ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
+    student_ids = list(enrolled_students.values_list('pk', flat=True))
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    # The shards are numbered in enrollment order, so they can be merged
+    # back in that same order.
+    shards = [student_ids[index:index + students_per_task] for index in range(0, len(student_ids), students_per_task)]
+    subtask_id_list = [str(uuid4()) for __ in shards]
 
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
+    TASK_LOG.info(
+        u"Task %s: queueing %s grade report shards of %s students, out of %s counted.",
+        entry.task_id,
+        len(shards),
+        len(student_ids),
+        total_enrolled_students,
+    )
+    # Make sure this is committed to database before handing off subtasks to celery.
+    with outer_atomic():
+        progress = initialize_subtask_info(entry, action_name, len(student_ids), subtask_id_list)
+
+    for shard_index, (subtask_id, shard_student_ids) in enumerate(zip(subtask_id_list, shards)):
+        subtask_status = SubtaskStatus.create(subtask_id)
+        shard_task.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                shard_index,
+                shard_student_ids,
+                subtask_status.to_dict(),
+            ),
+            task_id=subtask_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        ).apply_async()
+
+    if not shards:
+        # Everyone unenrolled meanwhile, so no shard will complete the report.
+        _merge_grade_report_shards(InstructorTask.objects.get(pk=entry_id))
+    return progress
+
+
+def _grade_report_shard_filename(entry, report_name, shard_index):
+    """
+    Returns the name under which a shard of a sharded grade report stores
+    its partial `report_name` report. Partial reports are kept in a
+    subdirectory, so they are not listed alongside the finished reports.
+    """
+    return u"partial/{task_id}/{report_name}_{shard_index:05d}.csv".format(
+        task_id=entry.task_id,
+        report_name=report_name,
+        shard_index=shard_index,
+    )
 
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
 
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
+def upload_grades_csv_shard(
+        _xmodule_instance_args,
+        entry_id,
+        shard_index,
+        student_ids,
+        subtask_status_dict,
+        action_name,
+):
+    """
+    Grades one shard of the students of a grade report queued by
+    `upload_grades_csv`, and stores its rows as a partial report, headed by
+    the shard's own header row.
 
-            team_name = []
-            if teams_enabled:
-                try:
-                    membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
-                    team_name.append(membership.team.name)
-                except CourseTeamMembership.DoesNotExist:
-                    team_name.append('')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
+    The subtask that completes the last outstanding shard then merges the
+    partial reports into the final report; see `_merge_grade_report_shards`.
+
+    Returns the subtask's status, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Shard: {shard_index}'
+    task_info_string = fmt.format(
+        task_id=current_task_id,
+        entry_id=entry_id,
+        course_id=course_id,
+        shard_index=shard_index,
+    )
+    TASK_LOG.info(u'%s, Task type: %s, Starting grade report shard', task_info_string, action_name)
+
+    task_progress = TaskProgress(action_name, len(student_ids), time())
+    try:
+        # Keep the students in the order they were queued in.
+        students_by_id = User.objects.in_bulk(student_ids)
+        students = [students_by_id[student_id] for student_id in student_ids if student_id in students_by_id]
+
+        course = get_course_by_id(course_id)
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        with SpooledReportRows() as err_rows:
+            report_store.store_rows(
                 course_id,
-                enrollment_mode
+                _grade_report_shard_filename(entry, 'grade_report', shard_index),
+                _generate_grade_report_rows(course, students, task_progress, err_rows, task_info_string, action_name),
             )
-            certificate_info = certificate_info_for_user(
-                student,
+            report_store.store_rows(
                 course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
+                _grade_report_shard_filename(entry, 'grade_report_err', shard_index),
+                err_rows,
             )
+    except Exception:
+        # Count all of the shard's students as failed, so the counts stay
+        # consistent, and let the last shard to finish fail the report.
+        TASK_LOG.exception(u'%s, Task type: %s, Grade report shard failed', task_info_string, action_name)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        entry = update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False)
+        if all_subtasks_completed(entry):
+            _merge_grade_report_shards(entry)
+        raise
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=len(student_ids) - task_progress.attempted,
+        state=SUCCESS,
+    )
+    entry = update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False)
+    TASK_LOG.info(u'%s, Task type: %s, Finished grade report shard', task_info_string, action_name)
+    if all_subtasks_completed(entry):
+        _merge_grade_report_shards(entry)
+    return subtask_status.to_dict()
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names + team_name +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
+
+def _merge_grade_report_shards(entry):
+    """
+    Concatenates the partial reports stored by the shards of a sharded grade
+    report, in enrollment order, into the final grade report and error
+    report, then deletes them and marks the InstructorTask `entry` as done.
+
+    If any of the shards failed, or the merge itself fails, no report is
+    uploaded and the task is marked as failed instead.
+    """
+    course_id = entry.course_id
+    subtask_dict = json.loads(entry.subtasks)
+    task_progress = json.loads(entry.task_output)
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    grade_filenames = [
+        _grade_report_shard_filename(entry, 'grade_report', shard_index)
+        for shard_index in range(subtask_dict['total'])
+    ]
+    err_filenames = [
+        _grade_report_shard_filename(entry, 'grade_report_err', shard_index)
+        for shard_index in range(subtask_dict['total'])
+    ]
+
+    try:
+        if subtask_dict['failed'] > 0:
+            message = u"{failed} of {total} grade report shards failed".format(**subtask_dict)
+            TASK_LOG.error(u'Task: %s, InstructorTask ID: %s, %s', entry.task_id, entry.id, message)
+            entry.task_output = InstructorTask.create_output_for_failure(ValueError(message), None)
+            entry.task_state = FAILURE
         else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            start_date = datetime.fromtimestamp(task_progress['start_time'], UTC)
+            course = get_course_by_id(course_id)
+            upload_csv_to_report_store(
+                _merged_grade_report_rows(course, report_store, grade_filenames), 'grade_report', course_id, start_date
+            )
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+            err_rows = chain.from_iterable(report_store.read_rows(course_id, filename) for filename in err_filenames)
+            first_err_row = next(err_rows, None)
+            if first_err_row is not None:
+                upload_csv_to_report_store(
+                    chain([["id", "username", "error_msg"], first_err_row], err_rows),
+                    'grade_report_err',
+                    course_id,
+                    start_date,
+                )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+            task_progress['duration_ms'] = int((time() - task_progress['start_time']) * 1000)
+            entry.task_output = InstructorTask.create_output_for_success(task_progress)
+            entry.task_state = SUCCESS
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u'Task: %s, InstructorTask ID: %s, Failed to merge grade report', entry.task_id, entry.id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+    finally:
+        for filename in grade_filenames + err_filenames:
+            report_store.delete(course_id, filename)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+    entry.save_now()
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+def _merged_grade_report_rows(course, report_store, grade_filenames):
+    """
+    Yields the header row of the merged grade report of `course`, followed by
+    the rows of each of the partial reports `grade_filenames`.
+
+    Each shard takes the grade columns of its partial report from the first
+    student it graded, which may differ between shards, as not every student
+    has the same gradable items.  The header is written once, with the grade
+    columns of the first shard, and the rows of any other shard are mapped
+    onto those columns by label, as `_generate_grade_report_rows` does for
+    each student.
+    """
+    course_is_cohorted = is_course_cohorted(course.id)
+    experiment_partitions = get_split_user_partitions(course.user_partitions)
+    num_other_columns = len(_grade_report_header([], course_is_cohorted, experiment_partitions, course.teams_enabled))
+    header_labels = None
+    for filename in grade_filenames:
+        rows = report_store.read_rows(course.id, filename)
+        shard_header = next(rows, None)
+        if shard_header is None:
+            continue
+        # The grade columns follow the "id", "email", "username" and "grade" columns.
+        labels = shard_header[4:len(shard_header) - num_other_columns + 4]
+        if header_labels is None:
+            header_labels = labels
+            yield _grade_report_header(header_labels, course_is_cohorted, experiment_partitions, course.teams_enabled)
+        for row in rows:
+            if labels != header_labels:
+                percents = dict(zip(labels, row[4:4 + len(labels)]))
+                row = row[:4] + [percents.get(label, 0.0) for label in header_labels] + row[4 + len(labels):]
+            yield row
 
 
 def _order_problems(blocks):
@@ -928,51 +1213,64 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
-    # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
-    error_rows = [list(header_row.values()) + ['error_msg']]
+    error_rows = SpooledReportRows()
+    error_rows.append(list(header_row.values()) + ['error_msg'])
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
+    def problem_grade_rows():
+        """
+        Grades all of our students, yielding the CSV rows one at a time. The
+        header row is only yielded once a student has been successfully graded.
+        """
+        header_yielded = False
+        students = iterate_in_pk_batches(enrolled_students, GRADE_REPORT_BATCH_SIZE)
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
+            student_fields = [getattr(student, field_name) for field_name in header_row]
+            task_progress.attempted += 1
 
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                error_rows.append(student_fields + [err_msg])
+                task_progress.failed += 1
+                continue
 
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
+            if not header_yielded:
+                header_yielded = True
+                yield list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
+            yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-    # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+
+    # Perform the upload if any students have been successfully graded, by
+    # which point the remaining students are graded as their rows are written.
+    with error_rows:
+        rows = problem_grade_rows()
+        first_row = next(rows, None)
+        if first_row is not None:
+            upload_csv_to_report_store(chain([first_row], rows), 'problem_grade_report', course_id, start_date)
+        # If there are any error rows, write them out as well
+        if len(error_rows) > 1:
+            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
 
     return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
@@ -1031,13 +1329,9 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
     total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -1046,86 +1340,95 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def enrollment_rows():
+        """
+        Gathers the enrollment data of all of our students, yielding the CSV
+        rows one at a time.
+        """
+        header = None
+        student_counter = 0
+        for student in students_in_course:
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
 
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
+
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+            task_progress.succeeded += 1
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
+    # Gather the students' data and stream their rows out to the report as we go.
+    upload_csv_to_report_store(
+        enrollment_rows(), 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS'
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
@@ -11,7 +11,7 @@ from django.test import SimpleTestCase, override_settings
 from mock import patch
 
 from common.test.utils import MockS3Mixin
-from instructor_task.models import ReportStore
+from instructor_task.models import ReportStore, SpooledReportRows
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -49,6 +49,40 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    @patch('instructor_task.models.ReportStore.SPOOL_MAX_SIZE', 16)
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() writes out all the rows of a
+        generator, including when they spill over to a temporary file.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row{}'.format(index), u'caf\xe9'] for index in range(100))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv')) as report_file:
+            report_lines = report_file.read().splitlines()
+        self.assertEqual(len(report_lines), 100)
+        self.assertEqual(report_lines[0], u'row0,caf\xe9'.encode('utf-8'))
+        self.assertEqual(report_lines[-1], u'row99,caf\xe9'.encode('utf-8'))
+
+    def test_read_rows_and_delete(self):
+        """
+        Test that ReportStore.read_rows() returns the rows written by
+        ReportStore.store_rows(), and that files in subdirectories can be
+        deleted without being listed in links_for().
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [u'1', u'caf\xe9'], [u'2', u'line\nbreak']]
+        report_store.store_rows(self.course_id, 'partial/report.csv', rows)
+
+        self.assertEqual(list(report_store.read_rows(self.course_id, 'partial/report.csv')), rows)
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete(self.course_id, 'partial/report.csv')
+        self.assertFalse(
+            report_store.storage.exists(report_store.path_to(self.course_id, 'partial/report.csv'))
+        )
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -112,3 +146,25 @@ class DjangoStorageReportStoreS3TestCase(MockS3Mixin, ReportStoreTestMixin, Test
             connection = boto.connect_s3()
             connection.create_bucket(settings.GRADES_DOWNLOAD['STORAGE_KWARGS']['bucket'])
             return ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+
+class SpooledReportRowsTestCase(SimpleTestCase):
+    """
+    Test the SpooledReportRows collection of report rows.
+    """
+    @patch('instructor_task.models.ReportStore.SPOOL_MAX_SIZE', 16)
+    def test_append_and_iterate(self):
+        """
+        Test that the rows appended are returned in order, including after
+        they spill over to a temporary file and when more are appended after
+        iterating over them.
+        """
+        with SpooledReportRows() as rows:
+            self.assertEqual(len(rows), 0)
+            rows.append(['id', 'error_msg'])
+            rows.append([1, u'caf\xe9'])
+            self.assertEqual(list(rows), [[u'id', u'error_msg'], [u'1', u'caf\xe9']])
+
+            rows.append([2, u'line\nbreak'])
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(list(rows)[1:], [[u'1', u'caf\xe9'], [u'2', u'line\nbreak']])
@@ -0,0 +1,128 @@
+"""
+Tests for instructor_task/report_context.py.
+"""
+from certificates.models import CertificateStatuses, certificate_info_for_user
+from certificates.tests.factories import GeneratedCertificateFactory
+from course_modes.models import CourseMode
+from instructor_task.report_context import GradeReportContext
+from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
+from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
+from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, get_cohort
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
+from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
+import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
+from student.models import CourseEnrollment
+from student.tests.factories import CourseEnrollmentFactory, UserFactory
+from teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.partitions.partitions import Group, UserPartition
+
+
+class TestGradeReportContext(ModuleStoreTestCase):
+    """
+    Test that GradeReportContext fetches the same data as the per-student
+    lookups, with a number of queries that does not depend on the number of
+    students.
+    """
+    def setUp(self):
+        super(TestGradeReportContext, self).setUp()
+        self.partition = UserPartition(
+            0,
+            'Experiment',
+            'An experiment',
+            [Group(0, 'Group A'), Group(1, 'Group B')],
+            scheme_id='random'
+        )
+        self.course = CourseFactory.create(
+            user_partitions=[self.partition],
+            teams_configuration={
+                'max_size': 5, 'topics': [{'topic-id': 'topic', 'name': 'Topic', 'description': 'A Topic'}]
+            },
+        )
+        config_course_cohorts(self.course, is_cohorted=True)
+        self.cohort = CohortFactory(course_id=self.course.id, name='Cohort')
+        self.team = CourseTeamFactory.create(course_id=self.course.id)
+
+    def _create_students(self, count):
+        """
+        Creates `count` students with a variety of report data.
+        """
+        students = []
+        for index in range(count):
+            mode = 'verified' if index % 2 else 'honor'
+            student = UserFactory.create()
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id, mode=mode)
+            if index % 2:
+                add_user_to_cohort(self.cohort, student.username)
+                CourseTeamMembershipFactory.create(team=self.team, user=student)
+                course_tag_api.set_course_tag(
+                    student, self.course.id, RandomUserPartitionScheme.key_for_partition(self.partition), index % 2
+                )
+                SoftwareSecurePhotoVerificationFactory.create(user=student, status='approved')
+                GeneratedCertificateFactory.create(
+                    user=student, course_id=self.course.id, status=CertificateStatuses.downloadable, mode=mode
+                )
+            students.append(student)
+        return students
+
+    def _create_context(self, students):
+        """
+        Returns a GradeReportContext for the given students.
+        """
+        return GradeReportContext(
+            self.course,
+            students,
+            experiment_partitions=[self.partition],
+            course_is_cohorted=True,
+        )
+
+    def test_matches_per_student_lookups(self):
+        students = self._create_students(4)
+        report_context = self._create_context(students)
+
+        for student in students:
+            cohort = get_cohort(student, self.course.id, assign=False)
+            self.assertEqual(report_context.cohort_name(student), cohort.name if cohort else '')
+
+            group_id = course_tag_api.get_course_tag(
+                student, self.course.id, RandomUserPartitionScheme.key_for_partition(self.partition)
+            )
+            self.assertEqual(
+                report_context.experiment_group_names(student),
+                [self.partition.get_group(int(group_id)).name if group_id is not None else '']
+            )
+
+            self.assertEqual(
+                report_context.team_name(student),
+                self.team.name if self.team.membership.filter(user=student).exists() else ''
+            )
+
+            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, self.course.id)[0]
+            self.assertEqual(report_context.enrollment_mode(student), enrollment_mode)
+            self.assertEqual(
+                report_context.verification_status(student),
+                SoftwareSecurePhotoVerification.verification_status_for_user(student, self.course.id, enrollment_mode)
+            )
+
+            for grade in (None, 'Pass'):
+                self.assertEqual(
+                    report_context.certificate_info(student, grade),
+                    certificate_info_for_user(student, self.course.id, grade, False)
+                )
+
+    def test_query_count_independent_of_students(self):
+        # cohorts, course tags, teams, enrollments, verifications,
+        # certificates and profiles are each fetched in a single query
+        for count in (2, 6):
+            students = self._create_students(count)
+            with self.assertNumQueries(7):
+                self._create_context(students)
+
+    def test_no_verified_students(self):
+        students = [UserFactory.create() for __ in range(3)]
+        for student in students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id, mode=CourseMode.HONOR)
+        with self.assertNumQueries(6):
+            report_context = self._create_context(students)
+        self.assertEqual(report_context.verification_status(students[0]), 'N/A')
@@ -18,7 +18,7 @@ from functools import partial
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
 
-from courseware.models import StudentModule
+from courseware.models import PersistentCourseGrade, StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
@@ -459,6 +459,16 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                                           student=student,
                                           module_state_key=self.location)
 
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+    def test_delete_invalidates_persistent_grades(self):
+        num_students = 2
+        students = self._create_students_with_state(num_students)
+        for student in students:
+            PersistentCourseGrade.save_subsection_grades(student.id, self.course.id, [], 'version')
+        self._test_run_with_task(delete_problem_state, 'deleted', num_students)
+        # The stored grades included the deleted scores, so they must be recalculated.
+        self.assertFalse(PersistentCourseGrade.objects.filter(course_id=self.course.id).exists())
+
 
 class TestCertificateGenerationnstructorTask(TestInstructorTasks):
     """Tests instructor task that generates student certificates."""
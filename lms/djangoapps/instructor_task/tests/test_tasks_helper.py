@@ -8,12 +8,15 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 from datetime import datetime
 import urllib
+from uuid import uuid4
 
 import ddt
+from celery.states import FAILURE, SUCCESS
 from freezegun import freeze_time
 from mock import Mock, patch
 from nose.plugins.attrib import attr
@@ -45,7 +48,9 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_grades_csv_shard
+from instructor_task.tests.factories import InstructorTaskFactory
 from survey.models import SurveyForm, SurveyAnswer
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
@@ -65,6 +70,7 @@ from instructor_task.tasks_helper import (
 from instructor_analytics.basic import UNAVAILABLE
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
 from teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
+from util.file import course_filename_prefix_generator
 
 
 class InstructorGradeReportTestCase(TestReportMixin, InstructorTaskCourseTestCase):
@@ -307,6 +313,155 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
 
+@patch('instructor_task.tasks_helper._get_current_task')
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+class TestShardedGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports for large courses are generated by subtasks
+    that each grade a shard of the students.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _grade_students(self, _course_id, students):
+        """
+        Stands in for `iterate_grades_for`, failing to grade 'student3'.
+        """
+        for student in students:
+            if student.username == 'student3':
+                yield student, {}, 'Cannot grade student'
+            else:
+                gradeset = {'section_breakdown': [{'label': 'HW 01', 'percent': 0.5}], 'percent': 0.5, 'grade': None}
+                yield student, gradeset, ''
+
+    def _get_report_rows(self, report_name):
+        """
+        Returns the rows of the named report uploaded for the course.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        report_csv_filename = next(
+            filename for filename, __ in report_store.links_for(self.course.id)
+            if filename.startswith(u'{}_{}_'.format(course_filename_prefix_generator(self.course.id), report_name))
+        )
+        report_path = report_store.path_to(self.course.id, report_csv_filename)
+        with report_store.storage.open(report_path) as csv_file:
+            return list(unicodecsv.reader(csv_file))
+
+    def test_sharded_grade_report(self, _mock_current_task):
+        with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=self._grade_students):
+            upload_grades_csv(
+                None, self.entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard
+            )
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset(
+            {'total': 5, 'attempted': 5, 'succeeded': 4, 'failed': 1}, json.loads(entry.task_output)
+        )
+        self.assertDictContainsSubset({'total': 3, 'succeeded': 3, 'failed': 0}, json.loads(entry.subtasks))
+
+        # The shards' rows are merged in enrollment order, under a single header.
+        grade_rows = self._get_report_rows('grade_report')
+        self.assertEqual(grade_rows[0][:5], ['id', 'email', 'username', 'grade', 'HW 01'])
+        self.assertEqual(
+            [row[2] for row in grade_rows[1:]],
+            [student.username for student in self.students if student.username != 'student3']
+        )
+        self.assertEqual(
+            self._get_report_rows('grade_report_err'),
+            [['id', 'username', 'error_msg'], [unicode(self.students[3].id), 'student3', 'Cannot grade student']]
+        )
+
+        # Only the merged reports are left behind.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 2)
+        __, partial_filenames = report_store.storage.listdir(
+            report_store.path_to(self.course.id, u'partial/{}'.format(self.entry.task_id))
+        )
+        self.assertEqual(partial_filenames, [])
+
+    def test_shards_with_different_grade_columns(self, _mock_current_task):
+        def grade_students(_course_id, students):
+            """
+            Grades the students of later shards on an extra homework, listed first.
+            """
+            for student in students:
+                if student.username in ('student0', 'student1'):
+                    section_breakdown = [{'label': 'HW 01', 'percent': 0.5}]
+                else:
+                    section_breakdown = [{'label': 'HW 02', 'percent': 1.0}, {'label': 'HW 01', 'percent': 0.25}]
+                yield student, {'section_breakdown': section_breakdown, 'percent': 0.5, 'grade': None}, ''
+
+        with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=grade_students):
+            upload_grades_csv(
+                None, self.entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard
+            )
+
+        # The header is written once, and every row has the grade columns of the first shard.
+        grade_rows = self._get_report_rows('grade_report')
+        self.assertEqual(grade_rows[0][:6], ['id', 'email', 'username', 'grade', 'HW 01', 'Enrollment Track'])
+        self.assertEqual([row[4] for row in grade_rows[1:]], ['0.5', '0.5', '0.25', '0.25', '0.25'])
+        self.assertEqual(set(len(row) for row in grade_rows), {len(grade_rows[0])})
+
+    def test_enrollments_changed_while_queueing(self, _mock_current_task):
+        # Two more students are enrolled after the students are counted.
+        for index in range(5, 7):
+            self.create_student(u'student{}'.format(index))
+        counted_students = Mock(wraps=CourseEnrollment.objects.users_enrolled_in(self.course.id))
+        counted_students.count.return_value = 5
+
+        with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=self._grade_students):
+            with patch(
+                'instructor_task.tasks_helper.CourseEnrollment.objects.users_enrolled_in',
+                return_value=counted_students,
+            ):
+                upload_grades_csv(
+                    None, self.entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard
+                )
+
+        # The report waits for every shard that was queued, rather than the number counted.
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'total': 7, 'attempted': 7}, json.loads(entry.task_output))
+        self.assertDictContainsSubset({'total': 4, 'succeeded': 4, 'failed': 0}, json.loads(entry.subtasks))
+        self.assertEqual(len(self._get_report_rows('grade_report')), 7)
+
+    def test_failed_shard(self, _mock_current_task):
+        def grade_students(course_id, students):
+            """
+            Fails to grade the shard containing 'student3' altogether.
+            """
+            if any(student.username == 'student3' for student in students):
+                raise Exception('Grading failed')
+            return self._grade_students(course_id, students)
+
+        with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=grade_students):
+            upload_grades_csv(
+                None, self.entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard
+            )
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], '1 of 3 grade report shards failed')
+        self.assertEqual(ReportStore.from_config(config_name='GRADES_DOWNLOAD').links_for(self.course.id), [])
+
+    def test_small_course_not_sharded(self, _mock_current_task):
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=5):
+            result = upload_grades_csv(
+                None, self.entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard
+            )
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, result)
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).subtasks, '')
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
@@ -359,6 +359,10 @@ FEATURES = {
     # making multiple queries.
     'ENABLE_READING_FROM_MULTIPLE_HISTORY_TABLES': True,
 
+    # Store each student's subsection grades until their scores change, so
+    # that course grades can be computed without recalculating every score.
+    'ENABLE_PERSISTENT_GRADES': False,
+
     # WIP -- will be removed in Ticket #TNL-4750.
     'ENABLE_TIME_ZONE_PREFERENCE': False,
 }
@@ -743,6 +747,30 @@ MODULESTORE = {
     }
 }
 
+# The maximum total size, in bytes, of the course structures kept in the
+# memory of each process, in addition to the 'course_structure_cache' cache.
+# 0 disables this cache.
+COURSE_STRUCTURE_PROCESS_CACHE_SIZE = 0
+
+# The maximum total number of blocks in the collected block structures kept
+# in the memory of each process, in addition to the 'default' cache.  0
+# disables this cache.
+BLOCK_STRUCTURES_PROCESS_CACHE_SIZE = 0
+
+# The maximum total number of blocks in the transformed block structures
+# kept in the memory of each process, to be reused for users whose
+# transforms have the same signatures.  0 disables this cache.
+TRANSFORMED_BLOCK_STRUCTURES_PROCESS_CACHE_SIZE = 0
+
+# The maximum total size, in bytes, of the course assets kept in the memory of each
+# process, in addition to the 'course_assets' cache.  0 disables this cache.
+COURSE_ASSETS_PROCESS_CACHE_SIZE = 0
+
+# The maximum total number of blocks of the split modulestore course
+# structures whose indexes are kept in the memory of each process.  0
+# disables this cache.
+STRUCTURE_INDEX_PROCESS_CACHE_SIZE = 500000
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -1804,6 +1832,10 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections that each bulk email subtask sends email on
+# concurrently.  The delay above applies to each connection separately.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2334,6 +2366,10 @@ BADGR_TIMEOUT = 10
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Grade reports for courses with more students than this are split into
+# subtasks of at most this many students each, which are graded in parallel.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 5000
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
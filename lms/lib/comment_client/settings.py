@@ -6,3 +6,7 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# The maximum number of connections to the comments service that each process
+# keeps open for reuse.
+CONNECTION_POOL_SIZE = getattr(settings, "COMMENTS_SERVICE_CONNECTION_POOL_SIZE", 10)
@@ -1,15 +1,33 @@
 """" Common utilities for comment client wrapper """
 from contextlib import contextmanager
+from cookielib import DefaultCookiePolicy
 import dogstats_wrapper as dog_stats_api
 import logging
+import os
+import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.db import connection
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
+from lms.lib.comment_client.settings import CONNECTION_POOL_SIZE
+
 log = logging.getLogger(__name__)
 
+# The pooled session of the current process, along with the id of the process
+# that created it, since connections must not be shared with forked processes.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# Per-thread settings for the requests made by perform_concurrently's worker threads.
+_request_context = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -51,6 +69,104 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+class _RejectAllCookiesPolicy(DefaultCookiePolicy):
+    """
+    A cookie policy that neither stores nor returns any cookie.
+    """
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+def get_session():
+    """
+    Returns the requests.Session of the current process, whose pool of
+    keep-alive connections is shared by all the requests made to the
+    comments service.
+
+    Since the session serves the requests of all users, it keeps no
+    cookies, so that those set by the comments service in response to a
+    request made for one user are never sent with the requests of another.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                session.cookies.set_policy(_RejectAllCookiesPolicy())
+                adapter = HTTPAdapter(pool_maxsize=CONNECTION_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def send_request(method, url, **kwargs):
+    """
+    Sends a request to the comments service through the pooled session,
+    taking the same arguments as requests.request.
+    """
+    return get_session().request(method, url, **kwargs)
+
+
+def perform_concurrently(*calls):
+    """
+    Calls the given functions, which make independent requests to the
+    comments service, concurrently, and returns the list of their results.
+
+    The first function is called in the current thread, and the others in
+    worker threads, which must not access the database. The language and
+    the connection timeout of the current thread are used for the requests
+    made by the workers. If any of the functions raises an exception, the
+    exception of the first of them is raised once all of them are done.
+    """
+    # To avoid dependency conflict
+    from django_comment_common.models import ForumsConfig
+
+    language = get_language()
+    timeout = ForumsConfig.current().connection_timeout
+    results = [None] * len(calls)
+    exc_infos = [None] * len(calls)
+
+    def run(index):
+        """
+        Calls calls[index], recording its result or exception.
+        """
+        try:
+            results[index] = calls[index]()
+        except Exception:  # pylint: disable=broad-except
+            exc_infos[index] = sys.exc_info()
+
+    def run_in_worker(index):
+        """
+        Calls calls[index] with the settings of the calling thread.
+        """
+        if language:
+            translation.activate(language)
+        _request_context.timeout = timeout
+        try:
+            run(index)
+        finally:
+            translation.deactivate()
+            connection.close()
+
+    workers = [threading.Thread(target=run_in_worker, args=(index,)) for index in range(1, len(calls))]
+    for worker in workers:
+        worker.start()
+    if calls:
+        run(0)
+    for worker in workers:
+        worker.join()
+
+    for exc_info in exc_infos:
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+    return results
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
     # To avoid dependency conflict
@@ -79,14 +195,16 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        config = ForumsConfig.current()
-        response = requests.request(
+        timeout = getattr(_request_context, 'timeout', None)
+        if timeout is None:
+            timeout = ForumsConfig.current().connection_timeout
+        response = send_request(
             method,
             url,
             data=data,
             params=params,
             headers=headers,
-            timeout=config.connection_timeout
+            timeout=timeout
         )
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
@@ -1,11 +1,22 @@
 """
 Higher order functions built on the BlockStructureManager to interact with a django cache.
 """
+from django.conf import settings
 from django.core.cache import cache
 from openedx.core.lib.block_structure.manager import BlockStructureManager
+from openedx.core.lib.cache_utils import ProcessLRUCache
 from xmodule.modulestore.django import modulestore
 
 
+# The cache of deserialized block structures in the memory of this process,
+# created on first use; see get_process_cache.
+_PROCESS_CACHE = None
+
+# The cache of transformed block structures in the memory of this process,
+# created on first use; see get_transform_cache.
+_TRANSFORM_CACHE = None
+
+
 def get_course_in_cache(course_key):
     """
     A higher order function implemented on top of the
@@ -48,7 +59,13 @@ def get_block_structure_manager(course_key):
     """
     store = modulestore()
     course_usage_key = store.make_course_usage_key(course_key)
-    return BlockStructureManager(course_usage_key, store, get_cache())
+    return BlockStructureManager(
+        course_usage_key,
+        store,
+        get_cache(),
+        get_process_cache(),
+        get_transform_cache(),
+    )
 
 
 def get_cache():
@@ -56,3 +73,34 @@ def get_cache():
     Returns the storage for caching Block Structures.
     """
     return cache
+
+
+def get_process_cache():
+    """
+    Returns the cache for keeping Block Structures in the memory of this
+    process, or None if the BLOCK_STRUCTURES_PROCESS_CACHE_SIZE setting
+    does not enable it.
+    """
+    global _PROCESS_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'BLOCK_STRUCTURES_PROCESS_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+    if _PROCESS_CACHE is None or _PROCESS_CACHE.max_size != max_size:
+        _PROCESS_CACHE = ProcessLRUCache('block_structure.process_cache', max_size)
+    return _PROCESS_CACHE
+
+
+def get_transform_cache():
+    """
+    Returns the cache for keeping transformed Block Structures in the
+    memory of this process, or None if the
+    TRANSFORMED_BLOCK_STRUCTURES_PROCESS_CACHE_SIZE setting does not
+    enable it.
+    """
+    global _TRANSFORM_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'TRANSFORMED_BLOCK_STRUCTURES_PROCESS_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+    if _TRANSFORM_CACHE is None or _TRANSFORM_CACHE.max_size != max_size:
+        _TRANSFORM_CACHE = ProcessLRUCache('block_structure.transform_cache', max_size)
+    return _TRANSFORM_CACHE
@@ -38,6 +38,16 @@ class _BlockRelations(object):
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a copy of this object whose parents and children lists
+        can be mutated independently of this one.
+        """
+        relations_copy = _BlockRelations()
+        relations_copy.parents = list(self.parents)
+        relations_copy.children = list(self.children)
+        return relations_copy
+
 
 class BlockStructure(object):
     """
@@ -75,6 +85,19 @@ class BlockStructure(object):
     def __len__(self):
         return len(self._block_relations)
 
+    def copy(self):
+        """
+        Returns a copy of this block structure whose relations can be
+        mutated, for example by transformers, without affecting this
+        block structure.
+        """
+        structure_copy = self.__class__(self.root_block_usage_key)
+        structure_copy._block_relations = {  # pylint: disable=protected-access
+            usage_key: relations.copy()
+            for usage_key, relations in self._block_relations.iteritems()
+        }
+        return structure_copy
+
     #--- Block structure relation methods ---#
 
     def get_parents(self, usage_key):
@@ -320,12 +343,25 @@ class FieldData(object):
         """
         return field_name in self.class_field_names()
 
+    def _copy_fields_to(self, field_data_copy):
+        """
+        Copies this object's fields dict into the given FieldData.
+        Note that the field values themselves are shared, not copied.
+        """
+        field_data_copy.fields = dict(self.fields)
+        return field_data_copy
+
 
 class TransformerData(FieldData):
     """
     Data structure to encapsulate collected data for a transformer.
     """
-    pass
+    def copy(self):
+        """
+        Returns a copy of this TransformerData whose fields can be
+        updated independently of this one.
+        """
+        return self._copy_fields_to(TransformerData())
 
 
 class TransformerDataMap(dict):
@@ -359,7 +395,18 @@ class TransformerDataMap(dict):
             self[key] = new_transformer_data
             return new_transformer_data
 
-    def _translate_key(self, key):
+    def copy(self):
+        """
+        Returns a copy of this map, with a copy of each of its
+        TransformerData values.
+        """
+        map_copy = TransformerDataMap()
+        for key, transformer_data in self.iteritems():
+            dict.__setitem__(map_copy, key, transformer_data.copy())
+        return map_copy
+
+    @staticmethod
+    def _translate_key(key):
         """
         Allows the given key to be either the transformer's class or name,
         always returning the transformer's name.  This allows
@@ -390,6 +437,15 @@ class BlockData(FieldData):
         # Map of transformer name to its block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def copy(self):
+        """
+        Returns a copy of this BlockData whose fields and transformer
+        data can be updated independently of this one.
+        """
+        block_data_copy = self._copy_fields_to(BlockData(self.location))
+        block_data_copy.transformer_data = self.transformer_data.copy()
+        return block_data_copy
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -400,7 +456,7 @@ class BlockStructureBlockData(BlockStructure):
     # update this value whenever the data structure changes. Dependent storage
     # layers can then use this value when serializing/deserializing block
     # structures, and invalidating any previously cached/stored data.
-    VERSION = 1
+    VERSION = 2
 
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
@@ -413,11 +469,43 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Map of a transformer's name to its block-specific data that has
+        # been deserialized but not yet added to the blocks' BlockData.
+        # See _load_transformer_block_data.
+        # dict {string: serialization._TransformerBlockDataSection}
+        self._pending_transformer_block_data = {}
+
+        # Identifies the collected data of this block structure, as
+        # stored in the cache.  None if the structure wasn't cached.
+        self.collected_version = None
+
+    def copy(self):
+        """
+        Returns a copy of this block structure, including its block
+        and transformer data, that can be transformed without affecting
+        this block structure.
+
+        This is considerably cheaper than fetching and deserializing
+        the structure from the cache again, since the collected field
+        values themselves are shared rather than copied.
+        """
+        structure_copy = super(BlockStructureBlockData, self).copy()
+        structure_copy._block_data_map = {  # pylint: disable=protected-access
+            usage_key: block_data.copy()
+            for usage_key, block_data in self._block_data_map.iteritems()
+        }
+        structure_copy.transformer_data = self.transformer_data.copy()
+        # pylint: disable=protected-access
+        structure_copy._pending_transformer_block_data = dict(self._pending_transformer_block_data)
+        structure_copy.collected_version = self.collected_version
+        return structure_copy
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
         blocks in the BlockStructure.
         """
+        self._load_transformer_block_data()
         return self._block_data_map.iteritems()
 
     def itervalues(self):
@@ -425,12 +513,14 @@ class BlockStructureBlockData(BlockStructure):
         Returns iterator of BlockData for all blocks in the
         BlockStructure.
         """
+        self._load_transformer_block_data()
         return self._block_data_map.itervalues()
 
     def __getitem__(self, usage_key):
         """
         Returns the BlockData associated with the given key.
         """
+        self._load_transformer_block_data()
         return self._block_data_map.get(usage_key)
 
     def get_xblock_field(self, usage_key, field_name, default=None):
@@ -499,6 +589,7 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose dictionary data is requested.
         """
+        self._load_transformer_block_data(transformer)
         return self._block_data_map[usage_key].transformer_data[transformer]
 
     def get_transformer_block_field(self, usage_key, transformer, key, default=None):
@@ -544,6 +635,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        self._load_transformer_block_data(transformer)
         setattr(
             self._get_or_create_block(usage_key).transformer_data.get_or_create(transformer),
             key,
@@ -720,6 +812,35 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException('VERSION attribute is not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.VERSION)
 
+    def _load_transformer_block_data(self, transformer=None):
+        """
+        Adds the pending block-specific data of the given transformer, or
+        of all transformers if None, to the data of the blocks that are
+        still in the structure.
+
+        Arguments:
+            transformer (BlockStructureTransformer or string) - The
+                transformer, or the name of the transformer, whose
+                block-specific data is to be loaded.
+        """
+        if not self._pending_transformer_block_data:
+            return
+        if transformer is None:
+            transformer_names = self._pending_transformer_block_data.keys()
+        else:
+            transformer_names = [TransformerDataMap._translate_key(transformer)]  # pylint: disable=protected-access
+
+        for transformer_name in transformer_names:
+            section = self._pending_transformer_block_data.pop(transformer_name, None)
+            if section is None:
+                continue
+            for usage_key, fields in section.load().iteritems():
+                block_data = self._block_data_map.get(usage_key)
+                if block_data is not None:
+                    transformer_data = TransformerData()
+                    transformer_data.fields = dict(fields)
+                    dict.__setitem__(block_data.transformer_data, transformer_name, transformer_data)
+
     def _get_or_create_block(self, usage_key):
         """
         Returns the BlockData associated with the given usage_key.
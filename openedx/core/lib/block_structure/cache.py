@@ -1,12 +1,11 @@
 """
 Module for the Cache class for BlockStructure objects.
 """
-# pylint: disable=protected-access
 from logging import getLogger
+from uuid import uuid4
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
-
-from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData
+from .block_structure import BlockStructureBlockData
+from .serialization import deserialize_block_structure, serialize_block_structure
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -15,44 +14,64 @@ logger = getLogger(__name__)  # pylint: disable=C0103
 class BlockStructureCache(object):
     """
     Cache for BlockStructure objects.
+
+    Optionally, deserialized block structures are also kept in a cache in
+    the memory of the process, sized by their number of blocks.  Each
+    serialized block structure is stored along with a random stamp, which
+    is also stored under a separate key, so that a structure kept in memory
+    can be validated by fetching just the stamp.
     """
-    def __init__(self, cache):
+    # The length of the stamp at the start of the cached data.
+    STAMP_LENGTH = 32
+
+    def __init__(self, cache, process_cache=None):
         """
         Arguments:
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            process_cache (ProcessLRUCache) - The optional cache in which
+                deserialized block structures are kept in the memory of
+                the process, bounded by their total number of blocks.
         """
         self._cache = cache
+        self._process_cache = process_cache
 
     def add(self, block_structure):
         """
-        Store a compressed and pickled serialization of the given
-        block structure into the given cache.
+        Store a compressed serialization of the given block structure
+        into the given cache.
 
         The key in the cache is 'root.key.<root_block_usage_key>'.
         The data stored in the cache includes the structure's
-        block relations, transformer data, and block data.
+        block relations, transformer data, and block data, in the
+        format described in the serialization module.
 
         Arguments:
             block_structure (BlockStructure) - The block structure
                 that is to be serialized to the given cache.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        zp_data_to_cache = zpickle(data_to_cache)
+        zp_data_to_cache = serialize_block_structure(block_structure)
+        stamp = uuid4().hex
+        root_cache_key = self._encode_root_cache_key(block_structure.root_block_usage_key)
 
         # Set the timeout value for the cache to 1 day as a fail-safe
         # in case the signal to invalidate the cache doesn't come through.
         timeout_in_seconds = 60 * 60 * 24
         self._cache.set(
-            self._encode_root_cache_key(block_structure.root_block_usage_key),
-            zp_data_to_cache,
+            root_cache_key,
+            stamp + zp_data_to_cache,
             timeout=timeout_in_seconds,
         )
+        self._cache.set(
+            self._encode_stamp_cache_key(root_cache_key),
+            stamp,
+            timeout=timeout_in_seconds,
+        )
+        block_structure.collected_version = stamp
+        if self._process_cache is not None:
+            self._process_cache.delete(root_cache_key)
 
         logger.info(
             "Wrote BlockStructure %s to cache, size: %s",
@@ -80,8 +99,19 @@ class BlockStructureCache(object):
             NoneType - If the root_block_usage_key is not found in the cache.
         """
 
+        root_cache_key = self._encode_root_cache_key(root_block_usage_key)
+
+        # Use the block structure kept in memory if it's up to date.
+        if self._process_cache is not None:
+            stamp = self._cache.get(self._encode_stamp_cache_key(root_cache_key))
+            process_cache_entry = self._process_cache.get(root_cache_key)
+            if stamp is not None and process_cache_entry is not None and process_cache_entry[0] == stamp:
+                # Transformers modify the block structures they are given,
+                # so return a copy of the one kept in memory.
+                return process_cache_entry[1].copy()
+
         # Find root_block_usage_key in the cache.
-        zp_data_from_cache = self._cache.get(self._encode_root_cache_key(root_block_usage_key))
+        zp_data_from_cache = self._cache.get(root_cache_key)
         if not zp_data_from_cache:
             logger.info(
                 "Did not find BlockStructure %r in the cache.",
@@ -96,12 +126,21 @@ class BlockStructureCache(object):
             )
 
         # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
-        block_structure = BlockStructureModulestoreData(root_block_usage_key)
-        block_structure._block_relations = block_relations
-        block_structure.transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map
-
+        stamp = zp_data_from_cache[:self.STAMP_LENGTH]
+        block_structure = deserialize_block_structure(root_block_usage_key, zp_data_from_cache[self.STAMP_LENGTH:])
+        if block_structure is None:
+            logger.info(
+                "Ignored BlockStructure %r in the cache, serialized in an outdated format.",
+                root_block_usage_key,
+            )
+            return None
+        block_structure.collected_version = stamp
+        if self._process_cache is not None:
+            # The compressed size of the data says little about the memory
+            # used once it is deserialized, which grows with the number of
+            # blocks, so size the structure by that.
+            self._process_cache.set(root_cache_key, (stamp, block_structure), len(block_structure))
+            return block_structure.copy()
         return block_structure
 
     def delete(self, root_block_usage_key):
@@ -114,7 +153,11 @@ class BlockStructureCache(object):
                 of the block structure that is to be removed from
                 the cache.
         """
-        self._cache.delete(self._encode_root_cache_key(root_block_usage_key))
+        root_cache_key = self._encode_root_cache_key(root_block_usage_key)
+        self._cache.delete(root_cache_key)
+        self._cache.delete(self._encode_stamp_cache_key(root_cache_key))
+        if self._process_cache is not None:
+            self._process_cache.delete(root_cache_key)
         logger.info(
             "Deleted BlockStructure %r from the cache.",
             root_block_usage_key,
@@ -130,3 +173,11 @@ class BlockStructureCache(object):
             version=unicode(BlockStructureBlockData.VERSION),
             root_usage_key=unicode(root_block_usage_key),
         )
+
+    @classmethod
+    def _encode_stamp_cache_key(cls, root_cache_key):
+        """
+        Returns the cache key to use for storing the stamp of the block
+        structure stored under root_cache_key.
+        """
+        return root_cache_key + ".stamp"
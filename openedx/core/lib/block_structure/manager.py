@@ -15,7 +15,7 @@ class BlockStructureManager(object):
     Top-level class for managing Block Structures.
     """
 
-    def __init__(self, root_block_usage_key, modulestore, cache):
+    def __init__(self, root_block_usage_key, modulestore, cache, process_cache=None, transform_cache=None):
         """
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the root
@@ -28,19 +28,31 @@ class BlockStructureManager(object):
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache to use for storing/retrieving the block structure's
                 collected data.
+
+            process_cache (ProcessLRUCache) - The optional cache in which
+                to keep deserialized block structures in memory.
+
+            transform_cache (ProcessLRUCache) - The optional cache in
+                which to keep transformed block structures in memory,
+                keyed by the transformers' user signatures.  The size of
+                each entry is its number of blocks.
         """
         self.root_block_usage_key = root_block_usage_key
         self.modulestore = modulestore
-        self.block_structure_cache = BlockStructureCache(cache)
+        self.block_structure_cache = BlockStructureCache(cache, process_cache)
+        self.transform_cache = transform_cache
 
-    def get_transformed(self, transformers, starting_block_usage_key=None):
+    def get_transformed(self, transformers, starting_block_usage_key=None, collected_block_structure=None):
         """
         Returns the transformed Block Structure for the root_block_usage_key,
         starting at starting_block_usage_key, getting block data from the cache
         and modulestore, as needed.
 
         Details: Similar to the get_collected method, except the transformers'
-        transform methods are also called.
+        transform methods are also called.  If a transform_cache is used
+        and all the transformers have a user signature, the transformed
+        block structure is cached and reused for other usages with the
+        same signatures.
 
         Arguments:
             transformers (BlockStructureTransformers) - Collection of
@@ -50,23 +62,49 @@ class BlockStructureManager(object):
                 in the block structure that is to be transformed.
                 If None, root_block_usage_key is used.
 
+            collected_block_structure (BlockStructureBlockData) - A
+                previously collected block structure, as returned by
+                get_collected, to transform instead of fetching it from
+                the cache again.  It is copied, and so is left
+                unmodified.  This allows callers that transform the same
+                structure for many users to fetch it only once.
+
         Returns:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = self.get_collected()
+        if collected_block_structure is not None:
+            block_structure = collected_block_structure
+        else:
+            block_structure = self.get_collected()
+        if starting_block_usage_key and starting_block_usage_key not in block_structure:
+            raise UsageKeyNotInBlockStructure(
+                "The requested usage_key '{0}' is not found in the block_structure with root '{1}'",
+                unicode(starting_block_usage_key),
+                unicode(self.root_block_usage_key),
+            )
+
+        # Reuse the block structure transformed earlier for a usage with
+        # the same signature, if any.
+        transform_cache_key = self._get_transform_cache_key(transformers, block_structure, starting_block_usage_key)
+        if transform_cache_key is not None:
+            transformed_block_structure = self.transform_cache.get(transform_cache_key)
+            if transformed_block_structure is not None:
+                return transformed_block_structure.copy()
+
+        if collected_block_structure is not None:
+            block_structure = block_structure.copy()
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
             # requested location.  The rest of the structure will be pruned
             # as part of the transformation.
-            if starting_block_usage_key not in block_structure:
-                raise UsageKeyNotInBlockStructure(
-                    "The requested usage_key '{0}' is not found in the block_structure with root '{1}'",
-                    unicode(starting_block_usage_key),
-                    unicode(self.root_block_usage_key),
-                )
             block_structure.set_root_block(starting_block_usage_key)
         transformers.transform(block_structure)
+
+        if transform_cache_key is not None:
+            # Callers may modify the returned block structure, so cache a
+            # copy of it.
+            self.transform_cache.set(transform_cache_key, block_structure.copy(), len(block_structure))
         return block_structure
 
     def get_collected(self):
@@ -115,6 +153,19 @@ class BlockStructureManager(object):
         """
         self.block_structure_cache.delete(self.root_block_usage_key)
 
+    def _get_transform_cache_key(self, transformers, block_structure, starting_block_usage_key):
+        """
+        Returns the key under which the transform of the given collected
+        block structure by the given transformers is cached, or None if
+        it is not to be cached.
+        """
+        if self.transform_cache is None or block_structure.collected_version is None:
+            return None
+        signature = transformers.get_user_signature(block_structure)
+        if signature is None:
+            return None
+        return (block_structure.collected_version, starting_block_usage_key, signature)
+
     @contextmanager
     def _bulk_operations(self):
         """
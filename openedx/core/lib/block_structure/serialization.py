@@ -0,0 +1,210 @@
+"""
+Module for serializing the collected data of BlockStructure objects.
+
+The serialized data starts with a prefix identifying the version of the
+format, followed by a small pickled dict that maps section names to
+independently compressed sections, so that each section is decompressed
+and unpickled only when it is needed:
+
+    'blocks' - The usage keys of all the blocks, each stored once.  All
+        other sections refer to blocks by their index in this list.
+    'relations' - The children and parents of each block, as arrays of
+        block indices.
+    'transformer_data' - The non-block-specific data of each transformer.
+    'xblock_fields' - The collected xBlock fields of each block.
+    'transformer_block_data.<name>' - The block-specific data collected by
+        the transformer named <name>.  These sections are decoded lazily,
+        the first time the transformer's block data is accessed, since most
+        transforms only read the data of a few transformers.
+"""
+# pylint: disable=protected-access
+from array import array
+import cPickle as pickle
+import zlib
+
+from .block_structure import (
+    BlockData,
+    BlockStructureModulestoreData,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+)
+
+
+# The version of the serialization format.  Data serialized in any other
+# format is treated as missing.
+FORMAT_VERSION = 1
+
+_FORMAT_PREFIX = 'block_structure.v{}:'.format(FORMAT_VERSION)
+
+# The typecode of the arrays of block indices.
+_INDEX_TYPECODE = 'l'
+
+_TRANSFORMER_BLOCK_DATA_PREFIX = 'transformer_block_data.'
+
+
+def serialize_block_structure(block_structure):
+    """
+    Returns the serialization of the given block structure's relations,
+    transformer data and block data.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            to serialize.
+
+    Returns:
+        str - The serialized block structure.
+    """
+    block_structure._load_transformer_block_data()
+
+    block_keys = list(block_structure._block_relations)
+    block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    block_data_fields = []
+    transformer_block_data = {}
+    for index, block_key in enumerate(block_keys):
+        block_data = block_structure._block_data_map.get(block_key)
+        if block_data is None:
+            block_data_fields.append(None)
+            continue
+        block_data_fields.append(block_data.fields)
+        for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+            transformer_block_data.setdefault(transformer_name, {})[index] = transformer_data.fields
+
+    sections = {
+        'blocks': _compress(block_keys),
+        'relations': _compress(_encode_relations(block_structure._block_relations, block_keys, block_indices)),
+        'transformer_data': _compress({
+            transformer_name: transformer_data.fields
+            for transformer_name, transformer_data in block_structure.transformer_data.iteritems()
+        }),
+        'xblock_fields': _compress(block_data_fields),
+    }
+    for transformer_name, block_fields in transformer_block_data.iteritems():
+        sections[_TRANSFORMER_BLOCK_DATA_PREFIX + transformer_name] = _compress(block_fields)
+
+    return _FORMAT_PREFIX + pickle.dumps(sections, pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize_block_structure(root_block_usage_key, serialized_data):
+    """
+    Returns the block structure serialized by serialize_block_structure,
+    or None if the data was serialized in a different format.
+
+    The block-specific data of each transformer is decoded when it is
+    first accessed.
+
+    Arguments:
+        root_block_usage_key (UsageKey) - The usage key of the root of
+            the serialized block structure.
+
+        serialized_data (str) - The serialized block structure.
+
+    Returns:
+        BlockStructureModulestoreData - The deserialized block structure.
+    """
+    if not serialized_data.startswith(_FORMAT_PREFIX):
+        return None
+    sections = pickle.loads(serialized_data[len(_FORMAT_PREFIX):])
+
+    block_keys = _decompress(sections['blocks'])
+    block_structure = BlockStructureModulestoreData(root_block_usage_key)
+    block_structure._block_relations = _decode_relations(_decompress(sections['relations']), block_keys)
+
+    transformer_data_map = TransformerDataMap()
+    for transformer_name, fields in _decompress(sections['transformer_data']).iteritems():
+        transformer_data = TransformerData()
+        transformer_data.fields = fields
+        dict.__setitem__(transformer_data_map, transformer_name, transformer_data)
+    block_structure.transformer_data = transformer_data_map
+
+    block_data_map = {}
+    for block_key, fields in zip(block_keys, _decompress(sections['xblock_fields'])):
+        if fields is not None:
+            block_data = BlockData(block_key)
+            block_data.fields = fields
+            block_data_map[block_key] = block_data
+    block_structure._block_data_map = block_data_map
+
+    block_structure._pending_transformer_block_data = {
+        section_name[len(_TRANSFORMER_BLOCK_DATA_PREFIX):]: _TransformerBlockDataSection(section_data, block_keys)
+        for section_name, section_data in sections.iteritems()
+        if section_name.startswith(_TRANSFORMER_BLOCK_DATA_PREFIX)
+    }
+    return block_structure
+
+
+class _TransformerBlockDataSection(object):
+    """
+    A serialized section of a transformer's block-specific data, which is
+    decoded on the first call to load.  The decoded data is kept, so copies
+    of a block structure can share a single section.
+    """
+    def __init__(self, section_data, block_keys):
+        self._section_data = section_data
+        self._block_keys = block_keys
+        self._block_fields = None
+
+    def load(self):
+        """
+        Returns a dict mapping each block's usage key to the fields of the
+        transformer's data for the block.  The fields dicts are shared, and
+        must be copied before being modified.
+        """
+        if self._block_fields is None:
+            self._block_fields = {
+                self._block_keys[index]: fields
+                for index, fields in _decompress(self._section_data).iteritems()
+            }
+            self._section_data = None
+        return self._block_fields
+
+
+def _encode_relations(block_relations, block_keys, block_indices):
+    """
+    Returns the children and parents of the given blocks, each encoded as a
+    pair of a flat array of block indices and an array of the offset of
+    each block's entries in it.
+    """
+    encoded_relations = []
+    for relation_name in ('children', 'parents'):
+        indices = array(_INDEX_TYPECODE)
+        offsets = array(_INDEX_TYPECODE, [0])
+        for block_key in block_keys:
+            indices.extend(block_indices[key] for key in getattr(block_relations[block_key], relation_name))
+            offsets.append(len(indices))
+        encoded_relations.append((indices.tostring(), offsets.tostring()))
+    return encoded_relations
+
+
+def _decode_relations(encoded_relations, block_keys):
+    """
+    Returns the block relations map encoded by _encode_relations.
+    """
+    block_relations = {block_key: _BlockRelations() for block_key in block_keys}
+    for relation_name, (indices_string, offsets_string) in zip(('children', 'parents'), encoded_relations):
+        indices = array(_INDEX_TYPECODE)
+        indices.fromstring(indices_string)
+        offsets = array(_INDEX_TYPECODE)
+        offsets.fromstring(offsets_string)
+        for index, block_key in enumerate(block_keys):
+            setattr(
+                block_relations[block_key],
+                relation_name,
+                [block_keys[related_index] for related_index in indices[offsets[index]:offsets[index + 1]]],
+            )
+    return block_relations
+
+
+def _compress(data):
+    """
+    Returns the compressed pickled serialization of the given data.
+    """
+    return zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+
+def _decompress(data):
+    """
+    Returns the data serialized by _compress.
+    """
+    return pickle.loads(zlib.decompress(data))
@@ -221,3 +221,23 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
+
+    def test_copy(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        transformer = MockTransformer()
+        block_structure.set_transformer_data(transformer, 'global', 'global.val')
+        block_structure.set_transformer_block_field(1, transformer, 'key', 'b1.val')
+
+        structure_copy = block_structure.copy()
+        self.assert_block_structure(structure_copy, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        self.assertEquals(structure_copy.get_transformer_data(transformer, 'global'), 'global.val')
+        self.assertEquals(structure_copy.get_transformer_block_field(1, transformer, 'key'), 'b1.val')
+
+        # mutating the copy leaves the original intact
+        structure_copy.remove_block(1, keep_descendants=False)
+        structure_copy.set_transformer_data(transformer, 'global', 'global.new_val')
+        structure_copy.set_transformer_block_field(2, transformer, 'key', 'b2.val')
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        self.assertEquals(block_structure.get_transformer_data(transformer, 'global'), 'global.val')
+        self.assertEquals(block_structure.get_transformer_block_field(1, transformer, 'key'), 'b1.val')
+        self.assertIsNone(block_structure.get_transformer_block_field(2, transformer, 'key'))
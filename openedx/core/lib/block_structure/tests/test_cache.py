@@ -1,9 +1,12 @@
 """
 Tests for block_structure/cache.py
 """
+from mock import patch
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
+from openedx.core.lib.cache_utils import ProcessLRUCache
+
 from ..cache import BlockStructureCache
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer
 
@@ -54,3 +57,67 @@ class TestBlockStructureCache(ChildrenMapTestMixin, TestCase):
         self.assertIsNone(
             self.block_structure_cache.get(self.block_structure.root_block_usage_key)
         )
+
+
+@attr('shard_2')
+class TestBlockStructureProcessCache(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for BlockStructureCache with a cache in the memory of the process.
+    """
+    def setUp(self):
+        super(TestBlockStructureProcessCache, self).setUp()
+        self.children_map = self.SIMPLE_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        self.mock_cache = MockCache()
+        self.block_structure_cache = BlockStructureCache(self.mock_cache, ProcessLRUCache('test', 1000))
+
+    def _new_process_block_structure_cache(self):
+        """
+        Returns a BlockStructureCache for another process, sharing the same
+        cache but not the same process cache.
+        """
+        return BlockStructureCache(self.mock_cache, ProcessLRUCache('test', 1000))
+
+    def test_get_from_process_cache(self):
+        self.block_structure_cache.add(self.block_structure)
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        first_block_structure = self.block_structure_cache.get(root_block_usage_key)
+
+        with patch('openedx.core.lib.block_structure.cache.deserialize_block_structure') as mock_deserialize:
+            cached_block_structure = self.block_structure_cache.get(root_block_usage_key)
+        self.assertFalse(mock_deserialize.called)
+        self.assert_block_structure(cached_block_structure, self.children_map)
+
+        # Each caller gets its own copy to transform.
+        cached_block_structure.remove_block(1, keep_descendants=False)
+        self.assert_block_structure(first_block_structure, self.children_map)
+        self.assert_block_structure(self.block_structure_cache.get(root_block_usage_key), self.children_map)
+
+    def test_process_cache_sized_by_blocks(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        block_structure_cache = BlockStructureCache(
+            self.mock_cache, ProcessLRUCache('test', len(self.children_map) - 1)
+        )
+        block_structure_cache.add(self.block_structure)
+        block_structure_cache.get(root_block_usage_key)
+
+        # The structure has more blocks than the process cache holds, so it
+        # is deserialized again.
+        with patch('openedx.core.lib.block_structure.cache.deserialize_block_structure') as mock_deserialize:
+            block_structure_cache.get(root_block_usage_key)
+        self.assertTrue(mock_deserialize.called)
+
+    def test_invalidated_by_other_process(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        self.block_structure_cache.add(self.block_structure)
+        self.block_structure_cache.get(root_block_usage_key)
+
+        other_block_structure_cache = self._new_process_block_structure_cache()
+        other_block_structure_cache.delete(root_block_usage_key)
+        self.assertIsNone(self.block_structure_cache.get(root_block_usage_key))
+
+        linear_block_structure = self.create_block_structure(self.LINEAR_CHILDREN_MAP)
+        other_block_structure_cache.add(linear_block_structure)
+        self.assert_block_structure(
+            self.block_structure_cache.get(root_block_usage_key), self.LINEAR_CHILDREN_MAP
+        )
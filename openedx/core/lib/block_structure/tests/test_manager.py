@@ -4,6 +4,8 @@ Tests for manager.py
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
+from openedx.core.lib.cache_utils import ProcessLRUCache
+
 from ..block_structure import BlockStructureBlockData
 from ..exceptions import UsageKeyNotInBlockStructure
 from ..manager import BlockStructureManager
@@ -85,6 +87,21 @@ class TestTransformer1(MockTransformer):
         return data_key + 't1.val1.' + unicode(block_key)
 
 
+class TestSignedTransformer(TestTransformer1):
+    """
+    Test Transformer class whose transform is identified by a user
+    signature, which is the usage_info itself.
+    """
+    transform_call_count = 0
+
+    def get_user_signature(self, usage_info, block_structure):
+        return usage_info
+
+    def transform(self, usage_info, block_structure):
+        super(TestSignedTransformer, self).transform(usage_info, block_structure)
+        TestSignedTransformer.transform_call_count += 1
+
+
 @attr('shard_2')
 class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
     """
@@ -122,7 +139,8 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
             self.assertGreater(self.modulestore.get_items_call_count, 0)
         else:
             self.assertEquals(self.modulestore.get_items_call_count, 0)
-        self.assertEquals(self.cache.set_call_count, 1 if expect_cache_updated else 0)
+        # The block structure is cached along with its stamp.
+        self.assertEquals(self.cache.set_call_count, 2 if expect_cache_updated else 0)
 
     def test_get_transformed(self):
         with mock_registered_transformers(self.registered_transformers):
@@ -139,6 +157,26 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
+    def test_get_transformed_with_collected_block_structure(self):
+        with mock_registered_transformers(self.registered_transformers):
+            collected_block_structure = self.bs_manager.get_collected()
+            self.cache.map.clear()
+            block_structure = self.bs_manager.get_transformed(
+                self.transformers,
+                collected_block_structure=collected_block_structure,
+            )
+        self.assert_block_structure(block_structure, self.children_map)
+        TestTransformer1.assert_transformed(block_structure)
+
+        # the cache is not consulted, and the collected structure is untouched
+        self.assertEquals(self.cache.map, {})
+        for block_key in collected_block_structure:
+            self.assertIsNone(
+                collected_block_structure.get_transformer_block_field(
+                    block_key, TestTransformer1, TestTransformer1.transform_data_key
+                )
+            )
+
     def test_get_transformed_with_nonexistent_starting_block(self):
         with mock_registered_transformers(self.registered_transformers):
             with self.assertRaises(UsageKeyNotInBlockStructure):
@@ -166,3 +204,70 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+
+@attr('shard_2')
+class TestBlockStructureManagerTransformCache(TestCase, ChildrenMapTestMixin):
+    """
+    Test class for BlockStructureManager with a cache of transformed block
+    structures.
+    """
+    def setUp(self):
+        super(TestBlockStructureManagerTransformCache, self).setUp()
+
+        TestSignedTransformer.transform_call_count = 0
+        self.registered_transformers = [TestSignedTransformer()]
+        with mock_registered_transformers(self.registered_transformers):
+            self.transformers = BlockStructureTransformers(self.registered_transformers, usage_info='group1')
+
+        self.children_map = self.SIMPLE_CHILDREN_MAP
+        self.bs_manager = BlockStructureManager(
+            root_block_usage_key=0,
+            modulestore=MockModulestoreFactory.create(self.children_map),
+            cache=MockCache(),
+            transform_cache=ProcessLRUCache('test', 100),
+        )
+
+    def get_transformed(self, **kwargs):
+        """
+        Returns the block structure transformed by the manager, verifying
+        its content.
+        """
+        with mock_registered_transformers(self.registered_transformers):
+            block_structure = self.bs_manager.get_transformed(self.transformers, **kwargs)
+        TestSignedTransformer.assert_transformed(block_structure)
+        return block_structure
+
+    def test_same_signature(self):
+        block_structure = self.get_transformed()
+        block_structure.remove_block(1, keep_descendants=False)
+
+        # The cached transform is reused, and isn't affected by changes
+        # to the block structures returned.
+        self.assert_block_structure(self.get_transformed(), self.children_map)
+        self.assertEquals(TestSignedTransformer.transform_call_count, 1)
+
+    def test_different_signature(self):
+        self.get_transformed()
+        self.transformers.usage_info = 'group2'
+        self.get_transformed()
+        self.assertEquals(TestSignedTransformer.transform_call_count, 2)
+
+    def test_different_starting_block(self):
+        self.get_transformed()
+        block_structure = self.get_transformed(starting_block_usage_key=1)
+        self.assert_block_structure(block_structure, [[], [3, 4], [], [], []], missing_blocks=[0, 2])
+        self.assertEquals(TestSignedTransformer.transform_call_count, 2)
+
+    def test_no_signature(self):
+        self.transformers.usage_info = None
+        self.get_transformed()
+        self.get_transformed()
+        self.assertEquals(TestSignedTransformer.transform_call_count, 2)
+
+    def test_updated_collected(self):
+        self.get_transformed()
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected()
+        self.get_transformed()
+        self.assertEquals(TestSignedTransformer.transform_call_count, 2)
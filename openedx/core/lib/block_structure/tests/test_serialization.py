@@ -0,0 +1,170 @@
+"""
+Tests for block_structure/serialization.py
+"""
+# pylint: disable=protected-access
+import cPickle as pickle
+import os
+import timeit
+
+from nose.plugins.attrib import attr
+from opaque_keys.edx.locator import CourseLocator
+from unittest import TestCase, skipUnless
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from ..block_structure import BlockStructureModulestoreData
+from ..serialization import deserialize_block_structure, serialize_block_structure
+from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, MockTransformer
+
+
+@attr('shard_2')
+class TestSerialization(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for serialize_block_structure and deserialize_block_structure.
+    """
+    def setUp(self):
+        super(TestSerialization, self).setUp()
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map, BlockStructureModulestoreData)
+        self.block_structure._add_transformer(MockTransformer)
+        for block_key in range(len(self.children_map)):
+            self.block_structure._get_or_create_block(block_key).display_name = 'Block {}'.format(block_key)
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'test', block_key * 10)
+
+    def _serialize_and_deserialize(self):
+        """
+        Returns the block structure after a round trip through the
+        serialization.
+        """
+        return deserialize_block_structure(0, serialize_block_structure(self.block_structure))
+
+    def test_round_trip(self):
+        block_structure = self._serialize_and_deserialize()
+        self.assert_block_structure(block_structure, self.children_map)
+        self.assertEquals(block_structure._get_transformer_data_version(MockTransformer), MockTransformer.VERSION)
+        for block_key in range(len(self.children_map)):
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'display_name'), 'Block {}'.format(block_key))
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'test'), block_key * 10
+            )
+
+    def test_transformer_block_data_loaded_lazily(self):
+        block_structure = self._serialize_and_deserialize()
+        self.assertIn(MockTransformer.name(), block_structure._pending_transformer_block_data)
+
+        block_structure.remove_block(4, keep_descendants=False)
+        block_structure_copy = block_structure.copy()
+        block_structure_copy.set_transformer_block_field(1, MockTransformer, 'test', 'changed')
+
+        self.assertEquals(block_structure_copy._pending_transformer_block_data, {})
+        self.assertIsNone(block_structure_copy.get_transformer_block_field(4, MockTransformer, 'test'))
+        # The copy's changes don't affect the original structure.
+        self.assertEquals(block_structure.get_transformer_block_field(1, MockTransformer, 'test'), 10)
+
+    def test_outdated_format(self):
+        self.assertIsNone(
+            deserialize_block_structure(0, 'block_structure.v0:' + pickle.dumps({}, pickle.HIGHEST_PROTOCOL))
+        )
+        self.assertIsNone(
+            deserialize_block_structure(
+                0,
+                zpickle((
+                    self.block_structure._block_relations,
+                    self.block_structure.transformer_data,
+                    self.block_structure._block_data_map,
+                )),
+            )
+        )
+
+    def test_smaller_than_pickled_structure(self):
+        children_map = [range(index * 5 + 1, index * 5 + 6) if index < 200 else [] for index in range(1001)]
+        block_structure = self.create_block_structure(children_map, BlockStructureModulestoreData)
+        for block_key in range(len(children_map)):
+            block_structure._get_or_create_block(block_key).display_name = 'Block {}'.format(block_key)
+        self.assertLess(
+            len(serialize_block_structure(block_structure)),
+            len(zpickle((
+                block_structure._block_relations,
+                block_structure.transformer_data,
+                block_structure._block_data_map,
+            ))),
+        )
+
+
+# Numbers of chapters, sequentials per chapter, verticals per sequential and
+# leaf blocks per vertical of the benchmarked course: 6,051 blocks in all.
+BENCHMARK_COURSE_SHAPE = (11, 9, 10, 5)
+
+
+@skipUnless(os.environ.get('BLOCK_STRUCTURE_PERF_TEST'), 'Block structure serialization benchmark')
+class SerializationBenchmark(TestCase):
+    """
+    Compares the size and deserialization time of a synthetic 6,051 block
+    course's structure, with the data of two transformers, between a zpickle
+    of its relations, transformer data and block data map, as
+    BlockStructureCache used to store, and serialize_block_structure.
+    """
+    def setUp(self):
+        super(SerializationBenchmark, self).setUp()
+        course_key = CourseLocator('org', 'course', 'run')
+        root_key = course_key.make_usage_key('course', 'course')
+        self.block_structure = BlockStructureModulestoreData(root_key)
+        self.block_structure._add_transformer(MockTransformer)
+        self.block_structure._add_transformer(MockFilteringTransformer)
+
+        def add_blocks(block_key, block_types, counts):
+            """
+            Adds the data of `block_key` to the structure, along with the
+            tree of its descendants, which has counts[0] children of type
+            block_types[0] and so on.
+            """
+            block = self.block_structure._get_or_create_block(block_key)
+            block.display_name = u'Block {}'.format(block_key.block_id)
+            block.graded = block_key.block_type == 'sequential'
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'visible', True)
+            self.block_structure.set_transformer_block_field(
+                block_key, MockFilteringTransformer, 'group_access', {block_key.block_id: [1]}
+            )
+            if not counts:
+                return
+            for index in xrange(counts[0]):
+                child_key = course_key.make_usage_key(block_types[0], '{}_{}'.format(block_key.block_id, index))
+                self.block_structure._add_relation(block_key, child_key)
+                add_blocks(child_key, block_types[1:], counts[1:])
+
+        add_blocks(root_key, ('chapter', 'sequential', 'vertical', 'html'), BENCHMARK_COURSE_SHAPE)
+        self.root_key = root_key
+
+    def _time(self, description, func, number=10):
+        """
+        Prints and returns the average time, in seconds, of `number` calls of `func`.
+        """
+        duration = timeit.timeit(func, number=number) / number
+        print "{}: {:.1f}ms".format(description, duration * 1000)
+        return duration
+
+    def test_serialization(self):
+        zpickled_data = zpickle((
+            self.block_structure._block_relations,
+            self.block_structure.transformer_data,
+            self.block_structure._block_data_map,
+        ))
+        serialized_data = serialize_block_structure(self.block_structure)
+        print "Size: {}KB as a zpickle, {}KB serialized".format(len(zpickled_data) / 1024, len(serialized_data) / 1024)
+
+        def deserialize_and_load_transformer():
+            """
+            Deserializes the structure, and reads the block data of one of
+            its transformers.
+            """
+            block_structure = deserialize_block_structure(self.root_key, serialized_data)
+            block_structure.get_transformer_block_field(self.root_key, MockTransformer, 'visible')
+
+        zunpickle_duration = self._time('Deserializing the zpickle', lambda: zunpickle(zpickled_data))
+        deserialize_duration = self._time(
+            'Deserializing', lambda: deserialize_block_structure(self.root_key, serialized_data)
+        )
+        self._time('Deserializing and loading the data of a transformer', deserialize_and_load_transformer)
+
+        self.assertLess(len(serialized_data), len(zpickled_data))
+        self.assertLess(deserialize_duration, zunpickle_duration)
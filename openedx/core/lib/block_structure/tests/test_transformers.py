@@ -81,3 +81,23 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
             self.assertTrue(self.transformers.is_collected_outdated(block_structure))
             self.transformers.collect(block_structure)
             self.assertFalse(self.transformers.is_collected_outdated(block_structure))
+
+    def test_get_user_signature(self):
+        self.add_mock_transformer()
+        block_structure = MagicMock()
+
+        # MockTransformer doesn't define a user signature.
+        self.assertIsNone(self.transformers.get_user_signature(block_structure))
+
+        with patch(
+            'openedx.core.lib.block_structure.tests.helpers.MockTransformer.get_user_signature',
+            return_value='signature',
+        ):
+            with patch(
+                'openedx.core.lib.block_structure.tests.helpers.MockFilteringTransformer.get_user_signature',
+                return_value=(),
+            ):
+                self.assertEquals(
+                    self.transformers.get_user_signature(block_structure),
+                    (('MockFilteringTransformer', 1, ()), ('MockTransformer', 1, 'signature')),
+                )
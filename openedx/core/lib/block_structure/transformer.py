@@ -128,6 +128,40 @@ class BlockStructureTransformer(object):
         """
         raise NotImplementedError
 
+    def get_user_signature(self, usage_info, block_structure):
+        """
+        Returns a hashable value summarizing everything about the given
+        usage_info that the transform of the given block_structure
+        depends on, so that the transformed block structure can be
+        cached and reused for all usages with the same signature.
+
+        For example, a transformer that only removes blocks hidden from
+        non-staff users can return whether the user has staff access.
+        A transformer whose transform does not depend on the usage_info
+        at all can return an empty tuple.
+
+        The signature is computed before the block_structure is
+        transformed by any of the transformers, and, like the transform
+        method, must not access the modulestore.
+
+        Transformers whose transform can't be summarized this way,
+        for example because it has side effects or depends on
+        randomness, should return None, which is the default.  The
+        transformed block structure is then never cached.
+
+        Arguments:
+            usage_info (any negotiated type) - A usage-specific object
+                that is passed to the block_structure and forwarded to all
+                requested Transformers in order to apply a
+                usage-specific transform.
+
+            block_structure (BlockStructureBlockData) - A block
+                structure, with already collected data for the
+                transformer, that is about to be transformed.  It must
+                not be modified.
+        """
+        return None
+
 
 class FilteringTransformerMixin(BlockStructureTransformer):
     """
@@ -114,6 +114,24 @@ class BlockStructureTransformers(object):
         # Prune the block structure to remove any unreachable blocks.
         block_structure._prune_unreachable()  # pylint: disable=protected-access
 
+    def get_user_signature(self, block_structure):
+        """
+        Returns a hashable signature identifying the transformation of
+        the given block structure by the transformers in the collection
+        for the current usage_info, or None if any transformer's
+        transform can't be identified by a signature.
+
+        Usages with the same signature are transformed into the same
+        block structure, so it can be cached.
+        """
+        signature = []
+        for transformer in self._transformers['supports_filter'] + self._transformers['no_filter']:
+            transformer_signature = transformer.get_user_signature(self.usage_info, block_structure)
+            if transformer_signature is None:
+                return None
+            signature.append((transformer.name(), transformer.VERSION, transformer_signature))
+        return tuple(signature)
+
     def _transform_with_filters(self, block_structure):
         """
         Transforms the given block_structure using the transform_block_filters
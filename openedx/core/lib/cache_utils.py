@@ -4,7 +4,10 @@ Utilities related to caching.
 import collections
 import cPickle as pickle
 import functools
+import threading
 import zlib
+
+import dogstats_wrapper as dog_stats_api
 from xblock.core import XBlock
 
 
@@ -83,6 +86,92 @@ class memoized(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class ProcessLRUCache(object):
+    """
+    A cache of recently used values, held in the memory of the current
+    process.  The total size of the values, as given by the caller, is
+    bounded by max_size; the least recently used values are evicted first.
+
+    Since values are shared by all the callers in the process, they must
+    not be modified.
+
+    Hits, misses and evictions are counted in the '<name>.hit',
+    '<name>.miss' and '<name>.eviction' metrics.
+    """
+    def __init__(self, name, max_size):
+        """
+        Arguments:
+            name (string) - The name of the cache, used for its metrics.
+            max_size (int) - The maximum total size of the cached values.
+        """
+        self.name = name
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for the given key, or default if there
+        is none.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # Move the entry to the most recently used end.
+                self._entries[key] = entry
+        self._increment('hit' if entry is not None else 'miss')
+        return entry[0] if entry is not None else default
+
+    def set(self, key, value, size):
+        """
+        Caches the given value, of the given size, for the given key,
+        evicting the least recently used values as needed.  Values larger
+        than max_size are not cached.
+        """
+        num_evicted = 0
+        with self._lock:
+            self._remove(key)
+            if size <= self.max_size:
+                self._entries[key] = (value, size)
+                self.size += size
+                while self.size > self.max_size:
+                    __, (__, evicted_size) = self._entries.popitem(last=False)
+                    self.size -= evicted_size
+                    num_evicted += 1
+        if num_evicted:
+            self._increment('eviction', num_evicted)
+
+    def delete(self, key):
+        """
+        Removes the value cached for the given key, if any.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """
+        Removes all the cached values.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        """
+        Removes the value cached for the given key; the lock must be held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def _increment(self, event, value=1):
+        """
+        Increments the metric of the given cache event.
+        """
+        dog_stats_api.increment('{}.{}'.format(self.name, event), value)
+
+
 def hashvalue(arg):
     """
     If arg is an xblock, use its location. otherwise just turn it into a string
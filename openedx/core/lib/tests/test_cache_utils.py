@@ -2,10 +2,10 @@
 Tests for cache_utils.py
 """
 import ddt
-from mock import MagicMock
+from mock import MagicMock, call, patch
 from unittest import TestCase
 
-from openedx.core.lib.cache_utils import memoize_in_request_cache
+from openedx.core.lib.cache_utils import ProcessLRUCache, memoize_in_request_cache
 
 
 @ddt.ddt
@@ -62,3 +62,58 @@ class TestMemoizeInRequestCache(TestCase):
                 func_to_memoize(*arg_list2)
 
             self.assertEquals(self.func_to_count.call_count, 2)
+
+
+class TestProcessLRUCache(TestCase):
+    """
+    Test the ProcessLRUCache class.
+    """
+    def setUp(self):
+        super(TestProcessLRUCache, self).setUp()
+        self.cache = ProcessLRUCache('test_cache', max_size=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 'value', 4)
+        self.assertEqual(self.cache.get('a'), 'value')
+        self.cache.set('a', 'new value', 6)
+        self.assertEqual(self.cache.get('a'), 'new value')
+        self.assertEqual(self.cache.size, 6)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.set('a', 1, 4)
+        self.cache.set('b', 2, 4)
+        self.cache.get('a')
+        self.cache.set('c', 3, 4)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(self.cache.size, 8)
+
+    def test_too_large_value_not_cached(self):
+        self.cache.set('a', 1, 4)
+        self.cache.set('a', 2, 11)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_delete_and_clear(self):
+        self.cache.set('a', 1, 4)
+        self.cache.set('b', 2, 4)
+        self.cache.delete('a')
+        self.cache.delete('missing')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.size, 4)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.size, 0)
+
+    @patch('openedx.core.lib.cache_utils.dog_stats_api.increment')
+    def test_metrics(self, mock_increment):
+        self.cache.set('a', 1, 6)
+        self.cache.get('a')
+        self.cache.get('b')
+        self.cache.set('b', 2, 6)
+        self.assertEqual(
+            mock_increment.call_args_list,
+            [call('test_cache.hit', 1), call('test_cache.miss', 1), call('test_cache.eviction', 1)],
+        )